@@ -0,0 +1,186 @@
+"""Clean-air race pace derived from lap data.
+
+A lap counts as a clean-air lap when:
+- the car crossed the line at least `gap_threshold` seconds behind the car
+  ahead on the same lap (the leader always qualifies)
+- it is not an in-lap or an out-lap
+- it is not the opening lap
+- it has a lap time
+
+Each driver's pace is a robust average of those laps. Laps further than
+`MAD_CUTOFF` scaled median absolute deviations from the driver's median are
+dropped (traffic the gap filter missed, safety cars, incidents), and the
+rest are averaged.
+
+The whole session is processed at once. Gaps come from one sort by (lap,
+crossing time). Medians are index arithmetic on one sort by (driver, lap
+time), and the means are `bincount` reductions. Results are cached per
+session under f1_cache/clean_air/.
+
+`python -m features.clean_air` writes models/clean_air_pace.json with each
+configured race's pace per driver. The API reads it through
+`features.pace_store` to fill `clean_air_race_pace` when a request omits it.
+
+Usage (from the repo root):
+    python -m features.clean_air --all
+    python -m features.clean_air usa --gap 1.5 --force
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from features.pace_store import PACE_STORE_PATH, load_store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLEAN_AIR_CACHE_DIR = os.path.join(os.getenv("F1_CACHE_DIR") or os.path.join(REPO_ROOT, "f1_cache"), "clean_air")
+
+DEFAULT_GAP_THRESHOLD = 2.0
+MAD_CUTOFF = 3.0
+# Consistency constant: scaled MAD estimates the standard deviation of normal data
+MAD_SCALE = 1.4826
+MIN_CLEAN_LAPS = 3
+
+
+def gap_ahead(lap_number: np.ndarray, session_time: np.ndarray) -> np.ndarray:
+    """Seconds to the car that crossed the line just before, on the same lap; inf for the leader."""
+    order = np.lexsort((session_time, lap_number))
+    laps, times = lap_number[order], session_time[order]
+    gaps = np.full(len(order), np.inf)
+    same_lap = laps[1:] == laps[:-1]
+    gaps[1:][same_lap] = np.diff(times)[same_lap]
+    out = np.empty_like(gaps)
+    out[order] = gaps
+    # Laps without a crossing time cannot be placed
+    out[np.isnan(session_time)] = np.nan
+    return out
+
+
+def _group_medians(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median per group code (values without NaN); NaN for empty groups."""
+    medians = np.full(n_groups, np.nan)
+    if not len(values):
+        return medians
+    ordered = values[np.lexsort((values, codes))]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    # Middle element(s) of each group's sorted slice: equal for odd counts
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (ordered[low] + ordered[high]) / 2
+    return medians
+
+
+def clean_air_pace(laps: pd.DataFrame, gap_threshold: float = DEFAULT_GAP_THRESHOLD) -> pd.DataFrame:
+    """Per-driver clean-air pace from a `training.extract` lap table.
+
+    Returns Driver (sorted), CleanAirRacePace (s) and CleanAirLaps. Drivers
+    with fewer than MIN_CLEAN_LAPS usable laps get NaN.
+    """
+    drivers, codes = np.unique(laps["Driver"].to_numpy(dtype=str), return_inverse=True)
+    lap_time = laps["LapTime (s)"].to_numpy(dtype=np.float64)
+    lap_number = laps["LapNumber"].to_numpy(dtype=np.float64)
+    gaps = gap_ahead(lap_number, laps["Time (s)"].to_numpy(dtype=np.float64))
+
+    clean = (
+        (gaps >= gap_threshold)
+        & ~laps["InLap"].to_numpy(dtype=bool)
+        & ~laps["OutLap"].to_numpy(dtype=bool)
+        & (lap_number > 1)
+        & ~np.isnan(lap_time)
+    )
+    n = len(drivers)
+    clean_codes, clean_times = codes[clean], lap_time[clean]
+    median = _group_medians(clean_codes, clean_times, n)
+    deviation = np.abs(clean_times - median[clean_codes])
+    mad = _group_medians(clean_codes, deviation, n) * MAD_SCALE
+    # A zero MAD (identical laps) keeps every lap equal to the median
+    keep = deviation <= MAD_CUTOFF * np.where(mad > 0, mad, np.inf)[clean_codes]
+
+    counts = np.bincount(clean_codes[keep], minlength=n)
+    sums = np.bincount(clean_codes[keep], weights=clean_times[keep], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pace = np.where(counts >= MIN_CLEAN_LAPS, sums / counts, np.nan)
+    return pd.DataFrame({"Driver": drivers, "CleanAirRacePace (s)": pace, "CleanAirLaps": counts})
+
+
+def _cache_path(year: int, round_number: int, session: str, gap_threshold: float) -> str:
+    return os.path.join(CLEAN_AIR_CACHE_DIR, f"{year}_{round_number:02d}_{session}_gap{gap_threshold:g}.npz")
+
+
+def session_pace(year: int, round_number: int, session: str = "R", gap_threshold: float = DEFAULT_GAP_THRESHOLD,
+                 force: bool = False, offline: bool = False, laps: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Cached `clean_air_pace` of one session.
+
+    The session's laps are extracted on first use unless the caller already
+    has them in `laps`.
+    """
+    path = _cache_path(year, round_number, session, gap_threshold)
+    if not force and os.path.exists(path):
+        with np.load(path) as data:
+            return pd.DataFrame({column: data[column] for column in data.files})
+
+    if laps is None:
+        from training.extract import session_tables
+
+        laps, _ = session_tables(year, round_number, session, force=force, offline=offline)
+    pace = clean_air_pace(laps, gap_threshold)
+    os.makedirs(CLEAN_AIR_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path[:-4]}.tmp.npz"
+    np.savez(tmp_path, **{
+        column: pace[column].to_numpy(dtype=str if column == "Driver" else None) for column in pace.columns
+    })
+    os.replace(tmp_path, path)
+    return pace
+
+
+def pace_by_driver(pace: pd.DataFrame) -> Dict[str, float]:
+    """{driver code: pace} for drivers with a clean-air pace."""
+    known = pace["CleanAirRacePace (s)"].notna()
+    return dict(zip(pace["Driver"][known], pace["CleanAirRacePace (s)"][known].round(3)))
+
+
+def build_store(races: Dict[str, Tuple[int, int, str]], gap_threshold: float = DEFAULT_GAP_THRESHOLD,
+                force: bool = False, offline: bool = False, path: str = PACE_STORE_PATH) -> Dict[str, Any]:
+    """Write the per-race pace table the API fills omitted paces from."""
+    store: Dict[str, Any] = {"gap_threshold": gap_threshold, "races": {}}
+    for race, (year, round_number, session) in races.items():
+        pace = session_pace(year, round_number, session, gap_threshold, force=force, offline=offline)
+        store["races"][race] = {"session": [year, round_number, session], "drivers": pace_by_driver(pace)}
+    store["version"] = hashlib.sha256(json.dumps(store, sort_keys=True).encode()).hexdigest()[:12]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(store, f, indent=2)
+    os.replace(tmp_path, path)
+    return store
+
+
+def main():
+    from training.races import RACES
+
+    parser = argparse.ArgumentParser(description="Derive clean-air race pace from lap data")
+    parser.add_argument("races", nargs="*", help=f"Races to include: {', '.join(RACES)}")
+    parser.add_argument("--all", action="store_true", help="Every configured race")
+    parser.add_argument("--gap", type=float, default=DEFAULT_GAP_THRESHOLD, help="Minimum gap to the car ahead (s)")
+    parser.add_argument("--force", action="store_true", help="Recompute cached session paces")
+    parser.add_argument("--offline", action="store_true", help="Read FastF1 data from f1_cache only")
+    args = parser.parse_args()
+
+    races: List[str] = list(RACES) if args.all else args.races
+    if not races:
+        parser.error("name at least one race or pass --all")
+    # Several race configs can share a model key; the store is keyed by race config name, as the API looks it up
+    sessions = {race: RACES[race]["session"] for race in races if RACES[race]["model"] != "ffn"}
+    store = build_store(sessions, args.gap, force=args.force, offline=args.offline)
+    for race, entry in store["races"].items():
+        print(f"{race}: {len(entry['drivers'])} drivers from session {tuple(entry['session'])}")
+    print(f"{PACE_STORE_PATH} saved (version {store['version']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""The per-race clean-air pace table the API reads at startup.
+
+`features.clean_air` builds it from lap data; this module only locates and
+reads it, so the API can load the table without the training dependencies
+(pandas, FastF1).
+"""
+import os
+import json
+from typing import Any, Dict, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACE_STORE_PATH = os.path.join(REPO_ROOT, "models", "clean_air_pace.json")
+
+
+def load_store(path: str = PACE_STORE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,150 @@
+"""Team performance scores derived from the season datasets.
+
+For every round of a season, a constructor's points-to-date are divided by
+the leader's points-to-date. This gives a score in [0, 1], the same scale
+`TeamPerformanceScore` has always used. A driver's score is their team's
+score, and their team is taken from the rows they actually raced in, so
+mid-season seat changes are followed.
+
+Everything is computed in one pass over the dictionary-encoded columns of
+the season store:
+- one `bincount` of Points over (round, team)
+- a cumulative sum down the rounds
+- a row-wise division by the leader
+
+The result is written as a versioned table to models/team_scores/<year>.json.
+Training reads a season's table as of the round before the session it
+learns from. The API serves the latest round of the newest season.
+
+Usage (from the repo root):
+    python -m features.team_scores 2024 2025
+"""
+import os
+import json
+import argparse
+import unicodedata
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEAM_SCORES_DIR = os.path.join(REPO_ROOT, "models", "team_scores")
+
+
+def driver_code(name: str) -> str:
+    """Three-letter code from a full name: 'Nico Hülkenberg' -> 'HUL'."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return ascii_name.split()[-1][:3].upper()
+
+
+def compute(season, year: int) -> Dict[str, Any]:
+    """Per-round points-to-date and scores for a `seasons.store.Season`."""
+    rounds, round_idx = np.unique(season["RoundNumber"], return_inverse=True)
+    teams = season.categories("Team")
+    team_idx = np.asarray(season["Team"], dtype=np.intp)
+    names = season.categories("Driver")
+    # Spellings of one driver ('Kimi Antonelli', 'Andrea Kimi Antonelli') share a code
+    drivers, name_to_driver = np.unique([driver_code(str(n)) for n in names], return_inverse=True)
+    driver_idx = name_to_driver[np.asarray(season["Driver"], dtype=np.intp)]
+    n_rounds, n_teams = len(rounds), len(teams)
+
+    points = np.bincount(round_idx * n_teams + team_idx, weights=np.asarray(season.values("Points")),
+                         minlength=n_rounds * n_teams).reshape(n_rounds, n_teams)
+    points_to_date = np.cumsum(points, axis=0)
+    leader = points_to_date.max(axis=1, keepdims=True)
+    scores = np.divide(points_to_date, leader, out=np.zeros_like(points_to_date), where=leader > 0)
+
+    driver_team = np.full((n_rounds, len(drivers)), -1, dtype=np.int64)
+    driver_team[round_idx, driver_idx] = team_idx
+
+    digest = season.schema["source_sha256"]
+    return {
+        "version": f"{year}.r{int(rounds[-1]):02d}.{digest[:8]}",
+        "season": year,
+        "source_sha256": digest,
+        "rounds": rounds.tolist(),
+        "teams": teams.tolist(),
+        "drivers": drivers.tolist(),
+        "points_to_date": points_to_date.tolist(),
+        "scores": np.round(scores, 4).tolist(),
+        "driver_team": driver_team.tolist()
+    }
+
+
+def table_path(year: int, tables_dir: Optional[str] = None) -> str:
+    return os.path.join(tables_dir or TEAM_SCORES_DIR, f"{year}.json")
+
+
+def write_table(table: Dict[str, Any], tables_dir: Optional[str] = None) -> str:
+    path = table_path(table["season"], tables_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(table, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_table(year: int, tables_dir: Optional[str] = None) -> Dict[str, Any]:
+    path = table_path(year, tables_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No team score table for {year}; run python -m features.team_scores {year}")
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def available_seasons(tables_dir: Optional[str] = None) -> List[int]:
+    root = tables_dir or TEAM_SCORES_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(int(name[:-5]) for name in os.listdir(root) if name.endswith(".json") and name[:-5].isdigit())
+
+
+def scores_as_of(table: Dict[str, Any], as_of_round: Optional[int] = None) -> Dict[str, float]:
+    """{driver code: score} after `as_of_round` (the latest round by default).
+
+    Each driver gets the team they last raced for up to that round. Drivers
+    who had not raced yet are left out.
+    """
+    rounds = np.asarray(table["rounds"])
+    last = len(rounds) - 1 if as_of_round is None else int(np.searchsorted(rounds, as_of_round, side="right")) - 1
+    if last < 0:
+        return {}
+    driver_team = np.asarray(table["driver_team"])[:last + 1]
+    raced = driver_team >= 0
+    # Row of each driver's most recent race up to `last`
+    latest_row = np.where(raced, np.arange(last + 1)[:, None], -1).max(axis=0)
+    has_team = latest_row >= 0
+    team = driver_team[latest_row[has_team], np.flatnonzero(has_team)]
+    scores = np.asarray(table["scores"])[last]
+    return {code: float(scores[t]) for code, t in zip(np.asarray(table["drivers"])[has_team], team)}
+
+
+def serving_scores(tables_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Scores the API serves: the newest season's latest round.
+
+    Drivers who only appear in older seasons keep their final score from
+    the last season they raced in.
+    """
+    drivers: Dict[str, float] = {}
+    versions = []
+    for year in available_seasons(tables_dir):
+        table = load_table(year, tables_dir)
+        drivers.update(scores_as_of(table))
+        versions.append(table["version"])
+    return {"version": versions[-1] if versions else None, "versions": versions, "drivers": drivers}
+
+
+def main():
+    from seasons.store import load
+
+    parser = argparse.ArgumentParser(description="Derive team performance scores from the season datasets")
+    parser.add_argument("years", nargs="+", type=int, help="Seasons in the columnar store")
+    args = parser.parse_args()
+    for year in args.years:
+        table = compute(load(year), year)
+        path = write_table(table)
+        print(f"{path}: {table['version']}, {len(table['drivers'])} drivers, {len(table['teams'])} teams")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import hashlib
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEATHER_CACHE_DIR = os.path.join(os.getenv("F1_CACHE_DIR") or os.path.join(REPO_ROOT, "f1_cache"), "weather")
+
+# (lat, lon, "YYYY-MM-DD HH:MM:SS" forecast slot in UTC)
+WeatherQuery = Tuple[float, float, str]
+
+
+class Forecast(NamedTuple):
+    """Rain probability (0-1) and temperature (°C) for one forecast slot."""
+    rain_probability: float
+    temperature: float
+    source: str
+
+
+def query_key(lat: float, lon: float, when: str) -> str:
+    """Content address of a forecast slot; coordinates are rounded to ~10 m."""
+    payload = json.dumps([round(float(lat), 4), round(float(lon), 4), str(when)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class WeatherProvider:
+    """Resolves forecasts for (lat, lon, time) queries; None means "no forecast"."""
+
+    def forecast(self, lat: float, lon: float, when: str) -> Optional[Forecast]:
+        return self.forecast_many([(lat, lon, when)])[0]
+
+    def forecast_many(self, queries: Iterable[WeatherQuery]) -> List[Optional[Forecast]]:
+        raise NotImplementedError
+
+
+class StubWeatherProvider(WeatherProvider):
+    """Fixture-backed provider for tests and offline runs; never touches the network.
+
+    The fixture is a JSON list of {"lat", "lon", "time", "rain_probability",
+    "temperature"} objects. Queries that are not in it resolve to None.
+    """
+
+    def __init__(self, entries: Optional[List[Dict]] = None, fixture_path: Optional[str] = None):
+        if fixture_path:
+            with open(fixture_path, "r") as f:
+                entries = json.load(f)
+        self.entries = {
+            query_key(e["lat"], e["lon"], e["time"]): Forecast(e["rain_probability"], e["temperature"], "stub")
+            for e in entries or []
+        }
+
+    def forecast_many(self, queries: Iterable[WeatherQuery]) -> List[Optional[Forecast]]:
+        return [self.entries.get(query_key(*query)) for query in queries]
+
+
+class OpenWeatherProvider(WeatherProvider):
+    """OpenWeather 5-day/3-hour forecasts with an on-disk cache.
+
+    Resolved slots are stored under `cache_dir/<query_key>.json` and reused
+    forever, so a forecast used for training stays reproducible. The raw
+    response per location is kept for `response_ttl` seconds, which lets slots
+    outside the forecast window miss without a request on every run. Bulk
+    lookups fetch each distinct location once, concurrently. Without an API
+    key only the on-disk cache is consulted.
+    """
+
+    def __init__(self, api_key: Optional[str], cache_dir: str = WEATHER_CACHE_DIR,
+                 timeout: float = 10.0, response_ttl: float = 3 * 3600):
+        self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.response_ttl = response_ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key: str, payload: Dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._path(key))
+
+    def _response(self, lat: float, lon: float) -> Dict:
+        key = query_key(lat, lon, "response")
+        cached = self._read(key)
+        if cached and time.time() - cached.get("fetched_at", 0) < self.response_ttl:
+            return cached["response"]
+
+        params = urllib.parse.urlencode({"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"})
+        with urllib.request.urlopen(f"{FORECAST_URL}?{params}", timeout=self.timeout) as resp:
+            response = json.load(resp)
+        self._write(key, {"fetched_at": time.time(), "response": response})
+        return response
+
+    def forecast_many(self, queries: Iterable[WeatherQuery]) -> List[Optional[Forecast]]:
+        queries = list(queries)
+        results: List[Optional[Forecast]] = [None] * len(queries)
+        pending: Dict[Tuple[float, float], List[int]] = {}
+        for i, (lat, lon, when) in enumerate(queries):
+            cached = self._read(query_key(lat, lon, when))
+            if cached is not None:
+                results[i] = Forecast(cached["rain_probability"], cached["temperature"], "cache")
+            else:
+                pending.setdefault((round(float(lat), 4), round(float(lon), 4)), []).append(i)
+        if not pending or not self.api_key:
+            return results
+
+        def fetch(location):
+            try:
+                return self._response(*location)
+            except Exception as e:
+                print(f"Weather lookup failed for {location}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(8, len(pending))) as pool:
+            responses = dict(zip(pending, pool.map(fetch, pending)))
+
+        for location, indices in pending.items():
+            slots = {f.get("dt_txt"): f for f in (responses[location] or {}).get("list", [])}
+            for i in indices:
+                lat, lon, when = queries[i]
+                slot = slots.get(when)
+                if slot is None:
+                    continue
+                forecast = Forecast(slot.get("pop", 0), slot.get("main", {}).get("temp"), "openweather")
+                if forecast.temperature is None:
+                    continue
+                self._write(query_key(lat, lon, when), forecast._asdict())
+                results[i] = forecast
+        return results
+
+
+def provider_from_env(offline: bool = False) -> WeatherProvider:
+    """Provider configured from the environment.
+
+    WEATHER_FIXTURE selects the stub backed by that file. Otherwise OpenWeather
+    is used with the `openweatherapi` key; offline (or without a key) it only
+    answers from the on-disk cache.
+    """
+    fixture_path = os.getenv("WEATHER_FIXTURE")
+    if fixture_path:
+        return StubWeatherProvider(fixture_path=fixture_path)
+    api_key = os.getenv("openweatherapi") or os.getenv("OPENWEATHER_API")
+    return OpenWeatherProvider(None if offline else api_key or None)
+
+
+def forecast_for_config(provider: WeatherProvider, config: Dict) -> Optional[Forecast]:
+    """Forecast for a lookup_data `config` block ({"lat", "lon", "race_datetime"})."""
+    if not config or not all(k in config for k in ("lat", "lon", "race_datetime")):
+        return None
+    return provider.forecast(config["lat"], config["lon"], config["race_datetime"])
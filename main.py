@@ -1,17 +1,49 @@
 import os
+import re
 import time
 import json
 import numpy as np
-import xgboost as xgb
 import joblib
+from functools import partial
 from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from contextlib import asynccontextmanager
+from features.pace_store import load_store as load_pace_store
+from features.team_scores import serving_scores
+from features.weather import forecast_for_config, provider_from_env
+from seasons.index import build_indexes, compare, jsonable
+from serving.admission import AdmissionController, OverloadedError
+from serving.batch import NUMERIC_COLUMNS, columns_from_input, driver_id, driver_table, validate_columns
+from serving.drift import DriftMonitor
+from serving.inference import RACE_RANGES, build_features, model_info_for, resolve_race, run_model
+from serving.loop_monitor import LoopMonitor, LoopTimeMiddleware
+from serving.prediction_log import PredictionLog
+from serving.quantized import quantize_artifact
+from serving.responses import FastJSONResponse
+from serving.streaming import NDJSON_MIME, DuplexStreamingResponse, stream_predictions
+from serving.transport import (
+    ARROW_MIME, JSON_MIME, MSGPACK_MIME, TransportError,
+    decode_batch, encode_batch, media_type_for, request_format, response_format
+)
 
 ml_models = {}
 lookup_data = {}
+admission = AdmissionController.from_env()
+weather_provider = provider_from_env()
+drift_monitor = DriftMonitor.from_env()
+prediction_log = PredictionLog.from_env()
+loop_monitor = LoopMonitor.from_env()
+season_indexes = {}
+MAX_BATCH_ROWS = int(os.getenv("MAX_BATCH_ROWS", "50000"))
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "2048"))
+SEASON_GROUPS = {"drivers": "Driver", "teams": "Team"}
+STUDENT_MODELS = {race.strip().lower() for race in os.getenv("STUDENT_MODELS", "").split(",") if race.strip()}
+QUANTIZED_MODELS = {race.strip().lower() for race in os.getenv("QUANTIZED_MODELS", "").split(",") if race.strip()}
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
 
 def load_model_artifact(file_path: str) -> Optional[Any]:
     """Helper to load model or artifact dictionary."""
@@ -26,37 +58,116 @@ def load_model_artifact(file_path: str) -> Optional[Any]:
         print(f"Error loading {file_path}: {e}")
         return None
 
+def get_driver_table():
+    """Team scores as a dense array indexed by interned driver id, for vectorized lookups.
+
+    Built once per loaded team score table and rebuilt only if `lookup_data["team_scores"]` is replaced.
+    """
+    drivers = lookup_data.get("team_scores", {}).get("drivers", {})
+    cached = lookup_data.get("driver_table")
+    if cached is None or cached[0] is not drivers:
+        cached = (drivers, driver_table(drivers))
+        lookup_data["driver_table"] = cached
+    return cached[1]
+
+def get_pace_table(race: str) -> Optional[np.ndarray]:
+    """Derived clean-air paces of one race as a dense array indexed by interned driver id.
+
+    Built per race on first use and rebuilt only if `lookup_data["clean_air"]` is replaced.
+    """
+    store = lookup_data.get("clean_air") or {}
+    cached = lookup_data.get("pace_tables")
+    if cached is None or cached[0] is not store:
+        cached = (store, {})
+        lookup_data["pace_tables"] = cached
+    if race not in cached[1]:
+        entry = store.get("races", {}).get(race)
+        cached[1][race] = driver_table(entry["drivers"]) if entry else None
+    return cached[1][race]
+
+def get_artifact_version(filename: str) -> int:
+    """Version of an artifact file: 'us_model.v3.joblib' -> 3; unversioned files are version 1."""
+    match = re.search(r"\.v(\d+)\.joblib$", filename)
+    return int(match.group(1)) if match else 1
+
 def get_race_key_from_filename(filename: str) -> str:
-    """Extract race key from filename (e.g., 'abu_dhabi_model.joblib' -> 'abudhabi')."""
-    name = filename.lower().replace("_model.joblib", "").replace("_", "").replace("-", "")
+    """Extract race key from filename (e.g., 'abu_dhabi_model.joblib' or 'abu_dhabi_model.v2.joblib' -> 'abudhabi')."""
+    name = re.sub(r"(\.v\d+|\.student)\.joblib$", ".joblib", filename.lower())
+    name = name.replace("_model.joblib", "").replace("_", "").replace("-", "")
     if name == "us":
         return "usa"
     return name
 
+def latest_artifacts(models_dir: str) -> Dict[str, str]:
+    """Filename of the newest artifact of each race; incremental updates write <name>.v<N>.joblib."""
+    latest = {}
+    for filename in os.listdir(models_dir):
+        if filename.endswith(".student.joblib"):
+            continue
+        if filename.endswith(".joblib"):
+            race_key = get_race_key_from_filename(filename)
+            if race_key not in latest or get_artifact_version(filename) > get_artifact_version(latest[race_key]):
+                latest[race_key] = filename
+    return latest
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Dynamically load all .joblib models from models/ directory
-    base_path = os.path.dirname(os.path.abspath(__file__))
-    models_dir = os.path.join(base_path, "models")
+    models_dir = MODELS_DIR
     
     if os.path.exists(models_dir):
+        latest = latest_artifacts(models_dir)
+        for race_key, filename in latest.items():
+            path = os.path.join(models_dir, filename)
+            artifact = load_model_artifact(path)
+            if artifact:
+                ml_models[race_key] = artifact
+                print(f"Loaded model for {race_key} from {filename}")
+        # Distilled students (training/distill.py) replace the full model for the races in STUDENT_MODELS
         for filename in os.listdir(models_dir):
-            if filename.endswith(".joblib"):
-                race_key = get_race_key_from_filename(filename)
-                path = os.path.join(models_dir, filename)
-                artifact = load_model_artifact(path)
+            race_key = get_race_key_from_filename(filename)
+            if filename.endswith(".student.joblib") and (race_key in STUDENT_MODELS or "all" in STUDENT_MODELS):
+                artifact = load_model_artifact(os.path.join(models_dir, filename))
                 if artifact:
                     ml_models[race_key] = artifact
-                    print(f"Loaded model for {race_key} from {filename}")
+                    print(f"Serving distilled {artifact.get('student')} student for {race_key} from {filename}")
+        # Flat float32 / binned form of the boosted models (serving/quantized.py) for the races in QUANTIZED_MODELS
+        for race_key, artifact in ml_models.items():
+            if artifact and (race_key in QUANTIZED_MODELS or "all" in QUANTIZED_MODELS):
+                try:
+                    ml_models[race_key] = quantize_artifact(artifact)
+                    print(f"Serving quantized model for {race_key}")
+                except TypeError as e:
+                    print(f"Not quantizing {race_key}: {e}")
+        # Training-time input distributions saved next to each artifact, for /drift
+        drift_monitor.load_references(models_dir, latest)
             
     # Load lookup data
     lookup_path = os.path.join(models_dir, "lookup_data.json")
     if os.path.exists(lookup_path):
         with open(lookup_path, "r") as f:
             lookup_data["data"] = json.load(f)
+
+    # Team scores derived from the season datasets (python -m features.team_scores)
+    lookup_data["team_scores"] = serving_scores()
+    get_driver_table()
+
+    # Clean-air paces derived from lap data (python -m features.clean_air) fill omitted request paces
+    lookup_data["clean_air"] = load_pace_store()
+
+    # Indexes over the columnar season store (python -m seasons.store) for the /seasons routes
+    season_indexes.update(build_indexes())
+    drift_monitor.start()
+    prediction_log.start()
+    loop_monitor.start()
     
     yield
+    loop_monitor.stop()
+    # Commits every prediction still queued before the process exits
+    prediction_log.stop()
+    drift_monitor.stop()
     ml_models.clear()
+    season_indexes.clear()
 
 app = FastAPI(
     title="F1 Race Pace Predictor",
@@ -66,6 +177,8 @@ app = FastAPI(
     docs_url="/",
     redoc_url=None
 )
+# Per-route time on the event loop, reported with the loop lag by /metrics
+app.add_middleware(LoopTimeMiddleware, monitor=loop_monitor)
 
 @app.exception_handler(405)
 async def method_not_allowed_handler(request: Request, exc):
@@ -78,34 +191,59 @@ async def method_not_allowed_handler(request: Request, exc):
         }
     )
 
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "status": "error",
+            "message": f"Server is at capacity: {exc.reason}. Please retry shortly.",
+            "path": request.url.path
+        }
+    )
+
 class PredictionInput(BaseModel):
     race_name: str = Field(description="Race name: 'abudhabi', 'qatar', 'usa', or 'mexico'")
     driver_code: str = Field(min_length=3, max_length=3, description="3-letter F1 driver code")
     qualifying_time: float = Field(gt=0, le=200, description="Qualifying lap time in seconds")
-    clean_air_race_pace: float = Field(gt=0, le=200, description="Race pace with clean air in seconds")
+    clean_air_race_pace: Optional[float] = Field(
+        None, gt=0, le=200, description="Race pace with clean air in seconds; derived from lap data when omitted"
+    )
     rain_prob: float = Field(ge=0, le=100, description="Rain probability as percentage")
     temperature: float = Field(ge=-10, le=70, description="Track temperature in Celsius")
 
     @field_validator("race_name")
     @classmethod
     def validate_race_name(cls, v: str) -> str:
-        val = v.lower().strip().replace(" ", "_").replace("-", "_")
-        if val in ["abudhabi", "abu_dhabi", "yas_marina"]:
-            return "abudhabi"
-        if val in ["qatar", "lusail"]:
-            return "qatar"
-        if val in ["usa", "united_states", "austin", "cota"]:
-            return "usa"
-        if val in ["mexico", "mexico_city"]:
-            return "mexico"
-        # Enhanced formal error message
-        raise ValueError(
-            f"The provided race name '{v}' is not valid. "
-            "Please specify one of the supported race identifiers: "
-            "'abudhabi', 'qatar', 'usa', or 'mexico'."
-        )
+        return resolve_race(v)
+
+class BatchPredictionInput(BaseModel):
+    race_name: str = Field(description="Race name: 'abudhabi', 'qatar', 'usa', or 'mexico'")
+    driver_code: List[str] = Field(min_length=1, description="3-letter F1 driver codes, one per row")
+    qualifying_time: List[float] = Field(description="Qualifying lap times in seconds")
+    clean_air_race_pace: Optional[List[Optional[float]]] = Field(
+        None, description="Race paces with clean air in seconds; omitted or null paces are derived from lap data"
+    )
+    rain_prob: List[float] = Field(description="Rain probabilities as percentage")
+    temperature: List[float] = Field(description="Track temperatures in Celsius")
+
+    @field_validator("race_name")
+    @classmethod
+    def validate_race_name(cls, v: str) -> str:
+        return resolve_race(v)
+
+    @model_validator(mode="after")
+    def check_column_lengths(self):
+        n = len(self.driver_code)
+        for name in NUMERIC_COLUMNS:
+            if getattr(self, name) is not None and len(getattr(self, name)) != n:
+                raise ValueError(f"All columns must have the same length: '{name}' has {len(getattr(self, name))} rows, 'driver_code' has {n}")
+        if n > MAX_BATCH_ROWS:
+            raise ValueError(f"Batch has {n} rows, the maximum is {MAX_BATCH_ROWS}")
+        return self
 
-@app.post("/predict")
+@app.post("/predict", response_class=FastJSONResponse)
 async def predict(input_data: PredictionInput):
     start_time = time.time()
     race = input_data.race_name
@@ -117,80 +255,216 @@ async def predict(input_data: PredictionInput):
     model = artifact["model"]
     imputer = artifact.get("imputer")
     
-    drivers = lookup_data.get("data", {}).get("drivers", {})
     driver_code_upper = input_data.driver_code.upper()
+    driver = driver_id(driver_code_upper)
+    team_score = get_driver_table()[driver] if driver >= 0 else np.nan
     
-    if driver_code_upper not in drivers:
+    if np.isnan(team_score):
         raise HTTPException(status_code=422, detail=f"Unknown driver code '{driver_code_upper}'")
     
-    team_score = drivers[driver_code_upper]
+    clean_air_race_pace = input_data.clean_air_race_pace
+    if clean_air_race_pace is None:
+        pace_table = get_pace_table(race)
+        clean_air_race_pace = pace_table[driver] if pace_table is not None else np.nan
+        if np.isnan(clean_air_race_pace):
+            raise HTTPException(
+                status_code=422,
+                detail=f"No clean air race pace for '{driver_code_upper}' at {race}; send clean_air_race_pace"
+            )
     
-    ranges = {
-        "abudhabi": (70, 105),
-        "qatar": (75, 120),
-        "usa": (85, 130),
-        "mexico": (70, 110)
-    }
-    valid_range = ranges.get(race)
+    valid_range = RACE_RANGES.get(race)
     
     if not (valid_range[0] <= input_data.qualifying_time <= valid_range[1]):
         raise HTTPException(status_code=422, detail=f"Qualifying time for {race} invalid")
     
-    if not (valid_range[0] <= input_data.clean_air_race_pace <= valid_range[1]):
+    if not (valid_range[0] <= clean_air_race_pace <= valid_range[1]):
         raise HTTPException(status_code=422, detail=f"Clean air race pace for {race} invalid")
     
-    if input_data.clean_air_race_pace <= input_data.qualifying_time:
+    if clean_air_race_pace <= input_data.qualifying_time:
         raise HTTPException(status_code=422, detail="Clean air race pace should be slower than qualifying time")
     
-    # Feature engineering based on model requirements
-    # Note: USA and Mexico models use: QualifyingTime, CleanAirRacePace, TeamPerformanceScore, TotalSectorTime (imputed), RainProbability
-    # Abu Dhabi and Qatar use: QualifyingTime, RainProbability, Temperature, TeamPerformanceScore, CleanAirRacePace
-    
-    if race in ["usa", "mexico"]:
-        features = np.array([[
-            input_data.qualifying_time,
-            input_data.clean_air_race_pace,
-            team_score,
-            np.nan, # TotalSectorTime to be imputed
-            input_data.rain_prob
-        ]])
-    else:
-        features = np.array([[
-            input_data.qualifying_time, 
-            input_data.rain_prob, 
-            input_data.temperature, 
-            team_score, 
-            input_data.clean_air_race_pace
-        ]])
+    inputs = {
+        "qualifying_time": input_data.qualifying_time,
+        "clean_air_race_pace": clean_air_race_pace,
+        "team_score": team_score,
+        "rain_prob": input_data.rain_prob,
+        "temperature": input_data.temperature
+    }
+    features = build_features(race, **inputs)
+    
+    # Inference runs on the threadpool so the admission limits actually bound
+    # concurrent model work and the event loop stays free for /health.
+    async with admission.slot(race):
+        try:
+            predictions, model_info = await run_in_threadpool(run_model, race, model, imputer, features)
+            prediction = predictions[0]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    # Only inputs that were actually served count towards drift
+    drift_monitor.record(race, inputs)
+
+    latency = time.time() - start_time
+    await prediction_log.log(
+        race, driver_code_upper, inputs, prediction, model_info, artifact.get("version", 1), latency, "single"
+    )
+    # Returned as a Response so FastAPI skips jsonable_encoder; the NumPy
+    # scalar is written as-is by the serializer
+    return FastJSONResponse({
+        "race": race,
+        "driver": driver_code_upper,
+        "predicted_pace": prediction,
+        "meta": {
+            "latency": f"{latency:.4f}s",
+            "model": model_info
+        }
+    })
+
+async def predict_columns(race: str, driver_codes: np.ndarray, columns: Dict[str, np.ndarray],
+                          source: str = "batch") -> Dict[str, Any]:
+    """Validate and predict a columnar batch for one race.
+
+    Rows are validated together with NumPy masks instead of one pydantic model
+    per row. Invalid rows do not fail the batch: `errors[i]` carries the
+    message /predict would have returned for that row and its prediction is NaN.
+    """
+    start_time = time.time()
+    artifact = ml_models.get(race)
+    
+    if artifact is None:
+        raise HTTPException(status_code=500, detail=f"Model for '{race}' not loaded")
+    
+    errors, valid, team_scores = validate_columns(
+        race, columns, driver_codes, get_driver_table(), PredictionInput, get_pace_table(race)
+    )
     
+    predictions = np.full(valid.shape[0], np.nan)
+    model_info = model_info_for(race, artifact["model"])
+    if valid.any():
+        # Skip the boolean-mask copies when every row is valid
+        rows = slice(None) if valid.all() else valid
+        inputs = {
+            "qualifying_time": columns["qualifying_time"][rows],
+            "clean_air_race_pace": columns["clean_air_race_pace"][rows],
+            "team_score": team_scores[rows],
+            "rain_prob": columns["rain_prob"][rows],
+            "temperature": columns["temperature"][rows]
+        }
+        features = build_features(race, **inputs)
+        async with admission.slot(race):
+            try:
+                predictions[rows], model_info = await run_in_threadpool(
+                    run_model, race, artifact["model"], artifact.get("imputer"), features
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+        # Only a queue put, after a successful prediction: the statistics are updated off the request path
+        drift_monitor.record(race, inputs)
+    
+    latency = time.time() - start_time
+    drivers = np.char.upper(driver_codes)
+    if valid.any():
+        await prediction_log.log(
+            race, drivers[rows], inputs, predictions[rows], model_info, artifact.get("version", 1), latency, source
+        )
+    return {
+        "race": race,
+        "drivers": drivers.tolist(),
+        "predicted_pace": predictions,
+        "valid": valid,
+        "errors": errors,
+        "meta": {
+            "rows": int(valid.shape[0]),
+            "valid_rows": int(valid.sum()),
+            "latency": f"{latency:.4f}s",
+            "model": model_info
+        }
+    }
+
+async def read_batch_body(request: Request, fmt: str):
+    """Parse a batch request body into (race, driver_codes, columns)."""
+    body = await request.body()
+    if fmt == "json":
+        try:
+            input_data = BatchPredictionInput.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False, include_context=False))
+        return (
+            input_data.race_name,
+            np.asarray(input_data.driver_code, dtype=str),
+            columns_from_input(input_data)
+        )
+
+    decoded = decode_batch(body, fmt)
     try:
-        if imputer:
-            features = imputer.transform(features)
-            
-        if race in ["abudhabi", "qatar"] and hasattr(model, "predict") and "xgboost" in str(type(model)).lower():
-            # Handle native XGBoost Booster if needed, though XGBRegressor is usually used
-            if not hasattr(model, "predict"):
-                 dmatrix = xgb.DMatrix(features)
-                 prediction = model.predict(dmatrix)[0]
-            else:
-                 prediction = model.predict(features)[0]
-            model_info = f"{race}_xgb_v2"
-        else: 
-            prediction = model.predict(features)[0]
-            model_info = f"{race}_v2"
-
-        latency = time.time() - start_time
-        return {
-            "race": race,
-            "driver": driver_code_upper,
-            "predicted_pace": float(prediction),
-            "meta": {
-                "latency": f"{latency:.4f}s",
-                "model": model_info
+        race = resolve_race(decoded["race_name"])
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    driver_codes = decoded["driver_code"]
+    for name, values in decoded["columns"].items():
+        if values.shape != driver_codes.shape:
+            raise HTTPException(
+                status_code=422,
+                detail=f"All columns must have the same length: '{name}' has {values.shape[0]} rows, 'driver_code' has {driver_codes.shape[0]}"
+            )
+    if not 0 < driver_codes.shape[0] <= MAX_BATCH_ROWS:
+        raise HTTPException(status_code=422, detail=f"Batch must have between 1 and {MAX_BATCH_ROWS} rows")
+    return race, driver_codes, decoded["columns"]
+
+@app.post(
+    "/predict/batch",
+    response_class=FastJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MIME: {"schema": BatchPredictionInput.model_json_schema()},
+                ARROW_MIME: {"schema": {"type": "string", "format": "binary"}},
+                MSGPACK_MIME: {"schema": {"type": "string", "format": "binary"}}
             }
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    }
+)
+async def predict_batch(request: Request):
+    """Columnar batch prediction for a single race.
+
+    The body may be JSON (default), an Arrow IPC stream or msgpack, chosen by
+    Content-Type; the response encoding follows the Accept header and falls
+    back to JSON.
+    """
+    try:
+        out_fmt = response_format(request.headers.get("accept"))
+        race, driver_codes, columns = await read_batch_body(
+            request, request_format(request.headers.get("content-type"))
+        )
+        result = await predict_columns(race, driver_codes, columns)
+        if out_fmt != "json":
+            return Response(content=encode_batch(result, out_fmt), media_type=media_type_for(out_fmt))
+    except TransportError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    # Arrays go straight to the serializer; NaN predictions of invalid rows become null
+    return FastJSONResponse(result)
+
+@app.post(
+    "/predict/stream",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MIME: {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def predict_stream(request: Request):
+    """Predict an unbounded NDJSON stream of /predict rows.
+
+    Each input line is a /predict request object (optionally with an `id`).
+    Rows are batched per race, `STREAM_CHUNK_ROWS` at a time, and results are
+    streamed back as NDJSON while the body is still being read.
+    """
+    return DuplexStreamingResponse(
+        stream_predictions(request.stream(), partial(predict_columns, source="stream"), STREAM_CHUNK_ROWS),
+        media_type=NDJSON_MIME
+    )
 
 @app.get("/info", include_in_schema=False)
 async def info():
@@ -200,9 +474,105 @@ async def info():
         "available_races": ["Abu Dhabi", "Qatar", "United States", "Mexico"]
     }
 
+@app.get("/weather")
+async def weather():
+    """
+    Forecast for the race configured in the lookup data (`config`: lat, lon, race_datetime).
+
+    Served from the on-disk forecast cache when possible; `forecast` is null
+    when no forecast is available for that slot.
+    """
+    config = lookup_data.get("data", {}).get("config", {})
+    forecast = await run_in_threadpool(forecast_for_config, weather_provider, config)
+    return {
+        "config": config,
+        "forecast": forecast._asdict() if forecast else None
+    }
+
+def get_season_index(year: int):
+    index = season_indexes.get(year)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No dataset for season {year}")
+    return index
+
+@app.get("/seasons", response_class=FastJSONResponse)
+async def seasons():
+    """Seasons in the dataset store, with their rounds."""
+    return FastJSONResponse([index.overview() for _, index in sorted(season_indexes.items())])
+
+@app.get("/seasons/compare/{group}/{name}", response_class=FastJSONResponse)
+async def season_compare(group: str, name: str):
+    """Season-by-season summary of a driver (`group` = drivers) or team (`group` = teams)."""
+    column = SEASON_GROUPS.get(group)
+    if column is None:
+        raise HTTPException(status_code=404, detail=f"Unknown group '{group}'; use drivers or teams")
+    summaries = compare(season_indexes, column, name)
+    if not summaries:
+        raise HTTPException(status_code=404, detail=f"No results for '{name}'")
+    return FastJSONResponse(summaries)
+
+@app.get("/seasons/{year}/rounds/{round_number}", response_class=FastJSONResponse)
+async def season_round(year: int, round_number: int):
+    """Results of one round, as columns."""
+    results = get_season_index(year).round_results(round_number)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"No round {round_number} in {year}")
+    return FastJSONResponse(jsonable(results))
+
+@app.get("/seasons/{year}/events/{event}", response_class=FastJSONResponse)
+async def season_event(year: int, event: str):
+    """Results of one event by name (case-insensitive), as columns."""
+    results = get_season_index(year).event_results(event)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"No event '{event}' in {year}")
+    return FastJSONResponse(jsonable(results))
+
+@app.get("/seasons/{year}/standings", response_class=FastJSONResponse)
+async def season_standings(year: int, by: str = "drivers"):
+    """Points table for drivers or teams, with the precomputed season aggregates."""
+    column = SEASON_GROUPS.get(by)
+    if column is None:
+        raise HTTPException(status_code=422, detail="'by' must be drivers or teams")
+    return FastJSONResponse(jsonable(get_season_index(year).standings(column)))
+
+@app.get("/seasons/{year}/{group}/{name}", response_class=FastJSONResponse)
+async def season_group(year: int, group: str, name: str, from_round: Optional[int] = None,
+                       to_round: Optional[int] = None, finished_only: bool = False):
+    """
+    A driver's or team's results (`group` = drivers or teams) with their season summary.
+
+    `from_round`, `to_round` and `finished_only` filter the returned results;
+    the summary always covers the whole season.
+    """
+    column = SEASON_GROUPS.get(group)
+    if column is None:
+        raise HTTPException(status_code=404, detail=f"Unknown group '{group}'; use drivers or teams")
+    found = get_season_index(year).group_results(column, name, from_round, to_round, finished_only)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No results for '{name}' in {year}")
+    return FastJSONResponse({"summary": found["summary"], "results": jsonable(found["results"])})
+
 @app.get("/health", include_in_schema=False)
 async def health_check():
     return {
         "status": "healthy",
-        "models_loaded": list(ml_models.keys())
-    }
\ No newline at end of file
+        "models_loaded": list(ml_models.keys()),
+        "model_versions": {race: artifact.get("version", 1) for race, artifact in ml_models.items() if artifact},
+        "students": sorted(race for race, artifact in ml_models.items() if artifact and artifact.get("student")),
+        "quantized": sorted(race for race, artifact in ml_models.items() if artifact and artifact.get("quantized")),
+        "team_scores_version": lookup_data.get("team_scores", {}).get("version"),
+        "clean_air_pace_version": (lookup_data.get("clean_air") or {}).get("version")
+    }
+
+@app.get("/drift", response_class=FastJSONResponse)
+async def drift():
+    """Live input statistics per race compared with each model's training inputs."""
+    return FastJSONResponse(drift_monitor.report())
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return {
+        "admission": admission.stats(),
+        "prediction_log": prediction_log.stats(),
+        "event_loop": loop_monitor.stats()
+    }
@@ -0,0 +1,290 @@
+"""Season aggregates for the notebooks and Power BI reports, computed once per dataset version.
+
+`refresh(year)` reads a season from the columnar store and writes
+datasets/extracts/<year>/:
+
+    drivers.parquet       per-driver count/mean/std/min/quartiles/max of
+    teams.parquet         FinishPos, GridPos, PositionGain, Points and PoleGap,
+                          plus races, wins and podiums
+    status.parquet        rows per Status
+    correlation.parquet   pairwise-complete Pearson correlation of every
+                          numeric column except EventDate (same as DataFrame.corr())
+    state.npz             per-round partial sums behind status and correlation
+    manifest.json         dataset version (source sha256), rounds with a digest
+                          of their rows and the drivers/teams in them
+
+Group statistics come from one stable sort per measure plus `bincount`
+reductions; there is no per-group Python loop. A refresh first compares
+round digests with the manifest. Unchanged datasets are skipped. When a
+round is appended (or edited), only that round's partial sums are
+recomputed, and only the drivers and teams that raced in it are
+re-aggregated; every other group's row is carried over from the previous
+extract.
+
+Usage (from the repo root):
+    python -m seasons.analytics 2024 2025
+
+Notebooks:
+    pd.read_parquet("datasets/extracts/2024/drivers.parquet")
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from seasons.store import DATASETS_DIR, Season, load
+
+EXTRACTS_DIR = os.path.join(DATASETS_DIR, "extracts")
+GROUP_COLUMNS = {"Driver": "drivers", "Team": "teams"}
+MEASURES = ("FinishPos", "GridPos", "PositionGain", "Points", "PoleGap")
+QUANTILES = {"q25": 0.25, "median": 0.5, "q75": 0.75}
+EXCLUDED_FROM_CORRELATION = ("EventDate",)
+
+
+def extract_dir(year: int, extracts_dir: Optional[str] = None) -> str:
+    return os.path.join(extracts_dir or EXTRACTS_DIR, str(year))
+
+
+def season_columns(season: Season) -> Dict[str, np.ndarray]:
+    """Decoded columns of a stored season (exact float64 for floats)."""
+    return {name: np.asarray(season.values(name)) for name in season.columns}
+
+
+def numeric_columns(columns: Dict[str, np.ndarray]) -> List[str]:
+    return [name for name, values in columns.items()
+            if values.dtype.kind in "iuf" and name not in EXCLUDED_FROM_CORRELATION]
+
+
+def round_digests(columns: Dict[str, np.ndarray]) -> Dict[int, str]:
+    """sha256 of each round's rows (in file order), keyed by RoundNumber."""
+    rounds = columns["RoundNumber"]
+    digests = {}
+    for r in np.unique(rounds):
+        rows = rounds == r
+        h = hashlib.sha256()
+        for name in sorted(columns):
+            h.update(name.encode())
+            h.update(np.ascontiguousarray(columns[name][rows]).tobytes())
+        digests[int(r)] = h.hexdigest()[:16]
+    return digests
+
+
+def group_stats(keys: np.ndarray, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Per-group reductions of MEASURES for the distinct values of `keys` (sorted)."""
+    names, codes = np.unique(keys, return_inverse=True)
+    n_groups = len(names)
+    finish = columns["FinishPos"]
+    table = {
+        "name": names,
+        "races": np.bincount(codes, minlength=n_groups),
+        "wins": np.bincount(codes, weights=finish == 1, minlength=n_groups).astype(np.int64),
+        "podiums": np.bincount(codes, weights=finish <= 3, minlength=n_groups).astype(np.int64)
+    }
+    for measure in MEASURES:
+        values = columns[measure]
+        present = ~np.isnan(values)
+        count = np.bincount(codes[present], minlength=n_groups)
+        total = np.bincount(codes[present], weights=values[present], minlength=n_groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+            # Sample std from deviations around the group mean, as pandas computes it
+            squares = np.bincount(codes[present], weights=(values[present] - mean[codes[present]]) ** 2,
+                                  minlength=n_groups)
+            std = np.where(count > 1, np.sqrt(squares / np.maximum(count - 1, 1)), np.nan)
+
+        # One sort by (group, value) puts every group's values in a contiguous
+        # ascending run, NaN last; order statistics are then index arithmetic
+        ordered = values[np.lexsort((values, codes))]
+        starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_groups))[:-1]])
+        last = starts + np.maximum(count - 1, 0)
+        empty = count == 0
+        table[f"{measure}_count"] = count
+        table[f"{measure}_mean"] = mean
+        table[f"{measure}_std"] = std
+        table[f"{measure}_min"] = np.where(empty, np.nan, ordered[starts])
+        for label, q in QUANTILES.items():
+            # Linear interpolation, as Series.quantile
+            position = starts + q * np.maximum(count - 1, 0)
+            low = np.floor(position).astype(np.intp)
+            high = np.minimum(low + 1, last)
+            fraction = position - low
+            value = ordered[low] + (ordered[high] - ordered[low]) * fraction
+            table[f"{measure}_{label}"] = np.where(empty, np.nan, value)
+        table[f"{measure}_max"] = np.where(empty, np.nan, ordered[last])
+    return table
+
+
+def correlation_sums(columns: Dict[str, np.ndarray], names: List[str]) -> np.ndarray:
+    """Pairwise-complete sufficient statistics, shape (4, k, k): n, sum x, sum x^2, sum xy.
+
+    Entry [., i, j] only counts rows where both column i and column j are
+    present, so sums over any set of rows add up.
+    """
+    values = np.column_stack([columns[name].astype(np.float64) for name in names])
+    present = (~np.isnan(values)).astype(np.float64)
+    z = np.where(present > 0, values, 0.0)
+    return np.stack([present.T @ present, z.T @ present, (z * z).T @ present, z.T @ z])
+
+
+def correlation(sums: np.ndarray) -> np.ndarray:
+    n, sx, sxx, sxy = sums
+    sy, syy = sx.T, sxx.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _round_partials(columns: Dict[str, np.ndarray], names: List[str], statuses: np.ndarray,
+                    round_number: int) -> Tuple[np.ndarray, np.ndarray]:
+    rows = columns["RoundNumber"] == round_number
+    part = {name: columns[name][rows] for name in names}
+    status_codes = np.searchsorted(statuses, columns["Status"][rows])
+    return correlation_sums(part, names), np.bincount(status_codes, minlength=len(statuses))
+
+
+def _merge_groups(previous: Optional[Dict[str, np.ndarray]], fresh: Dict[str, np.ndarray],
+                  affected: np.ndarray) -> Dict[str, np.ndarray]:
+    """Previous rows for unaffected groups plus the recomputed rows, sorted by name."""
+    if previous is None:
+        return fresh
+    keep = ~np.isin(previous["name"], affected)
+    merged = {name: np.concatenate([previous[name][keep], fresh[name]]) for name in fresh}
+    order = np.argsort(merged["name"], kind="stable")
+    return {name: values[order] for name, values in merged.items()}
+
+
+def _read_parquet(path: str) -> Dict[str, np.ndarray]:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    return {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+
+
+def _write_parquet(path: str, columns: Dict[str, Any]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tmp_path = f"{path}.tmp"
+    pq.write_table(pa.table({name: np.asarray(values) for name, values in columns.items()}), tmp_path,
+                   compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def _read_previous(out_dir: str) -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    with np.load(os.path.join(out_dir, "state.npz")) as state:
+        previous = {"manifest": manifest, **{name: state[name] for name in state.files}}
+    for group in GROUP_COLUMNS.values():
+        previous[group] = _read_parquet(os.path.join(out_dir, f"{group}.parquet"))
+    return previous
+
+
+def build(columns: Dict[str, np.ndarray], out_dir: str, version: str) -> Dict[str, Any]:
+    """Write (or update) the extracts for one season's columns; returns what was recomputed."""
+    previous = _read_previous(out_dir)
+    if previous and previous["manifest"]["dataset_version"] == version:
+        return {"dataset_version": version, "changed_rounds": [], "recomputed": {}}
+
+    names = numeric_columns(columns)
+    statuses = np.unique(columns["Status"])
+    digests = round_digests(columns)
+    rounds = sorted(digests)
+
+    old_rounds = previous["manifest"]["rounds"] if previous else {}
+    reusable = bool(previous) and previous["columns"].tolist() == names \
+        and np.isin(previous["statuses"], statuses).all()
+    changed = [r for r in rounds if not reusable or old_rounds.get(str(r), {}).get("digest") != digests[r]]
+    removed = [r for r in map(int, old_rounds) if r not in digests]
+
+    # Per-round partial sums: reuse unchanged rounds, compute the rest
+    corr_parts = np.zeros((len(rounds), 4, len(names), len(names)))
+    status_parts = np.zeros((len(rounds), len(statuses)), dtype=np.int64)
+    old_index = {int(r): i for i, r in enumerate(previous["rounds"])} if reusable else {}
+    status_map = np.searchsorted(statuses, previous["statuses"]) if reusable else None
+    for i, r in enumerate(rounds):
+        if r in changed:
+            corr_parts[i], status_parts[i] = _round_partials(columns, names, statuses, r)
+        else:
+            corr_parts[i] = previous["correlation_parts"][old_index[r]]
+            status_parts[i, status_map] = previous["status_parts"][old_index[r]]
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Only the groups that appear in changed or removed rounds are re-aggregated
+    recomputed = {}
+    manifest_rounds = {}
+    in_changed = np.isin(columns["RoundNumber"], changed)
+    for column, group in GROUP_COLUMNS.items():
+        keys = columns[column]
+        stale = [name for r in changed + removed for name in old_rounds.get(str(r), {}).get(group, [])]
+        affected = np.union1d(np.unique(keys[in_changed]), np.asarray(stale, dtype=keys.dtype))
+        rows = np.isin(keys, affected)
+        fresh = group_stats(keys[rows], {name: values[rows] for name, values in columns.items()})
+        table = _merge_groups(previous[group] if reusable else None, fresh, affected)
+        _write_parquet(os.path.join(out_dir, f"{group}.parquet"), table)
+        recomputed[group] = int(len(fresh["name"]))
+
+    round_numbers = columns["RoundNumber"]
+    for r in rounds:
+        rows = round_numbers == r
+        manifest_rounds[str(r)] = {
+            "rows": int(rows.sum()),
+            "digest": digests[r],
+            **{group: np.unique(columns[column][rows]).tolist() for column, group in GROUP_COLUMNS.items()}
+        }
+
+    corr = correlation(corr_parts.sum(axis=0))
+    _write_parquet(os.path.join(out_dir, "correlation.parquet"),
+                   {"column": np.asarray(names), **{name: corr[:, i] for i, name in enumerate(names)}})
+    _write_parquet(os.path.join(out_dir, "status.parquet"),
+                   {"Status": statuses, "count": status_parts.sum(axis=0)})
+    tmp_path = os.path.join(out_dir, "state.tmp.npz")
+    np.savez_compressed(tmp_path, rounds=np.asarray(rounds), columns=np.asarray(names, dtype=str),
+             statuses=statuses.astype(str), correlation_parts=corr_parts, status_parts=status_parts)
+    os.replace(tmp_path, os.path.join(out_dir, "state.npz"))
+
+    # The manifest is written last: a refresh interrupted before this point is redone in full
+    manifest = {"dataset_version": version, "rows": int(len(round_numbers)), "rounds": manifest_rounds}
+    tmp_path = os.path.join(out_dir, "manifest.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, "manifest.json"))
+    return {"dataset_version": version, "changed_rounds": changed, "recomputed": recomputed}
+
+
+def refresh(year: int, store_dir: Optional[str] = None, extracts_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Bring datasets/extracts/<year> up to date with the columnar store."""
+    season = load(year, store_dir)
+    return build(season_columns(season), extract_dir(year, extracts_dir), season.schema["source_sha256"])
+
+
+def read_extract(year: int, name: str, extracts_dir: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """One extract table ("drivers", "teams", "status", "correlation") as columns."""
+    return _read_parquet(os.path.join(extract_dir(year, extracts_dir), f"{name}.parquet"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the precomputed season aggregates")
+    parser.add_argument("years", nargs="+", type=int, help="Seasons in the columnar store")
+    args = parser.parse_args()
+
+    for year in args.years:
+        report = refresh(year)
+        if not report["changed_rounds"]:
+            print(f"{year}: up to date ({report['dataset_version'][:12]})")
+            continue
+        print(f"{year}: rounds {report['changed_rounds']} recomputed; "
+              f"{report['recomputed']['drivers']} drivers, {report['recomputed']['teams']} teams re-aggregated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""In-memory indexes over one season for the historical query endpoints.
+
+Built once per season at startup:
+
+- rows are sorted by RoundNumber, so a round (or its event) is one
+  contiguous `[start, end)` slice found with `searchsorted`
+- a second ordering sorted by (driver, round), and a third by (team, round),
+  make every driver's and team's results a contiguous slice as well, with
+  their offsets taken from a cumulative `bincount`
+- per-driver and per-team aggregates (points, wins, podiums, mean finish,
+  mean PositionGain, mean PoleGap) are computed in one grouped pass
+
+A query is therefore a dictionary lookup plus a slice. Optional filters
+are boolean masks over that slice only.
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from seasons.store import Season, available_years, load
+
+RESULT_COLUMNS = [
+    "RoundNumber", "EventName", "EventDate", "Driver", "Team", "GridPos", "FinishPos",
+    "Points", "Status", "RaceTime", "Q_Time", "PoleGap", "PositionGain", "Q_Time_Gap_To_Median"
+]
+STRING_COLUMNS = ("EventName", "Driver", "Team", "Status")
+
+
+def _offsets(codes: np.ndarray, n_groups: int) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_groups))])
+
+
+def _group_means(codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Per-group mean ignoring NaN (NaN for groups without values)."""
+    present = ~np.isnan(values)
+    sums = np.bincount(codes[present], weights=values[present], minlength=n_groups)
+    counts = np.bincount(codes[present], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+class SeasonIndex:
+    def __init__(self, year: int, season: Season):
+        self.year = year
+        order = np.argsort(season["RoundNumber"], kind="stable")
+        # Decoded, round-sorted copies: small enough to keep in memory, and
+        # float columns become the exact float64 values of the JSON
+        self.columns: Dict[str, np.ndarray] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.categories: Dict[str, np.ndarray] = {}
+        for name in season.columns:
+            if name in STRING_COLUMNS:
+                self.codes[name] = np.asarray(season[name])[order].astype(np.intp)
+                self.categories[name] = np.asarray(season.categories(name))
+                self.columns[name] = self.categories[name][self.codes[name]]
+            else:
+                self.columns[name] = np.asarray(season.values(name))[order]
+
+        rounds = self.columns["RoundNumber"]
+        self.rounds = np.unique(rounds)
+        self.round_starts = np.searchsorted(rounds, self.rounds, side="left")
+        self.round_ends = np.searchsorted(rounds, self.rounds, side="right")
+        # Each event runs in exactly one round
+        self.event_round = {
+            str(self.columns["EventName"][start]).lower(): int(r)
+            for r, start in zip(self.rounds, self.round_starts)
+        }
+
+        self._groups = {}
+        for name in ("Driver", "Team"):
+            codes = self.codes[name]
+            n_groups = len(self.categories[name])
+            group_order = np.lexsort((rounds, codes))
+            self._groups[name] = {
+                "order": group_order,
+                "offsets": _offsets(codes, n_groups),
+                "lookup": {str(v).lower(): i for i, v in enumerate(self.categories[name])},
+                "summary": self._summarize(codes, n_groups)
+            }
+
+    def _summarize(self, codes: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+        finish = self.columns["FinishPos"]
+        return {
+            "races": np.bincount(codes, minlength=n_groups),
+            "points": np.bincount(codes, weights=self.columns["Points"], minlength=n_groups),
+            "wins": np.bincount(codes, weights=finish == 1, minlength=n_groups).astype(np.int64),
+            "podiums": np.bincount(codes, weights=finish <= 3, minlength=n_groups).astype(np.int64),
+            "avg_finish_pos": _group_means(codes, finish, n_groups),
+            "avg_position_gain": _group_means(codes, self.columns["PositionGain"], n_groups),
+            "avg_pole_gap": _group_means(codes, self.columns["PoleGap"], n_groups)
+        }
+
+    def _rows(self, index) -> Dict[str, np.ndarray]:
+        return {name: self.columns[name][index] for name in RESULT_COLUMNS if name in self.columns}
+
+    def _filter(self, rows: Dict[str, np.ndarray], from_round: Optional[int], to_round: Optional[int],
+                finished_only: bool) -> Optional[np.ndarray]:
+        if from_round is None and to_round is None and not finished_only:
+            return None
+        rounds = rows["RoundNumber"]
+        mask = np.ones(len(rounds), dtype=bool)
+        if from_round is not None:
+            mask &= rounds >= from_round
+        if to_round is not None:
+            mask &= rounds <= to_round
+        if finished_only:
+            mask &= rows["Status"] == "Finished"
+        return mask
+
+    def overview(self) -> Dict[str, Any]:
+        return {
+            "season": self.year,
+            "rows": int(len(self.columns["RoundNumber"])),
+            "rounds": [
+                {"round": int(r), "event": str(self.columns["EventName"][start])}
+                for r, start in zip(self.rounds, self.round_starts)
+            ]
+        }
+
+    def round_results(self, round_number: int) -> Optional[Dict[str, np.ndarray]]:
+        i = np.searchsorted(self.rounds, round_number)
+        if i >= len(self.rounds) or self.rounds[i] != round_number:
+            return None
+        return self._rows(slice(int(self.round_starts[i]), int(self.round_ends[i])))
+
+    def event_results(self, event: str) -> Optional[Dict[str, np.ndarray]]:
+        round_number = self.event_round.get(event.strip().lower())
+        return None if round_number is None else self.round_results(round_number)
+
+    def group_code(self, group: str, value: str) -> Optional[int]:
+        return self._groups[group]["lookup"].get(value.strip().lower())
+
+    def group_summary(self, group: str, code: int) -> Dict[str, Any]:
+        summary = self._groups[group]["summary"]
+        return {"name": str(self.categories[group][code]), **{k: v[code] for k, v in summary.items()}}
+
+    def group_results(self, group: str, value: str, from_round: Optional[int] = None,
+                      to_round: Optional[int] = None, finished_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Results and precomputed season summary for one driver or team."""
+        code = self.group_code(group, value)
+        if code is None:
+            return None
+        index = self._groups[group]
+        rows_index = index["order"][index["offsets"][code]:index["offsets"][code + 1]]
+        rows = self._rows(rows_index)
+        mask = self._filter(rows, from_round, to_round, finished_only)
+        if mask is not None:
+            rows = {name: column[mask] for name, column in rows.items()}
+        return {"summary": self.group_summary(group, code), "results": rows}
+
+    def standings(self, group: str) -> Dict[str, np.ndarray]:
+        """Season table for drivers or teams, ordered by points."""
+        summary = self._groups[group]["summary"]
+        order = np.lexsort((-summary["wins"], -summary["points"]))
+        return {"name": self.categories[group][order], **{k: v[order] for k, v in summary.items()}}
+
+
+def build_indexes(store_dir: Optional[str] = None) -> Dict[int, SeasonIndex]:
+    """Index every season in the columnar store."""
+    return {year: SeasonIndex(year, load(year, store_dir)) for year in available_years(store_dir)}
+
+
+def compare(indexes: Dict[int, SeasonIndex], group: str, value: str) -> List[Dict[str, Any]]:
+    """The precomputed summary of one driver or team in every season they appear in."""
+    seasons = []
+    for year, index in sorted(indexes.items()):
+        code = index.group_code(group, value)
+        if code is not None:
+            seasons.append({"season": year, **index.group_summary(group, code)})
+    return seasons
+
+
+def jsonable(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """String arrays as lists (orjson writes numeric arrays natively but not NumPy strings)."""
+    return {name: values.tolist() if isinstance(values, np.ndarray) and values.dtype.kind == "U" else values
+            for name, values in columns.items()}
@@ -0,0 +1,296 @@
+"""Append-only, round-segmented ingestion for the season datasets.
+
+A segmented season keeps one columnar directory (the `seasons.store`
+layout) per round, plus a manifest:
+
+    datasets/segments/<year>/
+        manifest.json    column order and one entry per segment: round, event,
+                         date, rows, sha256 of the ingested rows, and the
+                         season Q_Time median used for its derived columns
+        r01/ r02/ ...    one `seasons.store` directory per round
+
+Adding a round writes one new segment and rewrites only the manifest.
+Earlier segments are never touched. Rows are validated before anything is
+written. Validation checks columns and types, nulls only where the
+datasets have them, value ranges, one event per round and one row per
+driver. The derived columns are computed for the new round only:
+
+    PositionGain           GridPos - FinishPos
+    PoleGap                Q_Time - fastest Q_Time of the round (3 dp)
+    Q_Time_Gap_To_Median   Q_Time - season median Q_Time (4 dp)
+
+Q_Time_Gap_To_Median depends on the season median, which moves as rounds
+are added. Each segment records the median it was computed against.
+`read()` recomputes the column only for segments whose median is stale,
+so stored segments stay immutable and the values read always match a
+full rebuild.
+
+Readers open the manifest and map only the segments (rounds) and columns
+they ask for.
+
+Usage (from the repo root):
+    python -m seasons.segments import datasets/2025.json     # split an existing season
+    python -m seasons.segments append 2025 round21.json      # add one round
+    python -m seasons.segments compact 2025                  # refresh datasets/columnar/2025
+"""
+import os
+import json
+import hashlib
+import argparse
+import datetime
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional
+
+from seasons.store import DATASETS_DIR, Season, season_dir, write_columns
+
+SEGMENTS_DIR = os.path.join(DATASETS_DIR, "segments")
+
+# Ingested columns: (kind, nullable)
+BASE_COLUMNS = {
+    "RoundNumber": ("int", False),
+    "EventName": ("string", False),
+    "EventDate": ("int", False),
+    "Driver": ("string", False),
+    "Team": ("string", False),
+    "GridPos": ("float", False),
+    "FinishPos": ("float", False),
+    "Points": ("float", False),
+    "Status": ("string", False),
+    "RaceTime": ("float", True),
+    "Q_Time": ("float", True)
+}
+DERIVED_COLUMNS = ["PoleGap", "PositionGain", "Q_Time_Gap_To_Median"]
+COLUMN_ORDER = [
+    "RoundNumber", "EventName", "EventDate", "Driver", "Team", "GridPos", "FinishPos", "Points",
+    "Status", "RaceTime", "Q_Time", "PoleGap", "PositionGain", "Q_Time_Gap_To_Median"
+]
+# Inclusive lower bounds; GridPos 0 is a pit-lane start
+MINIMUMS = {"GridPos": 0.0, "FinishPos": 1.0, "Points": 0.0, "RaceTime": 0.0, "Q_Time": 0.0}
+
+
+class IngestError(ValueError):
+    """Raised when rows for a new round fail validation; `errors` lists every problem found."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def segments_dir(year: int, root: Optional[str] = None) -> str:
+    return os.path.join(root or SEGMENTS_DIR, str(year))
+
+
+def _type_ok(value: Any, kind: str, nullable: bool) -> bool:
+    if value is None:
+        return nullable
+    if kind == "string":
+        return isinstance(value, str) and bool(value.strip())
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    if kind == "int":
+        return isinstance(value, int)
+    return bool(np.isfinite(value))
+
+
+def validate(records: List[Dict[str, Any]], year: int) -> List[Dict[str, Any]]:
+    """Check one round's rows; returns them with only the base columns. Raises IngestError."""
+    if not records:
+        raise IngestError(["no rows"])
+    errors = []
+    for i, record in enumerate(records):
+        missing = [name for name in BASE_COLUMNS if name not in record]
+        unknown = [name for name in record if name not in BASE_COLUMNS and name not in DERIVED_COLUMNS]
+        if missing:
+            errors.append(f"row {i}: missing {', '.join(missing)}")
+        if unknown:
+            errors.append(f"row {i}: unknown column(s) {', '.join(unknown)}")
+        for name, (kind, nullable) in BASE_COLUMNS.items():
+            if name in record and not _type_ok(record[name], kind, nullable):
+                errors.append(f"row {i}: {name}={record[name]!r} is not a valid {kind}")
+            elif name in MINIMUMS and isinstance(record.get(name), (int, float)) and record[name] < MINIMUMS[name]:
+                errors.append(f"row {i}: {name}={record[name]!r} is below {MINIMUMS[name]}")
+    if errors:
+        raise IngestError(errors)
+
+    for name in ("RoundNumber", "EventName", "EventDate"):
+        values = {record[name] for record in records}
+        if len(values) > 1:
+            errors.append(f"a segment holds one round, got {name} values {sorted(values)}")
+    drivers = [record["Driver"] for record in records]
+    duplicates = sorted({d for d in drivers if drivers.count(d) > 1})
+    if duplicates:
+        errors.append(f"duplicate driver rows: {', '.join(duplicates)}")
+    event_year = datetime.datetime.fromtimestamp(records[0]["EventDate"] / 1000, tz=datetime.timezone.utc).year
+    if event_year != year:
+        errors.append(f"EventDate falls in {event_year}, not the {year} season")
+    if records[0]["RoundNumber"] < 1:
+        errors.append(f"RoundNumber must be at least 1, got {records[0]['RoundNumber']}")
+    if errors:
+        raise IngestError(errors)
+    return [{name: record[name] for name in BASE_COLUMNS} for record in records]
+
+
+def _optional(values: Iterable[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _nullable(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def derive(records: List[Dict[str, Any]], q_time_median: float) -> List[Dict[str, Any]]:
+    """Add the derived columns to one round's validated rows."""
+    q_time = _optional(r["Q_Time"] for r in records)
+    grid = np.array([r["GridPos"] for r in records], dtype=np.float64)
+    finish = np.array([r["FinishPos"] for r in records], dtype=np.float64)
+    pole = np.nanmin(q_time) if (~np.isnan(q_time)).any() else np.nan
+    derived = {
+        "PoleGap": _nullable(np.round(q_time - pole, 3)),
+        "PositionGain": (grid - finish).tolist(),
+        "Q_Time_Gap_To_Median": _nullable(np.round(q_time - q_time_median, 4))
+    }
+    rows = []
+    for i, record in enumerate(records):
+        row = {**record, **{name: values[i] for name, values in derived.items()}}
+        rows.append({name: row[name] for name in COLUMN_ORDER})
+    return rows
+
+
+class SegmentedSeason:
+    """One season stored as a segment per round."""
+
+    def __init__(self, year: int, root: Optional[str] = None):
+        self.year = year
+        self.path = segments_dir(year, root)
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"year": year, "columns": COLUMN_ORDER, "segments": []}
+        self._seasons: Dict[int, Season] = {}
+
+    @property
+    def rounds(self) -> List[int]:
+        return [segment["round"] for segment in self.manifest["segments"]]
+
+    def segment(self, round_number: int) -> Season:
+        season = self._seasons.get(round_number)
+        if season is None:
+            season = Season(os.path.join(self.path, f"r{round_number:02d}"))
+            self._seasons[round_number] = season
+        return season
+
+    def _q_times(self) -> np.ndarray:
+        return np.concatenate([self.segment(r).values("Q_Time") for r in self.rounds] or [np.empty(0)])
+
+    def q_time_median(self) -> float:
+        q_times = self._q_times()
+        return float(np.nanmedian(q_times)) if (~np.isnan(q_times)).any() else float("nan")
+
+    def append(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate, derive and write one new round; returns its manifest entry."""
+        rows = validate(records, self.year)
+        round_number = rows[0]["RoundNumber"]
+        if round_number in self.rounds:
+            raise IngestError([f"round {round_number} is already ingested; segments are append-only"])
+
+        q_times = np.concatenate([self._q_times(), _optional(r["Q_Time"] for r in rows)])
+        median = float(np.nanmedian(q_times)) if (~np.isnan(q_times)).any() else float("nan")
+        rows = derive(rows, median)
+        raw = json.dumps(rows, sort_keys=True).encode()
+        entry = {
+            "round": round_number,
+            "event": rows[0]["EventName"],
+            "event_date": rows[0]["EventDate"],
+            "rows": len(rows),
+            "sha256": hashlib.sha256(raw).hexdigest(),
+            "q_time_median": median
+        }
+        write_columns(rows, os.path.join(self.path, f"r{round_number:02d}"), f"round {round_number}", entry["sha256"])
+
+        segments = sorted(self.manifest["segments"] + [entry], key=lambda s: s["round"])
+        manifest = {**self.manifest, "segments": segments}
+        tmp_path = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        # The segment only becomes visible to readers once the manifest names it
+        os.replace(tmp_path, os.path.join(self.path, "manifest.json"))
+        self.manifest = manifest
+        return entry
+
+    def read(self, columns: Optional[List[str]] = None, rounds: Optional[Iterable[int]] = None) -> Dict[str, np.ndarray]:
+        """Decoded columns for the selected rounds (all by default), concatenated in round order."""
+        columns = columns or self.manifest["columns"]
+        wanted = None if rounds is None else set(rounds)
+        selected = [s for s in self.manifest["segments"] if wanted is None or s["round"] in wanted]
+        median = self.q_time_median() if "Q_Time_Gap_To_Median" in columns else None
+        parts = {name: [] for name in columns}
+        for entry in selected:
+            season = self.segment(entry["round"])
+            for name in columns:
+                if name == "Q_Time_Gap_To_Median" and entry["q_time_median"] != median:
+                    # Stale against the current season median: recompute from this segment's Q_Time
+                    values = np.round(season.values("Q_Time") - median, 4)
+                else:
+                    values = season.values(name)
+                parts[name].append(np.asarray(values))
+        return {name: np.concatenate(values) if values else np.empty(0) for name, values in parts.items()}
+
+    def to_records(self, rounds: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Rows as the season JSON holds them."""
+        decoded = {}
+        for name, values in self.read(rounds=rounds).items():
+            values = values.tolist()
+            if BASE_COLUMNS.get(name, ("float",))[0] == "float":
+                values = [None if v != v else v for v in values]
+            decoded[name] = values
+        return [dict(zip(decoded, row)) for row in zip(*decoded.values())]
+
+    def compact(self, store_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Rewrite datasets/columnar/<year> from the segments; its version is a hash of the segment hashes."""
+        digest = hashlib.sha256("".join(s["sha256"] for s in self.manifest["segments"]).encode()).hexdigest()
+        return write_columns(self.to_records(), season_dir(self.year, store_dir), f"segments/{self.year}", digest)
+
+
+def import_season(json_path: str, root: Optional[str] = None) -> SegmentedSeason:
+    """Split an existing datasets/<year>.json into segments, one round at a time."""
+    year = int(os.path.splitext(os.path.basename(json_path))[0])
+    with open(json_path, "r") as f:
+        records = json.load(f)
+    season = SegmentedSeason(year, root)
+    for round_number in sorted({record["RoundNumber"] for record in records}):
+        season.append([record for record in records if record["RoundNumber"] == round_number])
+    return season
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest season rounds into the segmented store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Split datasets/<year>.json files into segments")
+    import_parser.add_argument("files", nargs="+")
+    append_parser = commands.add_parser("append", help="Append one round (a JSON array of its rows)")
+    append_parser.add_argument("year", type=int)
+    append_parser.add_argument("file")
+    compact_parser = commands.add_parser("compact", help="Rewrite datasets/columnar/<year> from the segments")
+    compact_parser.add_argument("year", type=int)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "import":
+            for json_path in args.files:
+                season = import_season(json_path)
+                print(f"{season.path}: {len(season.rounds)} rounds")
+        elif args.command == "append":
+            with open(args.file, "r") as f:
+                entry = SegmentedSeason(args.year).append(json.load(f))
+            print(f"round {entry['round']} ({entry['event']}): {entry['rows']} rows appended")
+        else:
+            schema = SegmentedSeason(args.year).compact()
+            print(f"{season_dir(args.year)}: {schema['rows']} rows from segments")
+    except IngestError as e:
+        raise SystemExit("\n".join(f"error: {message}" for message in e.errors))
+
+
+if __name__ == "__main__":
+    main()
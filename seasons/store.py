@@ -0,0 +1,221 @@
+"""Columnar, memory-mapped store for the season datasets (datasets/<year>.json).
+
+Each season is converted once into a directory of typed `.npy` columns:
+
+    datasets/columnar/<year>/
+        schema.json               column kinds/dtypes, row count, source hash
+        <Column>.npy              one array per column
+        <Column>.categories.npy   the dictionary of a string column
+
+- Strings (Driver, Team, EventName, Status) are dictionary-encoded: an
+  int16 code per row plus a sorted array of distinct values.
+- Float columns (timings, positions, points) are float32 when float32 can
+  reproduce every JSON value exactly, and float64 otherwise. JSON nulls
+  become NaN.
+- Integer columns (RoundNumber, EventDate in epoch ms) keep the narrowest
+  dtype that holds them.
+
+`.npy` files are used rather than a single NPZ archive because `np.load`
+can only memory-map the former. Loading a season maps the columns
+lazily, so opening one costs a JSON read of the schema, and each column
+is then an O(1) dictionary lookup returning a read-only view of the page
+cache. `Season.to_records()` rebuilds the exact JSON records.
+
+Usage (from the repo root):
+    python -m seasons.store datasets/2024.json datasets/2025.json
+"""
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS_DIR = os.path.join(REPO_ROOT, "datasets")
+STORE_DIR = os.path.join(DATASETS_DIR, "columnar")
+
+STRING_COLUMNS = ("Driver", "Team", "EventName", "Status")
+
+
+def season_dir(year: int, store_dir: Optional[str] = None) -> str:
+    return os.path.join(store_dir or STORE_DIR, str(year))
+
+
+def _exact_float64(values: np.ndarray) -> np.ndarray:
+    """float64 values whose shortest repr matches `values`' (what JSON wrote for them)."""
+    return np.asarray(values).astype(str).astype(np.float64)
+
+
+def _float_column(values: List[Optional[float]]) -> np.ndarray:
+    wide = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    narrow = wide.astype(np.float32)
+    if np.array_equal(_exact_float64(narrow), wide, equal_nan=True):
+        return narrow
+    return wide
+
+
+def _int_column(values: List[int]) -> np.ndarray:
+    wide = np.asarray(values, dtype=np.int64)
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if not len(wide) or (wide.min() >= info.min and wide.max() <= info.max):
+            return wide.astype(dtype)
+    return wide
+
+
+def _write(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path[:-4]}.tmp.npy"
+    np.save(tmp_path, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def write_columns(records: List[Dict[str, Any]], out_dir: str, source: str, source_sha256: str) -> Dict[str, Any]:
+    """Write records as a columnar directory; returns the schema."""
+    columns = list(records[0]) if records else []
+
+    os.makedirs(out_dir, exist_ok=True)
+    schema = {
+        "rows": len(records),
+        "source": source,
+        "source_sha256": source_sha256,
+        "columns": {}
+    }
+    for name in columns:
+        values = [record[name] for record in records]
+        path = os.path.join(out_dir, f"{name}.npy")
+        if name in STRING_COLUMNS or any(isinstance(v, str) for v in values):
+            categories, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+            _write(path, codes.astype(np.int16))
+            _write(os.path.join(out_dir, f"{name}.categories.npy"), categories)
+            schema["columns"][name] = {"kind": "string", "dtype": "int16", "categories": len(categories)}
+        elif all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            array = _int_column(values)
+            _write(path, array)
+            schema["columns"][name] = {"kind": "int", "dtype": array.dtype.name}
+        else:
+            array = _float_column(values)
+            _write(path, array)
+            schema["columns"][name] = {"kind": "float", "dtype": array.dtype.name,
+                                       "nulls": int(np.isnan(array).sum())}
+
+    tmp_path = os.path.join(out_dir, "schema.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, "schema.json"))
+    return schema
+
+
+def convert(json_path: str, out_dir: str) -> Dict[str, Any]:
+    """Convert one season's JSON into a columnar directory; returns the schema."""
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    return write_columns(json.loads(raw), out_dir, os.path.basename(json_path), hashlib.sha256(raw).hexdigest())
+
+
+class Season:
+    """One season's columns, memory-mapped on first access."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "schema.json"), "r") as f:
+            self.schema = json.load(f)
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._decoded: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.schema["rows"]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.schema["columns"])
+
+    def _load(self, filename: str) -> np.ndarray:
+        array = self._arrays.get(filename)
+        if array is None:
+            # Zero-length arrays cannot be mapped
+            mmap_mode = "r" if len(self) else None
+            array = np.load(os.path.join(self.path, filename), mmap_mode=mmap_mode, allow_pickle=False)
+            self._arrays[filename] = array
+        return array
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """The stored array: codes for string columns, values otherwise."""
+        if name not in self.schema["columns"]:
+            raise KeyError(name)
+        return self._load(f"{name}.npy")
+
+    def categories(self, name: str) -> np.ndarray:
+        return self._load(f"{name}.categories.npy")
+
+    def code_of(self, name: str, value: str) -> int:
+        """Dictionary code of `value` in a string column, or -1 if it never occurs."""
+        categories = self.categories(name)
+        i = int(np.searchsorted(categories, value))
+        return i if i < len(categories) and categories[i] == value else -1
+
+    def strings(self, name: str) -> np.ndarray:
+        return self.categories(name)[self[name]]
+
+    def values(self, name: str) -> np.ndarray:
+        """Decoded column: strings for string columns, exact float64 for floats.
+
+        Decoded columns are built once per Season and returned read-only, like
+        the mapped ones.
+        """
+        array = self._decoded.get(name)
+        if array is not None:
+            return array
+        kind = self.schema["columns"][name]["kind"]
+        if kind == "string":
+            array = self.strings(name)
+        elif kind == "float" and self[name].dtype != np.float64:
+            array = _exact_float64(self[name])
+        else:
+            # float64 columns already hold the exact JSON values
+            return self[name]
+        array.setflags(write=False)
+        self._decoded[name] = array
+        return array
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """The rows exactly as `json.load` returns them from the source file."""
+        decoded = {}
+        for name, spec in self.schema["columns"].items():
+            values = self.values(name).tolist()
+            if spec["kind"] == "float":
+                values = [None if v != v else v for v in values]
+            decoded[name] = values
+        return [dict(zip(decoded, row)) for row in zip(*decoded.values())]
+
+
+def load(year: int, store_dir: Optional[str] = None) -> Season:
+    return Season(season_dir(year, store_dir))
+
+
+def available_years(store_dir: Optional[str] = None) -> List[int]:
+    root = store_dir or STORE_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(int(d) for d in os.listdir(root)
+                  if d.isdigit() and os.path.exists(os.path.join(root, d, "schema.json")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert season JSON files into the columnar store")
+    parser.add_argument("files", nargs="+", help="datasets/<year>.json files")
+    parser.add_argument("--out", default=STORE_DIR, help="Store directory")
+    args = parser.parse_args()
+
+    for json_path in args.files:
+        year = int(os.path.splitext(os.path.basename(json_path))[0])
+        out_dir = season_dir(year, args.out)
+        schema = convert(json_path, out_dir)
+        with open(json_path, "r") as f:
+            if load(year, args.out).to_records() != json.load(f):
+                raise SystemExit(f"{json_path}: columnar copy does not round-trip")
+        print(f"{out_dir}: {schema['rows']} rows, {len(schema['columns'])} columns (round-trip verified)")
+
+
+if __name__ == "__main__":
+    main()
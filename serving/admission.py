@@ -0,0 +1,142 @@
+import os
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+
+class OverloadedError(Exception):
+    """Raised when a request cannot be admitted within the configured limits."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded admission for inference requests.
+
+    A request holds one global slot and one slot for its race while it runs.
+    When no slot is free it waits in a FIFO queue of at most `max_queue`
+    requests for up to `max_wait` seconds; anything beyond that is rejected
+    straight away so overload turns into fast 503s instead of slow 200s.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_race: int, max_queue: int, max_wait: float):
+        self.max_concurrency = max_concurrency
+        self.max_per_race = max_per_race
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self.in_flight = 0
+        self.in_flight_by_race: Dict[str, int] = {}
+        self._waiters: Deque[tuple] = deque()
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_depth_seen = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            max_concurrency=int(os.getenv("MAX_CONCURRENT_PREDICTIONS", "8")),
+            max_per_race=int(os.getenv("MAX_CONCURRENT_PER_RACE", "4")),
+            max_queue=int(os.getenv("MAX_PREDICTION_QUEUE", "32")),
+            max_wait=float(os.getenv("MAX_QUEUE_WAIT_SECONDS", "2.0")),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _has_capacity(self, race: str) -> bool:
+        return (
+            self.in_flight < self.max_concurrency
+            and self.in_flight_by_race.get(race, 0) < self.max_per_race
+        )
+
+    def _take(self, race: str) -> None:
+        self.in_flight += 1
+        self.in_flight_by_race[race] = self.in_flight_by_race.get(race, 0) + 1
+        self.admitted += 1
+
+    def _retry_after(self) -> int:
+        return max(1, int(round(self.max_wait)))
+
+    async def acquire(self, race: str) -> None:
+        # Fast path: free slot and nobody queued ahead of us
+        if not self._waiters and self._has_capacity(race):
+            self._take(race)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise OverloadedError("Prediction queue is full", self._retry_after())
+
+        waiter = (race, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self.max_queue_depth_seen = max(self.max_queue_depth_seen, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter[1], timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            # The handoff and the timeout can land in the same loop iteration;
+            # if we were already handed a slot, keep it rather than leak it.
+            if waiter[1].done() and not waiter[1].cancelled():
+                return
+            self.rejected_timeout += 1
+            raise OverloadedError("Timed out waiting for an inference slot", self._retry_after())
+        except asyncio.CancelledError:
+            # Client went away after we were handed a slot: give it back
+            if waiter[1].done() and not waiter[1].cancelled():
+                self.release(race)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, race: str) -> None:
+        self.in_flight -= 1
+        self.in_flight_by_race[race] -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # Hand slots to queued requests in arrival order; a waiter blocked only
+        # by its own race limit does not hold up waiters for other races.
+        for waiter in list(self._waiters):
+            if self.in_flight >= self.max_concurrency:
+                break
+            race, future = waiter
+            if future.done() or not self._has_capacity(race):
+                continue
+            self._waiters.remove(waiter)
+            self._take(race)
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, race: str):
+        await self.acquire(race)
+        try:
+            yield
+        finally:
+            self.release(race)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "in_flight": self.in_flight,
+            "in_flight_by_race": {k: v for k, v in self.in_flight_by_race.items() if v},
+            "queue_depth": self.queue_depth,
+            "max_queue_depth_seen": self.max_queue_depth_seen,
+            "admitted": self.admitted,
+            "rejected": {
+                "queue_full": self.rejected_queue_full,
+                "timeout": self.rejected_timeout,
+            },
+            "limits": {
+                "max_concurrency": self.max_concurrency,
+                "max_per_race": self.max_per_race,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+            },
+        }
@@ -0,0 +1,156 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+from serving.inference import RACE_RANGES
+
+# Numeric request columns, in the order their checks are reported
+NUMERIC_COLUMNS = ["qualifying_time", "clean_air_race_pace", "rain_prob", "temperature"]
+# Columns a client may omit (NaN / null): filled from the derived pace store (features.clean_air)
+OPTIONAL_COLUMNS = ["clean_air_race_pace"]
+
+
+def numeric_bounds(model: type, name: str) -> Dict[str, float]:
+    """Read the gt/ge/lt/le constraints declared on a pydantic field."""
+    bounds = {}
+    for constraint in model.model_fields[name].metadata:
+        for key in ("gt", "ge", "lt", "le"):
+            value = getattr(constraint, key, None)
+            if value is not None:
+                bounds[key] = value
+    return bounds
+
+
+def _bound_checks(name: str, bounds: Dict[str, float]) -> List[Tuple[str, float, str]]:
+    # Same wording pydantic uses for the single-row 422 responses
+    phrases = {
+        "gt": "greater than",
+        "ge": "greater than or equal to",
+        "lt": "less than",
+        "le": "less than or equal to",
+    }
+    return [(key, value, f"{name}: Input should be {phrases[key]} {value}") for key, value in bounds.items()]
+
+
+def _violates(values: np.ndarray, key: str, limit: float) -> np.ndarray:
+    # Written as negations so NaN always counts as a violation
+    if key == "gt":
+        return ~(values > limit)
+    if key == "ge":
+        return ~(values >= limit)
+    if key == "lt":
+        return ~(values < limit)
+    return ~(values <= limit)
+
+
+# Driver codes are three letters A-Z, so they intern to 0 .. 26**3 - 1
+DRIVER_ID_SPACE = 26 ** 3
+
+
+def driver_ids(codes: np.ndarray) -> np.ndarray:
+    """Interned ids of upper-case driver codes; -1 for anything that is not three letters A-Z."""
+    # Read as UTF-32 code points; a fourth non-zero column means the code is too long
+    chars = np.asarray(codes, dtype="U4").reshape(-1).view(np.uint32).reshape(-1, 4).astype(np.int64) - ord("A")
+    letters = (chars[:, :3] >= 0) & (chars[:, :3] < 26)
+    valid = letters.all(axis=1) & (chars[:, 3] == -ord("A"))
+    ids = chars[:, 0] * 676 + chars[:, 1] * 26 + chars[:, 2]
+    return np.where(valid, ids, -1).reshape(np.shape(codes))
+
+
+def driver_id(code: str) -> int:
+    """Scalar `driver_ids` for the single-row route."""
+    if len(code) != 3 or not all("A" <= c <= "Z" for c in code):
+        return -1
+    return (ord(code[0]) - 65) * 676 + (ord(code[1]) - 65) * 26 + (ord(code[2]) - 65)
+
+
+def driver_table(drivers: Dict[str, float]) -> np.ndarray:
+    """Per-driver values (team scores, clean-air paces) as a dense array indexed by interned driver id.
+
+    Drivers without a value are NaN.
+    """
+    table = np.full(DRIVER_ID_SPACE, np.nan)
+    for code, score in drivers.items():
+        i = driver_id(code.upper())
+        if i >= 0:
+            table[i] = score
+    return table
+
+
+def lookup_drivers(codes: np.ndarray, table: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (values, known_mask) from a `driver_table` for an array of upper-case driver codes."""
+    ids = driver_ids(codes)
+    values = np.where(ids >= 0, table[np.maximum(ids, 0)], np.nan)
+    return values, ~np.isnan(values)
+
+
+def validate_columns(
+    race: str,
+    columns: Dict[str, np.ndarray],
+    driver_codes: np.ndarray,
+    table: np.ndarray,
+    input_model: type,
+    pace_table: Optional[np.ndarray] = None,
+) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+    """Run every /predict check over whole columns at once.
+
+    Returns (errors, valid_mask, team_scores). `errors[i]` holds the first
+    failed check for row i with the same message /predict would return, or
+    None when the row is valid.
+
+    Omitted (NaN) clean-air paces are filled from `pace_table` and written
+    back into `columns`.
+    """
+    n = driver_codes.shape[0]
+    # Checks are listed in /predict order; the first one a row fails wins
+    checks: List[Tuple[np.ndarray, object]] = []
+
+    code_lengths = np.char.str_len(driver_codes)
+    checks.append((code_lengths < 3, "driver_code: String should have at least 3 characters"))
+    checks.append((code_lengths > 3, "driver_code: String should have at most 3 characters"))
+
+    omitted = {name: np.isnan(columns[name]) for name in OPTIONAL_COLUMNS}
+    for name in NUMERIC_COLUMNS:
+        for key, limit, message in _bound_checks(name, numeric_bounds(input_model, name)):
+            failed = _violates(columns[name], key, limit)
+            checks.append((failed & ~omitted[name] if name in omitted else failed, message))
+
+    codes_upper = np.char.upper(driver_codes)
+    team_scores, known = lookup_drivers(codes_upper, table)
+    unknown_messages = np.char.add(np.char.add("Unknown driver code '", codes_upper), "'")
+    checks.append((~known, unknown_messages))
+
+    pace = columns["clean_air_race_pace"]
+    if omitted["clean_air_race_pace"].any():
+        stored = lookup_drivers(codes_upper, pace_table)[0] if pace_table is not None else np.full(n, np.nan)
+        pace = np.where(omitted["clean_air_race_pace"], stored, pace)
+        columns["clean_air_race_pace"] = pace
+        no_pace_messages = np.char.add(np.char.add("No clean air race pace for '", codes_upper),
+                                       f"' at {race}; send clean_air_race_pace")
+        checks.append((np.isnan(pace), no_pace_messages))
+
+    low, high = RACE_RANGES[race]
+    qual = columns["qualifying_time"]
+    checks.append((~((qual >= low) & (qual <= high)), f"Qualifying time for {race} invalid"))
+    checks.append((~((pace >= low) & (pace <= high)), f"Clean air race pace for {race} invalid"))
+    checks.append((~(pace > qual), "Clean air race pace should be slower than qualifying time"))
+
+    errors: List[Optional[str]] = [None] * n
+    invalid = np.zeros(n, dtype=bool)
+    for failed, message in checks:
+        first = failed & ~invalid
+        if first.any():
+            for i in np.flatnonzero(first):
+                errors[i] = message if isinstance(message, str) else str(message[i])
+            invalid |= first
+    return errors, ~invalid, team_scores
+
+
+def columns_from_input(input_data: BaseModel) -> Dict[str, np.ndarray]:
+    """Turn the parallel request lists into float64 arrays (None and omitted columns become NaN)."""
+    n = len(input_data.driver_code)
+    return {
+        name: np.full(n, np.nan) if getattr(input_data, name) is None
+        else np.asarray(getattr(input_data, name), dtype=np.float64)
+        for name in NUMERIC_COLUMNS
+    }
@@ -0,0 +1,291 @@
+"""Input drift monitoring for the served race models.
+
+For every race and every input the API sees, the monitor keeps:
+- a running mean and variance (Welford, merged batch-wise with Chan's update)
+- a coarse fixed-bin histogram, used for the population stability index
+- a fine fixed-bin quantile sketch, accurate to half a bin
+
+Bins span the input's valid range (RACE_RANGES for lap times, the request
+bounds for the rest), plus an underflow and an overflow bin. So memory is
+constant however many rows arrive.
+
+Requests only hand the columns they served to `DriftMonitor.record`, which
+is a non-blocking queue put. A background thread folds them into the
+statistics. When the queue is full the rows are counted as dropped rather
+than slowing the request down.
+
+Training writes the same statistics over each model's training inputs to
+models/<artifact>.reference.json. `DriftMonitor.report` compares the live
+statistics to them.
+"""
+import os
+import re
+import json
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+from serving.inference import RACE_RANGES
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ["qualifying_time", "clean_air_race_pace", "team_score", "rain_prob", "temperature"]
+# Training frame columns (training.races feature lists) -> API inputs
+TRAINING_COLUMNS = {
+    "QualifyingTime": "qualifying_time",
+    "QualifyingTime (s)": "qualifying_time",
+    "CleanAirRacePace (s)": "clean_air_race_pace",
+    "TeamPerformanceScore": "team_score",
+    "RainProbability": "rain_prob",
+    "Temperature": "temperature"
+}
+FIXED_BOUNDS = {"team_score": (0.0, 1.0), "rain_prob": (0.0, 100.0), "temperature": (-10.0, 70.0)}
+
+HISTOGRAM_BINS = 20
+SKETCH_BINS = 512
+# PSI thresholds in common use: below 0.1 stable, 0.1-0.25 worth watching, above 0.25 drifted
+PSI_WATCH = 0.1
+PSI_DRIFT = 0.25
+PSI_EPSILON = 1e-4
+MIN_LIVE_ROWS = 50
+
+
+def feature_bounds(race: str, feature: str) -> Tuple[float, float]:
+    if feature in ("qualifying_time", "clean_air_race_pace"):
+        return tuple(float(v) for v in RACE_RANGES[race])
+    return FIXED_BOUNDS[feature]
+
+
+def _bin_index(values: np.ndarray, low: float, high: float, bins: int) -> np.ndarray:
+    """Bin of each value: 0 is underflow, 1..bins the range, bins + 1 overflow."""
+    # Clipped before the cast so infinities land in the outer bins
+    scaled = np.floor(np.clip((values - low) / (high - low) * bins, -1, bins)).astype(np.int64) + 1
+    # The upper bound itself belongs to the last in-range bin
+    scaled[values == high] = bins
+    return scaled
+
+
+class FeatureStats:
+    """Constant-memory running statistics of one input."""
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = np.zeros(HISTOGRAM_BINS + 2, dtype=np.int64)
+        self.sketch = np.zeros(SKETCH_BINS + 2, dtype=np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        values = values[~np.isnan(values)]
+        n = values.shape[0]
+        if not n:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        # add.at touches only the bins of these rows, so a single-row update is O(1)
+        np.add.at(self.histogram, _bin_index(values, self.low, self.high, HISTOGRAM_BINS), 1)
+        np.add.at(self.sketch, _bin_index(values, self.low, self.high, SKETCH_BINS), 1)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """Quantile from the sketch, interpolated linearly within its bin."""
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        cumulative = np.cumsum(self.sketch)
+        i = int(np.searchsorted(cumulative, rank, side="left"))
+        if i == 0:
+            return self.low
+        if i == SKETCH_BINS + 1:
+            return self.high
+        before = cumulative[i - 1]
+        width = (self.high - self.low) / SKETCH_BINS
+        fraction = (rank - before) / self.sketch[i] if self.sketch[i] else 0.0
+        return self.low + (i - 1 + fraction) * width
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "std": float(np.sqrt(self.variance)) if self.count > 1 else None,
+            **{f"p{int(q * 100)}": self.quantile(q) if self.count else None for q in (0.1, 0.5, 0.9)}
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "low": self.low, "high": self.high, "count": self.count, "mean": self.mean, "m2": self.m2,
+            "histogram": self.histogram.tolist(), "sketch": self.sketch.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureStats":
+        stats = cls(data["low"], data["high"])
+        stats.count, stats.mean, stats.m2 = data["count"], data["mean"], data["m2"]
+        stats.histogram = np.asarray(data["histogram"], dtype=np.int64)
+        stats.sketch = np.asarray(data["sketch"], dtype=np.int64)
+        return stats
+
+
+def population_stability(reference: np.ndarray, live: np.ndarray) -> float:
+    """PSI between two histograms over the same bins."""
+    expected = np.maximum(reference / max(reference.sum(), 1), PSI_EPSILON)
+    actual = np.maximum(live / max(live.sum(), 1), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def compare(reference: Optional[FeatureStats], live: FeatureStats) -> Dict[str, Any]:
+    """Drift scores of one input: PSI, standardized mean shift and a status."""
+    result: Dict[str, Any] = {"live": live.summary(), "reference": reference.summary() if reference else None}
+    if reference is None or not reference.count:
+        result["status"] = "no reference"
+        return result
+    if live.count < MIN_LIVE_ROWS:
+        result["status"] = "insufficient data"
+        return result
+    psi = population_stability(reference.histogram, live.histogram)
+    std = np.sqrt(reference.variance) if reference.count > 1 else float("nan")
+    result["psi"] = psi
+    result["mean_shift"] = float((live.mean - reference.mean) / std) if std > 0 else None
+    result["status"] = "drift" if psi >= PSI_DRIFT else "watch" if psi >= PSI_WATCH else "ok"
+    return result
+
+
+def new_race_stats(race: str) -> Dict[str, FeatureStats]:
+    return {feature: FeatureStats(*feature_bounds(race, feature)) for feature in FEATURES}
+
+
+def reference_from_training(race: str, X) -> Dict[str, Any]:
+    """Reference statistics of a model's training frame, keyed by API input name."""
+    stats = new_race_stats(race)
+    for column, feature in TRAINING_COLUMNS.items():
+        if column in X.columns:
+            stats[feature].update(X[column].to_numpy(dtype=np.float64))
+    return {"race": race, "rows": int(len(X)), "features": {f: s.to_dict() for f, s in stats.items() if s.count}}
+
+
+def reference_path(models_dir: str, artifact: str) -> str:
+    """models/<artifact stem>.reference.json; shared by every version and the student of an artifact."""
+    stem = re.sub(r"(\.v\d+|\.student)?\.(joblib|keras)$", "", os.path.basename(artifact))
+    return os.path.join(models_dir, f"{stem}.reference.json")
+
+
+def save_reference(path: str, reference: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(reference, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_reference(path: str) -> Optional[Dict[str, FeatureStats]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {feature: FeatureStats.from_dict(stats) for feature, stats in data["features"].items()}
+
+
+class DriftMonitor:
+    """Per-race live input statistics, updated on a background thread."""
+
+    def __init__(self, max_pending: int, stop_timeout: float = 5.0):
+        self.stop_timeout = stop_timeout
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.live: Dict[str, Dict[str, FeatureStats]] = {}
+        self.references: Dict[str, Optional[Dict[str, FeatureStats]]] = {}
+        self.reference_files: Dict[str, Optional[str]] = {}
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> "DriftMonitor":
+        return cls(max_pending=int(os.getenv("DRIFT_QUEUE_SIZE", "1024")))
+
+    def load_references(self, models_dir: str, artifacts: Dict[str, str]) -> None:
+        """Load the reference of each served artifact ({race: filename})."""
+        for race, artifact in artifacts.items():
+            path = reference_path(models_dir, artifact)
+            self.references[race] = load_reference(path)
+            self.reference_files[race] = os.path.basename(path) if self.references[race] else None
+
+    def record(self, race: str, features: Dict[str, Any]) -> None:
+        """Queue one request's validated inputs; never blocks."""
+        try:
+            self._pending.put_nowait((race, features))
+        except queue.Full:
+            self.dropped += 1
+
+    def _apply(self, race: str, features: Dict[str, Any]) -> None:
+        with self._lock:
+            stats = self.live.get(race)
+            if stats is None:
+                stats = self.live[race] = new_race_stats(race)
+            for feature, values in features.items():
+                stats[feature].update(np.atleast_1d(values))
+
+    def _run(self) -> None:
+        while True:
+            item = self._pending.get()
+            try:
+                if item is None:
+                    return
+                self._apply(*item)
+            except Exception:
+                logger.exception("Drift statistics update skipped: %s", item[0])
+            finally:
+                self._pending.task_done()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Apply everything queued so far and stop the thread, waiting at most `stop_timeout` seconds."""
+        thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        deadline = time.monotonic() + self.stop_timeout
+        try:
+            self._pending.put(None, timeout=self.stop_timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            logger.warning("Drift monitor did not stop within %.1f s; %d requests not applied",
+                           self.stop_timeout, self._pending.qsize())
+
+    def flush(self) -> None:
+        """Wait until every queued request has been applied."""
+        self._pending.join()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            races = {}
+            for race in sorted(set(self.live) | set(self.references)):
+                live = self.live.get(race) or new_race_stats(race)
+                reference = self.references.get(race) or {}
+                features = {feature: compare(reference.get(feature), stats) for feature, stats in live.items()}
+                statuses = [f["status"] for f in features.values()]
+                races[race] = {
+                    "rows": max(stats.count for stats in live.values()),
+                    "reference": self.reference_files.get(race),
+                    "status": next((s for s in ("drift", "watch", "ok") if s in statuses),
+                                   "insufficient data" if reference else "no reference"),
+                    "features": features
+                }
+            return {"pending": self._pending.qsize(), "dropped": self.dropped, "races": races}
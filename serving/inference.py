@@ -0,0 +1,91 @@
+import numpy as np
+import xgboost as xgb
+from typing import Any, Dict, Tuple
+
+# Every accepted spelling of a race, already normalized (lower case, '_' separators)
+RACE_ALIASES: Dict[str, str] = {
+    "abudhabi": "abudhabi",
+    "abu_dhabi": "abudhabi",
+    "yas_marina": "abudhabi",
+    "qatar": "qatar",
+    "lusail": "qatar",
+    "usa": "usa",
+    "united_states": "usa",
+    "austin": "usa",
+    "cota": "usa",
+    "mexico": "mexico",
+    "mexico_city": "mexico",
+}
+
+# Plausible lap time window (seconds) per race for qualifying and race pace
+RACE_RANGES: Dict[str, Tuple[float, float]] = {
+    "abudhabi": (70, 105),
+    "qatar": (75, 120),
+    "usa": (85, 130),
+    "mexico": (70, 110)
+}
+
+# USA and Mexico models use: QualifyingTime, CleanAirRacePace, TeamPerformanceScore, TotalSectorTime (imputed), RainProbability
+# Abu Dhabi and Qatar use: QualifyingTime, RainProbability, Temperature, TeamPerformanceScore, CleanAirRacePace
+SECTOR_TIME_RACES = ("usa", "mexico")
+
+
+def resolve_race(name: str) -> str:
+    """Map a user supplied race name onto its model key."""
+    val = name.lower().strip().replace(" ", "_").replace("-", "_")
+    race = RACE_ALIASES.get(val)
+    if race is None:
+        raise ValueError(
+            f"The provided race name '{name}' is not valid. "
+            "Please specify one of the supported race identifiers: "
+            "'abudhabi', 'qatar', 'usa', or 'mexico'."
+        )
+    return race
+
+
+def build_features(race: str, qualifying_time, clean_air_race_pace, team_score, rain_prob, temperature) -> np.ndarray:
+    """Assemble the (n_rows, 5) feature matrix in the column order the race's model was trained on.
+
+    Accepts scalars or equal-length arrays.
+    """
+    qualifying_time = np.atleast_1d(np.asarray(qualifying_time, dtype=np.float64))
+    n = qualifying_time.shape[0]
+    columns = np.empty((n, 5), dtype=np.float64)
+    if race in SECTOR_TIME_RACES:
+        columns[:, 0] = qualifying_time
+        columns[:, 1] = clean_air_race_pace
+        columns[:, 2] = team_score
+        columns[:, 3] = np.nan  # TotalSectorTime to be imputed
+        columns[:, 4] = rain_prob
+    else:
+        columns[:, 0] = qualifying_time
+        columns[:, 1] = rain_prob
+        columns[:, 2] = temperature
+        columns[:, 3] = team_score
+        columns[:, 4] = clean_air_race_pace
+    return columns
+
+
+def is_xgboost(model: Any) -> bool:
+    # A quantized XGBoost model (serving.quantized) reports the same model version
+    return "xgboost" in str(type(model)).lower() or getattr(model, "source", None) == "xgboost"
+
+
+def model_info_for(race: str, model: Any) -> str:
+    """Version tag reported in `meta.model` for a race's model."""
+    if race in ["abudhabi", "qatar"] and is_xgboost(model):
+        return f"{race}_xgb_v2"
+    return f"{race}_v2"
+
+
+def run_model(race: str, model: Any, imputer: Any, features: np.ndarray) -> Tuple[np.ndarray, str]:
+    """Predict every row of `features`, returning (predictions, model_info)."""
+    if imputer:
+        features = imputer.transform(features)
+
+    if isinstance(model, xgb.Booster):
+        # Native XGBoost Booster needs a DMatrix; XGBRegressor takes arrays
+        predictions = model.predict(xgb.DMatrix(features))
+    else:
+        predictions = model.predict(features)
+    return np.asarray(predictions, dtype=np.float64).reshape(-1), model_info_for(race, model)
@@ -0,0 +1,204 @@
+"""Event-loop lag and per-route loop time.
+
+Every `async def` route, validation and feature build runs on the single
+event-loop thread, so anything slow there delays every other request. The
+monitor measures this three ways:
+- lag: a task sleeps `interval` seconds and records how late it woke up
+- stalls: the lag task stamps a heartbeat on each tick. A watchdog thread
+  that finds it older than `stall_threshold` knows the loop is blocked right
+  now, and logs a warning with the loop thread's current stack
+- route time: `LoopTimeMiddleware` runs each request's coroutine one step at
+  a time and sums how long the steps held the loop. Time spent awaiting
+  (thread pool inference, the admission queue, the network) is not counted,
+  nor is work in tasks the request spawns
+
+Lag and route times go into fixed-bucket histograms, reported by /metrics.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+import numpy as np
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in milliseconds; a last bucket catches the rest
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+STACK_DEPTH = 20
+
+
+class Histogram:
+    """Counts of observed durations per bucket, with their sum and maximum."""
+
+    def __init__(self):
+        self.counts = np.zeros(len(BUCKETS_MS) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[np.searchsorted(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (the maximum for the last bucket)."""
+        if not self.count:
+            return None
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.count, side="left"))
+        return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Cumulative like Prometheus buckets: each one counts every observation up to its bound
+        cumulative = np.cumsum(self.counts).tolist()
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max,
+            "buckets_ms": {**{str(b): c for b, c in zip(BUCKETS_MS, cumulative)}, "+Inf": cumulative[-1]}
+        }
+
+
+class _LoopTimed:
+    """Awaitable that drives a coroutine and sums the time each step holds the loop."""
+
+    def __init__(self, coroutine):
+        self.coroutine = coroutine
+        self.busy = 0.0
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            try:
+                yielded = self.coroutine.send(value) if error is None else self.coroutine.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.busy += time.perf_counter() - start
+            value, error = None, None
+            try:
+                # The awaited future goes to the task unchanged, so scheduling works as with `await`
+                value = yield yielded
+            except BaseException as e:
+                # Cancellation is delivered into the coroutine, like `await` would
+                error = e
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, stall_threshold: float):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lag = Histogram()
+        self.routes: Dict[str, Histogram] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, Any]] = None
+
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread: Optional[int] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor":
+        return cls(
+            interval=float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.1")),
+            stall_threshold=float(os.getenv("LOOP_STALL_SECONDS", "0.25")),
+        )
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self.lag.observe(max(0.0, loop.time() - expected))
+
+    def _watch(self) -> None:
+        stalled = False
+        while not self._stopping.wait(self.interval):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.stall_threshold:
+                stalled = False
+                continue
+            if stalled:
+                # One warning per stall, however long it lasts
+                continue
+            stalled = True
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame, limit=STACK_DEPTH)) if frame else ""
+            self.stalls += 1
+            self.last_stall = {"at": time.time(), "blocked_ms": blocked * 1000, "stack": stack}
+            logger.warning("Event loop blocked for %.0f ms; loop thread stack:\n%s", blocked * 1000, stack)
+
+    def start(self) -> None:
+        """Start measuring; must be called from the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._stopping.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+    def record_route(self, route: str, seconds: float) -> None:
+        histogram = self.routes.get(route)
+        if histogram is None:
+            histogram = self.routes[route] = Histogram()
+        histogram.observe(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "lag": self.lag.to_dict(),
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "routes": {route: histogram.to_dict() for route, histogram in sorted(self.routes.items())}
+        }
+
+
+class LoopTimeMiddleware:
+    """ASGI middleware recording how long each HTTP request held the event loop, per route."""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timed = _LoopTimed(self.app(scope, receive, send))
+        self.monitor.in_flight += 1
+        self.monitor.max_in_flight = max(self.monitor.max_in_flight, self.monitor.in_flight)
+        try:
+            await timed
+        finally:
+            self.monitor.in_flight -= 1
+            # The router leaves the matched route in the scope; templated paths keep one histogram per route
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.monitor.record_route(f"{scope['method']} {route}", timed.busy)
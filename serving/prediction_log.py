@@ -0,0 +1,297 @@
+"""Write-behind log of every served prediction in a local SQLite database.
+
+Requests never touch the database. `PredictionLog.log` puts one entry per
+request (a single row or a batch's columns) on a bounded in-memory queue
+and returns. A writer thread owns the connection: it expands entries into
+rows and commits them in one transaction per `batch_size` rows, or every
+`flush_interval` seconds, whichever comes first. The database runs in WAL
+mode, so readers (the query helpers below, the backtest and drift tooling)
+never block the writer.
+
+When the queue is full, the `drop` policy counts and discards the entry.
+The `block` policy waits up to `block_timeout` seconds for room, on a
+worker thread so the event loop keeps running, and drops the entry only
+after that. `stop()` drains the queue and commits everything before the
+writer exits, waiting at most `stop_timeout` seconds; lifespan calls it on
+shutdown. An entry that cannot be expanded into rows is logged and skipped,
+and if the database cannot be opened the writer keeps draining the queue,
+counting each entry as dropped.
+
+Usage (from the repo root):
+    python -m serving.prediction_log
+    python -m serving.prediction_log --race usa --since 2025-10-01
+"""
+import os
+import time
+import queue
+import asyncio
+import sqlite3
+import logging
+import argparse
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOG_PATH = os.path.join(REPO_ROOT, "logs", "predictions.sqlite3")
+
+INPUT_COLUMNS = ["qualifying_time", "clean_air_race_pace", "team_score", "rain_prob", "temperature"]
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    logged_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    race TEXT NOT NULL,
+    driver TEXT NOT NULL,
+    qualifying_time REAL,
+    clean_air_race_pace REAL,
+    team_score REAL,
+    rain_prob REAL,
+    temperature REAL,
+    predicted_pace REAL,
+    model TEXT,
+    model_version INTEGER,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS predictions_race_time ON predictions (race, logged_at);
+CREATE INDEX IF NOT EXISTS predictions_driver ON predictions (driver);
+"""
+ROW_COLUMNS = [
+    "logged_at", "source", "race", "driver", *INPUT_COLUMNS, "predicted_pace", "model", "model_version", "latency_ms"
+]
+INSERT = f"INSERT INTO predictions ({', '.join(ROW_COLUMNS)}) VALUES ({', '.join('?' * len(ROW_COLUMNS))})"
+POLICIES = ("drop", "block")
+STOP_TIMEOUT = 5.0
+
+
+def connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps commits durable across application crashes with NORMAL; only an OS crash can lose the last ones
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def _rows(entry: Dict[str, Any]) -> List[tuple]:
+    """Expand one queued entry (scalars or equal-length columns) into table rows."""
+    drivers = np.atleast_1d(entry["driver"]).astype(str).tolist()
+    n = len(drivers)
+    columns = [np.broadcast_to(np.asarray(entry[name], dtype=np.float64), (n,)).tolist()
+               for name in INPUT_COLUMNS + ["predicted_pace"]]
+    constants = (entry["model"], int(entry["model_version"]), float(entry["latency_ms"]))
+    return [(entry["logged_at"], entry["source"], entry["race"], driver, *values, *constants)
+            for driver, *values in zip(drivers, *columns)]
+
+
+class PredictionLog:
+    def __init__(self, path: str, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0,
+                 policy: str = "drop", block_timeout: float = 0.05, stop_timeout: float = STOP_TIMEOUT):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown prediction log policy '{policy}': use one of {', '.join(POLICIES)}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.stop_timeout = stop_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+        self.logged_rows = 0
+        self.dropped = 0
+        self.transactions = 0
+        self.write_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "PredictionLog":
+        return cls(
+            path=os.getenv("PREDICTION_LOG_PATH") or DEFAULT_LOG_PATH,
+            max_queue=int(os.getenv("PREDICTION_LOG_QUEUE", "10000")),
+            batch_size=int(os.getenv("PREDICTION_LOG_BATCH", "500")),
+            flush_interval=float(os.getenv("PREDICTION_LOG_FLUSH_SECONDS", "1.0")),
+            policy=os.getenv("PREDICTION_LOG_POLICY", "drop"),
+        )
+
+    async def log(self, race: str, driver, inputs: Dict[str, Any], predicted_pace, model: str,
+                  model_version: int, latency: float, source: str) -> None:
+        """Queue one request's predictions; `driver`, `inputs` and `predicted_pace` may be columns."""
+        entry = {
+            "logged_at": time.time(), "source": source, "race": race, "driver": driver,
+            **inputs, "predicted_pace": predicted_pace, "model": model, "model_version": model_version,
+            "latency_ms": latency * 1000
+        }
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except queue.Full:
+            if self.policy == "drop":
+                self.dropped += 1
+                return
+        try:
+            await asyncio.to_thread(self._queue.put, entry, True, self.block_timeout)
+        except queue.Full:
+            self.dropped += 1
+
+    def _commit(self, connection: sqlite3.Connection, rows: List[tuple]) -> None:
+        try:
+            with connection:
+                connection.executemany(INSERT, rows)
+            self.logged_rows += len(rows)
+            self.transactions += 1
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            logger.error("Prediction log write failed (%d rows lost): %s", len(rows), e)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            return connect(self.path)
+        except (OSError, sqlite3.Error) as e:
+            self.write_errors += 1
+            logger.error("Prediction log %s cannot be opened; predictions will not be logged: %s", self.path, e)
+            return None
+
+    def _run(self) -> None:
+        connection = self._connect()
+        pending: List[tuple] = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    entry = False
+                if entry is None:
+                    # Shutdown: everything queued before the sentinel is already in `pending`
+                    if pending:
+                        self._commit(connection, pending)
+                    return
+                if entry and connection is None:
+                    self.dropped += 1
+                elif entry:
+                    try:
+                        pending.extend(_rows(entry))
+                    except Exception:
+                        self.write_errors += 1
+                        logger.exception("Prediction log entry skipped: %s", entry.get("race"))
+                if len(pending) >= self.batch_size or (pending and time.monotonic() >= deadline):
+                    self._commit(connection, pending)
+                    pending = []
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_interval
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Commit everything queued so far and stop the writer, waiting at most `stop_timeout` seconds."""
+        thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        deadline = time.monotonic() + self.stop_timeout
+        try:
+            self._queue.put(None, timeout=self.stop_timeout)
+        except queue.Full:
+            pass
+        thread.join(max(0.0, deadline - time.monotonic()))
+        if thread.is_alive():
+            logger.warning("Prediction log writer did not stop within %.1f s; %d entries not committed",
+                           self.stop_timeout, self._queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "policy": self.policy,
+            "queued": self._queue.qsize(),
+            "logged_rows": self.logged_rows,
+            "transactions": self.transactions,
+            "dropped": self.dropped,
+            "write_errors": self.write_errors
+        }
+
+
+def _timestamp(value) -> Optional[float]:
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return datetime.fromisoformat(value).timestamp()
+
+
+def query(path: str = DEFAULT_LOG_PATH, race: Optional[str] = None, since=None, until=None,
+          model_version: Optional[int] = None, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Logged predictions as NumPy columns, oldest first.
+
+    `since` / `until` take a Unix time or an ISO date. Input columns use the
+    API names, so they can be fed to `serving.drift.FeatureStats` or through
+    `serving.inference.build_features` again for a backtest.
+    """
+    clauses, params = [], []
+    for clause, value in (("race = ?", race), ("logged_at >= ?", _timestamp(since)),
+                          ("logged_at < ?", _timestamp(until)), ("model_version = ?", model_version)):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    sql = f"SELECT {', '.join(ROW_COLUMNS)} FROM predictions"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+    columns = list(zip(*rows)) if rows else [()] * len(ROW_COLUMNS)
+    text = ("source", "race", "driver", "model")
+    return {
+        name: np.asarray(values, dtype=str if name in text else np.int64 if name == "model_version" else np.float64)
+        for name, values in zip(ROW_COLUMNS, columns)
+    }
+
+
+def summary(path: str = DEFAULT_LOG_PATH, since=None) -> List[Dict[str, Any]]:
+    """Row count, time span and latency per (race, model version)."""
+    sql = """
+        SELECT race, model_version, COUNT(*), MIN(logged_at), MAX(logged_at), AVG(latency_ms), AVG(predicted_pace)
+        FROM predictions WHERE logged_at >= ? GROUP BY race, model_version ORDER BY race, model_version
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = connection.execute(sql, (_timestamp(since) or 0,)).fetchall()
+    finally:
+        connection.close()
+    keys = ["race", "model_version", "rows", "first_logged_at", "last_logged_at", "mean_latency_ms", "mean_predicted_pace"]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the prediction log")
+    parser.add_argument("--path", default=os.getenv("PREDICTION_LOG_PATH") or DEFAULT_LOG_PATH)
+    parser.add_argument("--race", help="Only this race")
+    parser.add_argument("--since", help="ISO date or Unix time")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+    for row in summary(args.path, args.since):
+        if args.race and row["race"] != args.race:
+            continue
+        first = datetime.fromtimestamp(row["first_logged_at"]).isoformat(timespec="seconds")
+        last = datetime.fromtimestamp(row["last_logged_at"]).isoformat(timespec="seconds")
+        print(f"{row['race']} v{row['model_version']}: {row['rows']} predictions {first} .. {last}, "
+              f"mean latency {row['mean_latency_ms']:.2f} ms, mean pace {row['mean_predicted_pace']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Compact array form of the boosted race models.
+
+`quantize` flattens a GradientBoostingRegressor or XGBoost model into a few
+small arrays for the whole ensemble:
+- a table per input column of the distinct thresholds the model splits on
+- per split: its column (uint8), its threshold's position in that column's
+  table (uint8 / uint16) and a bitmask of the leaves it rules out
+- float32 leaf values, with GBR's learning rate folded in
+
+A batch is pre-binned once: every input becomes its position in its
+column's threshold table (a `searchsorted`), so each split is a small
+integer compare. The binning reproduces the original comparisons exactly:
+`x <= t` on float32 inputs for sklearn trees, `x < t` in float32 for
+XGBoost. So every row reaches the same leaves, and only the float32 leaf
+values differ from the original. `python -m serving.quantized` reports that
+deviation per race together with memory and throughput.
+
+The trees are evaluated together, as in QuickScorer: each failed test
+clears the leaves it rules out, and the lowest leaf left is the exit leaf.
+So a request costs a few array operations per split slot, however many
+trees the model has. Trees without splits fold into the base score, and a
+SimpleImputer in front of the model folds into a NaN fill.
+
+The API serves the quantized form for the races in QUANTIZED_MODELS, and
+`python -m training.backtest --quantized` replays the seasons through it.
+
+Usage (from the repo root):
+    python -m serving.quantized
+    python -m serving.quantized usa qatar --rows 50000 --json
+"""
+import os
+import json
+import time
+import pickle
+import argparse
+import numpy as np
+import xgboost as xgb
+from typing import Any, Dict, List, Optional
+
+from serving.inference import RACE_RANGES, build_features, run_model
+
+REPORT_ROWS = 20000
+SINGLE_ROUNDS = 500
+BATCH_ROUNDS = 10
+# Rows evaluated together; bounds the (trees x rows) temporaries of a large batch
+CHUNK_ROWS = 4096
+# Position of the lowest set bit of every byte
+LOWEST_BIT = np.array([(i & -i).bit_length() - 1 if i else 0 for i in range(256)], dtype=np.intp)
+MASK_DTYPES = ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64))
+
+
+class QuantizedEnsemble:
+    """A boosted tree ensemble as split and leaf arrays, predicting on pre-binned inputs.
+
+    Splits are stored by slot: `split_feature[j, t]` is the j-th split of
+    tree t. `split_clear[j, t]` has a bit set for every leaf of tree t that
+    is out of reach when that split's test fails. A row ends up in the
+    lowest leaf left after clearing the bits of all its failed tests. So
+    the whole ensemble is evaluated with one pass per slot over a (trees x
+    rows) array, with no pointer chasing.
+    """
+
+    def __init__(self, source: str, base: float, tables: List[np.ndarray], split_feature: np.ndarray,
+                 split_code: np.ndarray, split_clear: np.ndarray, split_missing_left: np.ndarray,
+                 leaf_value: np.ndarray, fill: Optional[np.ndarray] = None, imputer: Any = None):
+        # "sklearn" splits go left on x <= t, "xgboost" splits on x < t
+        self.source = source
+        self.side = "left" if source == "sklearn" else "right"
+        self.base = base
+        self.tables = tables
+        self.split_feature = split_feature
+        self.split_code = split_code
+        self.split_clear = split_clear
+        self.split_missing_left = split_missing_left
+        self.leaf_value = leaf_value
+        self.leaf_offset = (np.arange(leaf_value.shape[0]) * leaf_value.shape[1])[:, None]
+        self.fill = fill
+        self.imputer = imputer
+
+    @property
+    def n_trees(self) -> int:
+        return self.leaf_value.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.split_feature, self.split_code, self.split_clear, self.split_missing_left, self.leaf_value,
+                  *self.tables]
+        return int(sum(a.nbytes for a in arrays))
+
+    def bin(self, X: np.ndarray) -> np.ndarray:
+        """Code of every input: how many of its column's thresholds it passes."""
+        # Both libraries compare float32 inputs; sklearn against float64 thresholds, which the cast keeps exact
+        inputs = X.astype(np.float32)
+        codes = np.empty(X.shape, dtype=self.split_code.dtype)
+        for j, table in enumerate(self.tables):
+            codes[:, j] = np.searchsorted(table, inputs[:, j], side=self.side)
+        return codes
+
+    def _exit_leaves(self, codes: np.ndarray, missing: Optional[np.ndarray]) -> np.ndarray:
+        """Exit leaf of every (tree, row), from codes laid out (features, rows)."""
+        cleared = np.zeros((self.n_trees, codes.shape[1]), dtype=self.split_clear.dtype)
+        failed = np.empty(cleared.shape, dtype=bool)
+        for feature, code, clear, missing_left in zip(
+            self.split_feature, self.split_code, self.split_clear, self.split_missing_left
+        ):
+            # Input code k has passed k thresholds, so the test on the k-th one fails exactly when code > k
+            np.greater(codes[feature], code[:, None], out=failed)
+            if missing is not None:
+                failed = np.where(missing[feature], ~missing_left[:, None], failed)
+            cleared |= failed * clear[:, None]
+        remaining = ~cleared
+        if remaining.dtype == np.uint8:
+            return LOWEST_BIT[remaining]
+        # frexp of the isolated lowest bit (a power of two) gives its position + 1
+        return np.frexp((remaining & (~remaining + 1)).astype(np.float64))[1] - 1
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self.fill is not None:
+            X = np.where(np.isnan(X), self.fill, X)
+        elif self.imputer is not None:
+            X = self.imputer.transform(X)
+        predictions = np.full(X.shape[0], self.base)
+        if not self.n_trees:
+            return predictions
+        codes = np.ascontiguousarray(self.bin(X).T)
+        missing = np.isnan(X).T if np.isnan(X).any() else None
+        values = self.leaf_value.reshape(-1)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            rows = slice(start, start + CHUNK_ROWS)
+            leaves = self._exit_leaves(codes[:, rows], missing[:, rows] if missing is not None else None)
+            predictions[rows] += np.take(values, leaves + self.leaf_offset).sum(axis=0, dtype=np.float64)
+        return predictions
+
+
+def _leaves_and_splits(tree: Dict[str, np.ndarray], node: int = 0,
+                       leaves: Optional[List[int]] = None, splits: Optional[List[tuple]] = None):
+    """Leaves of a tree from left to right, and each split with the positions of the leaves under its left child."""
+    leaves = [] if leaves is None else leaves
+    splits = [] if splits is None else splits
+    if tree["left"][node] < 0:
+        leaves.append(node)
+        return leaves, splits
+    first = len(leaves)
+    _leaves_and_splits(tree, tree["left"][node], leaves, splits)
+    splits.append((node, range(first, len(leaves))))
+    _leaves_and_splits(tree, tree["right"][node], leaves, splits)
+    return leaves, splits
+
+
+def _sklearn_trees(model) -> List[Dict[str, np.ndarray]]:
+    trees = []
+    for estimator in np.ravel(model.estimators_[:model.n_estimators_]):
+        tree = estimator.tree_
+        trees.append({
+            "left": tree.children_left, "right": tree.children_right, "feature": tree.feature,
+            "threshold": tree.threshold,
+            "missing_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)),
+            "value": tree.value[:, 0, 0] * model.learning_rate
+        })
+    return trees
+
+
+def _xgboost_trees(booster: xgb.Booster, rounds: Optional[int]) -> List[Dict[str, np.ndarray]]:
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree" or int(learner["learner_model_param"]["num_target"]) > 1:
+        raise TypeError(f"Only single-target gbtree XGBoost models can be quantized, not {gbm['name']}")
+    trees = []
+    for tree in gbm["model"]["trees"][:rounds]:
+        if any(tree["split_type"]):
+            raise TypeError("Categorical XGBoost splits cannot be quantized")
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        trees.append({
+            "left": left, "right": np.asarray(tree["right_children"], dtype=np.int64),
+            "feature": np.asarray(tree["split_indices"], dtype=np.int64), "threshold": conditions,
+            "missing_left": np.asarray(tree["default_left"], dtype=np.uint8),
+            # A leaf keeps its value where a split keeps its threshold
+            "value": np.where(left < 0, conditions, 0)
+        })
+    return trees
+
+
+def _imputer_fill(imputer) -> Optional[np.ndarray]:
+    """A SimpleImputer's fill values, if transform only replaces NaNs with them."""
+    if type(imputer).__name__ != "SimpleImputer" or imputer.add_indicator:
+        return None
+    missing = imputer.missing_values
+    statistics = np.asarray(imputer.statistics_, dtype=np.float64)
+    # All-NaN columns are dropped by transform, which a fill cannot reproduce
+    if not (isinstance(missing, float) and np.isnan(missing)) or np.isnan(statistics).any():
+        return None
+    return statistics
+
+
+def quantize(model: Any, imputer: Any = None) -> QuantizedEnsemble:
+    """Flatten a GradientBoostingRegressor or XGBoost regressor; raises TypeError for other models."""
+    if isinstance(model, (xgb.Booster, xgb.XGBModel)):
+        booster = model if isinstance(model, xgb.Booster) else model.get_booster()
+        try:
+            # XGBRegressor.predict stops at the early-stopping round
+            rounds = model.best_iteration + 1 if isinstance(model, xgb.XGBModel) else None
+        except AttributeError:
+            rounds = None
+        source, trees = "xgboost", _xgboost_trees(booster, rounds)
+        config = json.loads(booster.save_config())["learner"]["learner_model_param"]
+        base = float(config["base_score"].strip("[]"))
+        n_features = booster.num_features()
+    elif type(model).__name__ == "GradientBoostingRegressor":
+        source, trees = "sklearn", _sklearn_trees(model)
+        n_features = model.n_features_in_
+        base = 0.0 if model.init_ == "zero" else float(np.ravel(model.init_.predict(np.zeros((1, n_features))))[0])
+    else:
+        raise TypeError(f"{type(model).__name__} is not a boosted tree ensemble")
+
+    split_dtype = np.float64 if source == "sklearn" else np.float32
+    tables = []
+    for j in range(n_features):
+        thresholds = [t["threshold"][(t["left"] >= 0) & (t["feature"] == j)] for t in trees]
+        tables.append(np.unique(np.concatenate(thresholds).astype(split_dtype)))
+    largest = max(len(table) for table in tables)
+    code_dtype = np.uint8 if largest < 2 ** 8 else np.uint16 if largest < 2 ** 16 else np.uint32
+
+    walked = []
+    for tree in trees:
+        leaves, splits = _leaves_and_splits(tree)
+        if splits:
+            walked.append((tree, leaves, splits))
+        else:
+            # A tree without splits adds the same value to every prediction
+            base += float(np.float32(tree["value"][leaves[0]]))
+    most_leaves = max((len(leaves) for _, leaves, _ in walked), default=1)
+    mask_dtype = next((dtype for bits, dtype in MASK_DTYPES if most_leaves <= bits), None)
+    if mask_dtype is None:
+        raise TypeError(f"Trees with more than 64 leaves cannot be quantized ({most_leaves})")
+
+    # Trees with fewer splits than the most get padded slots that clear nothing
+    slots = max((len(splits) for _, _, splits in walked), default=0)
+    shape = (slots, len(walked))
+    split_feature = np.zeros(shape, dtype=np.uint8 if n_features < 2 ** 8 else np.uint16)
+    split_code = np.zeros(shape, dtype=code_dtype)
+    split_clear = np.zeros(shape, dtype=mask_dtype)
+    split_missing_left = np.zeros(shape, dtype=bool)
+    leaf_value = np.zeros((len(walked), most_leaves), dtype=np.float32)
+    for t, (tree, leaves, splits) in enumerate(walked):
+        leaf_value[t, :len(leaves)] = tree["value"][leaves]
+        for j, (node, left_leaves) in enumerate(splits):
+            feature = tree["feature"][node]
+            split_feature[j, t] = feature
+            split_code[j, t] = np.searchsorted(tables[feature], split_dtype(tree["threshold"][node]))
+            split_clear[j, t] = sum(1 << i for i in left_leaves)
+            split_missing_left[j, t] = tree["missing_left"][node]
+
+    fill = _imputer_fill(imputer) if imputer is not None else None
+    return QuantizedEnsemble(
+        source=source,
+        base=base,
+        tables=tables,
+        split_feature=split_feature,
+        split_code=split_code,
+        split_clear=split_clear,
+        split_missing_left=split_missing_left,
+        leaf_value=leaf_value,
+        fill=fill,
+        imputer=imputer if fill is None else None
+    )
+
+
+def quantize_artifact(artifact: Dict[str, Any]) -> Dict[str, Any]:
+    """The artifact with its model replaced by the quantized form (which applies the imputer itself)."""
+    return {**artifact, "model": quantize(artifact["model"], artifact.get("imputer")), "imputer": None,
+            "quantized": True}
+
+
+def sample_features(race: str, rows: int, seed: int = 39) -> np.ndarray:
+    """Inputs spread over everything /predict accepts for the race."""
+    rng = np.random.default_rng(seed)
+    low, high = RACE_RANGES[race]
+    qualifying = rng.uniform(low, high, rows)
+    pace = np.minimum(qualifying * rng.uniform(1.0, 1.1, rows), high)
+    return build_features(race, qualifying, pace, rng.uniform(0, 1, rows), rng.uniform(0, 100, rows),
+                          rng.uniform(-10, 70, rows))
+
+
+def _median_seconds(fn, rounds: int) -> float:
+    timings = np.empty(rounds)
+    for i in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings))
+
+
+def equivalence_report(race: str, artifact: Dict[str, Any], rows: int = REPORT_ROWS) -> Dict[str, Any]:
+    """Deviation, memory and throughput of the quantized model against the original."""
+    quantized = quantize_artifact(artifact)
+    features = sample_features(race, rows)
+    single = features[:1]
+    report: Dict[str, Any] = {"race": race, "rows": rows, "trees": quantized["model"].n_trees}
+    predictions = {}
+    for name, served in (("original", artifact), ("quantized", quantized)):
+        model, imputer = served["model"], served.get("imputer")
+        predictions[name] = run_model(race, model, imputer, features)[0]
+        single_s = _median_seconds(lambda: run_model(race, model, imputer, single), SINGLE_ROUNDS)
+        batch_s = _median_seconds(lambda: run_model(race, model, imputer, features), BATCH_ROUNDS)
+        report[name] = {
+            "pickled_bytes": len(pickle.dumps((model, imputer))),
+            "single_row_us": single_s * 1e6,
+            "batch_rows_per_second": rows / batch_s
+        }
+    report["quantized"]["array_bytes"] = quantized["model"].nbytes
+    deviation = np.abs(predictions["quantized"] - predictions["original"])
+    report["max_abs_deviation_s"] = float(deviation.max())
+    report["mean_abs_deviation_s"] = float(deviation.mean())
+    return report
+
+
+def main():
+    from main import MODELS_DIR, latest_artifacts, load_model_artifact
+
+    parser = argparse.ArgumentParser(description="Compare the quantized race models with the originals")
+    parser.add_argument("races", nargs="*", help="Races to report (default: every served race)")
+    parser.add_argument("--rows", type=int, default=REPORT_ROWS, help="Sampled request rows per race")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = []
+    for race, filename in sorted(latest_artifacts(MODELS_DIR).items()):
+        if args.races and race not in args.races:
+            continue
+        artifact = load_model_artifact(os.path.join(MODELS_DIR, filename))
+        if artifact is None:
+            continue
+        try:
+            reports.append({"artifact": filename, **equivalence_report(race, artifact, args.rows)})
+        except TypeError as e:
+            print(f"{race}: {e}")
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+    print(f"{'race':<10}{'max dev (s)':>12}{'size (KB)':>16}{'1 row (us)':>16}{'rows/s':>22}")
+    for r in reports:
+        original, quantized = r["original"], r["quantized"]
+        print(f"{r['race']:<10}{r['max_abs_deviation_s']:>12.2e}"
+              f"{original['pickled_bytes'] / 1024:>8.0f} -> {quantized['pickled_bytes'] / 1024:<5.0f}"
+              f"{original['single_row_us']:>8.0f} -> {quantized['single_row_us']:<5.0f}"
+              f"{original['batch_rows_per_second']:>11.0f} -> {quantized['batch_rows_per_second']:<9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import json
+import numpy as np
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json fallback below
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    # Only reached by the stdlib fallback; orjson handles NumPy natively
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            return [None if v != v else v for v in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        return None if isinstance(value, float) and value != value else value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content (NumPy arrays and scalars included) to JSON bytes; NaN becomes null."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for the prediction routes.
+
+    Returning it from a route skips FastAPI's `jsonable_encoder` walk, and
+    NumPy arrays are written directly instead of being converted to Python
+    lists first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
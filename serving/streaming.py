@@ -0,0 +1,178 @@
+import json
+import numpy as np
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from serving.batch import NUMERIC_COLUMNS, OPTIONAL_COLUMNS
+from serving.inference import resolve_race
+from serving.responses import dumps
+
+NDJSON_MIME = "application/x-ndjson"
+
+# Longest accepted input line; a row is ~150 bytes so this only trips on garbage
+MAX_LINE_BYTES = 64 * 1024
+
+PredictColumns = Callable[[str, np.ndarray, Dict[str, np.ndarray]], Awaitable[Dict[str, Any]]]
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse for generators that are still reading the request body.
+
+    The stock class (on ASGI spec < 2.4) runs a disconnect listener that
+    consumes `receive` alongside the response, stealing the body chunks the
+    generator is waiting for. Here only the response is streamed; a client
+    disconnect surfaces through `request.stream()` instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class _RaceBuffer:
+    """Rows for one race waiting to be predicted together."""
+
+    def __init__(self):
+        self.lines: List[int] = []
+        self.ids: List[Any] = []
+        self.driver_codes: List[str] = []
+        self.values: Dict[str, List[float]] = {name: [] for name in NUMERIC_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def add(self, line_no: int, row: Dict[str, Any]) -> None:
+        self.lines.append(line_no)
+        self.ids.append(row.get("id"))
+        self.driver_codes.append(str(row["driver_code"]))
+        for name in NUMERIC_COLUMNS:
+            # An omitted optional field is NaN, which the batch checks fill from the pace store
+            self.values[name].append(_as_float(row[name]) if row.get(name) is not None else float("nan"))
+
+
+def _as_float(value: Any) -> float:
+    # Anything non-numeric becomes NaN and is reported by the range checks
+    if isinstance(value, bool):
+        return float("nan")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return dumps(payload) + b"\n"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into (line_no, line) pairs, holding at most one partial line.
+
+    Oversized lines are yielded as (line_no, None) and skipped.
+    """
+    pending = b""
+    line_no = 0
+    oversized = False
+    async for chunk in chunks:
+        parts = (pending + chunk).split(b"\n")
+        pending = parts.pop()
+        for line in parts:
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+        if len(pending) > MAX_LINE_BYTES:
+            # Drop the partial line now so memory stays bounded; report it once it ends
+            pending = b""
+            oversized = True
+    line_no += 1
+    if oversized:
+        yield line_no, None
+    elif pending.strip():
+        yield line_no, pending
+
+
+async def _flush(race: str, buffer: _RaceBuffer, predict_columns: PredictColumns) -> bytes:
+    driver_codes = np.asarray(buffer.driver_codes, dtype=str)
+    columns = {name: np.asarray(values, dtype=np.float64) for name, values in buffer.values.items()}
+    try:
+        result = await predict_columns(race, driver_codes, columns)
+    except Exception as e:
+        # A failed chunk (model missing, server at capacity) fails only its rows
+        message = getattr(e, "detail", None) or getattr(e, "reason", None) or str(e)
+        return b"".join(
+            _line({"line": n, "id": row_id, "race": race, "driver": code.upper(), "predicted_pace": None, "error": message})
+            for n, row_id, code in zip(buffer.lines, buffer.ids, buffer.driver_codes)
+        )
+
+    out = []
+    for i, (n, row_id) in enumerate(zip(buffer.lines, buffer.ids)):
+        ok = bool(result["valid"][i])
+        out.append(_line({
+            "line": n,
+            "id": row_id,
+            "race": race,
+            "driver": result["drivers"][i],
+            "predicted_pace": float(result["predicted_pace"][i]) if ok else None,
+            "error": result["errors"][i],
+        }))
+    return b"".join(out)
+
+
+async def stream_predictions(
+    chunks: AsyncIterator[bytes],
+    predict_columns: PredictColumns,
+    chunk_rows: int,
+) -> AsyncIterator[bytes]:
+    """Turn an NDJSON stream of /predict rows into an NDJSON stream of results.
+
+    Rows are buffered per race and predicted `chunk_rows` at a time, so at most
+    `chunk_rows` rows per race are in memory whatever the input size. Results
+    come back grouped by chunk rather than in input order; each carries the
+    1-based input `line` and the row's optional `id`.
+    """
+    buffers: Dict[str, _RaceBuffer] = {}
+    race_cache: Dict[str, str] = {}
+
+    async for line_no, line in iter_lines(chunks):
+        if line is None:
+            yield _line({"line": line_no, "predicted_pace": None, "error": f"Line exceeds {MAX_LINE_BYTES} bytes"})
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Each line must be a JSON object")
+            missing = [k for k in ["race_name", "driver_code"] + NUMERIC_COLUMNS if k not in row and k not in OPTIONAL_COLUMNS]
+            if missing:
+                raise ValueError(f"Missing field(s): {', '.join(missing)}")
+            # A present but non-numeric optional field must not be mistaken for an omitted one
+            for name in OPTIONAL_COLUMNS:
+                if row.get(name) is not None and np.isnan(_as_float(row[name])):
+                    raise ValueError(f"{name}: Input should be a valid number")
+            raw_race = str(row["race_name"])
+            race = race_cache.get(raw_race)
+            if race is None:
+                race = resolve_race(raw_race)
+                if len(race_cache) < 256:
+                    race_cache[raw_race] = race
+        except ValueError as e:
+            yield _line({"line": line_no, "predicted_pace": None, "error": str(e)})
+            continue
+
+        buffer = buffers.setdefault(race, _RaceBuffer())
+        buffer.add(line_no, row)
+        if len(buffer) >= chunk_rows:
+            yield await _flush(race, buffer, predict_columns)
+            buffers[race] = _RaceBuffer()
+
+    for race, buffer in buffers.items():
+        if len(buffer):
+            yield await _flush(race, buffer, predict_columns)
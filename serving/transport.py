@@ -0,0 +1,226 @@
+import numpy as np
+from typing import Any, Dict, Optional
+
+from serving.batch import NUMERIC_COLUMNS, OPTIONAL_COLUMNS
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: only needed for Arrow IPC clients
+    pa = None
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for msgpack clients
+    msgpack = None
+
+JSON_MIME = "application/json"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+MSGPACK_MIME = "application/msgpack"
+MSGPACK_MIMES = (MSGPACK_MIME, "application/x-msgpack")
+
+
+class TransportError(Exception):
+    """Raised when a binary body cannot be decoded or a format is unavailable."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";")[0].strip().lower()
+
+
+def request_format(content_type: Optional[str]) -> str:
+    """Classify a Content-Type header as 'json', 'arrow' or 'msgpack'.
+
+    A missing header is treated as JSON; any other unknown type is a 415.
+    """
+    media = _media_type(content_type)
+    if media == ARROW_MIME:
+        return "arrow"
+    if media in MSGPACK_MIMES:
+        return "msgpack"
+    if not media or media == JSON_MIME or media.endswith("+json"):
+        return "json"
+    raise TransportError(415, f"Unsupported Content-Type '{media}'. Use {JSON_MIME}, {ARROW_MIME} or {MSGPACK_MIME}")
+
+
+def _quality(part: str) -> float:
+    for param in part.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def response_format(accept: Optional[str]) -> str:
+    """Pick the response encoding from an Accept header, honouring q-values.
+
+    JSON is used when nothing binary is preferred (including no header, */*
+    and types we cannot produce).
+    """
+    best, best_q = "json", 0.0
+    for part in (accept or "").split(","):
+        media = _media_type(part)
+        if media == ARROW_MIME:
+            fmt = "arrow"
+        elif media in MSGPACK_MIMES:
+            fmt = "msgpack"
+        elif media in (JSON_MIME, "application/*", "*/*"):
+            fmt = "json"
+        else:
+            continue
+        q = _quality(part)
+        # q=0 means "not acceptable"; earlier entries win ties
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def _one_dimensional(name: str, values: np.ndarray) -> np.ndarray:
+    if values.ndim != 1:
+        raise TransportError(422, f"Column '{name}' must be a one-dimensional array")
+    return values
+
+
+def _require(module: Any, name: str, status_code: int) -> None:
+    if module is None:
+        raise TransportError(status_code, f"{name} support is not installed on this server")
+
+
+def _float_column(values: Any, name: str) -> np.ndarray:
+    # bytes are raw little-endian float64 buffers: view them without copying
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        if len(values) % 8:
+            raise TransportError(422, f"Column '{name}' is not a float64 buffer")
+        return np.frombuffer(values, dtype="<f8")
+    try:
+        return _one_dimensional(name, np.asarray(values, dtype=np.float64))
+    except (TypeError, ValueError):
+        raise TransportError(422, f"Column '{name}' must contain only numbers")
+
+
+def decode_arrow(body: bytes) -> Dict[str, Any]:
+    """Decode an Arrow IPC stream into the batch columns.
+
+    The race goes in the schema metadata under `race_name` (or a `race_name`
+    column). float64 columns without nulls are handed to NumPy zero-copy.
+    """
+    _require(pa, "Arrow IPC", 415)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all().combine_chunks()
+    except pa.ArrowInvalid as e:
+        raise TransportError(422, f"Invalid Arrow IPC stream: {e}")
+
+    metadata = table.schema.metadata or {}
+    race_name = metadata.get(b"race_name", b"").decode()
+    if not race_name and "race_name" in table.column_names and table.num_rows:
+        race_name = str(table.column("race_name")[0].as_py())
+
+    missing = [c for c in ["driver_code"] + NUMERIC_COLUMNS if c not in table.column_names + OPTIONAL_COLUMNS]
+    if missing:
+        raise TransportError(422, f"Missing columns: {', '.join(missing)}")
+
+    columns = {}
+    for name in NUMERIC_COLUMNS:
+        if name not in table.column_names:
+            columns[name] = np.full(table.num_rows, np.nan)
+            continue
+        chunk = table.column(name).chunk(0) if table.num_rows else pa.array([], pa.float64())
+        if chunk.type != pa.float64():
+            try:
+                chunk = chunk.cast(pa.float64())
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise TransportError(422, f"Column '{name}' must be numeric: {e}")
+        # Nulls become NaN so they fail the range checks like any bad value
+        # (or, in an optional column, count as omitted)
+        columns[name] = chunk.to_numpy(zero_copy_only=chunk.null_count == 0, writable=False)
+    driver_codes = _one_dimensional("driver_code", np.asarray(table.column("driver_code").to_pylist(), dtype=str))
+    return {"race_name": race_name, "driver_code": driver_codes, "columns": columns}
+
+
+def decode_msgpack(body: bytes) -> Dict[str, Any]:
+    """Decode a msgpack map into the batch columns.
+
+    Numeric columns may be arrays of numbers or raw float64 (little-endian)
+    bytes; the latter are mapped into NumPy without copying.
+    """
+    _require(msgpack, "msgpack", 415)
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise TransportError(422, f"Invalid msgpack body: {e}")
+    if not isinstance(payload, dict):
+        raise TransportError(422, "msgpack body must be a map of columns")
+
+    missing = [c for c in ["race_name", "driver_code"] + NUMERIC_COLUMNS if c not in payload and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise TransportError(422, f"Missing columns: {', '.join(missing)}")
+
+    driver_codes = _one_dimensional("driver_code", np.asarray(payload["driver_code"], dtype=str))
+    columns = {
+        name: _float_column(payload[name], name) if payload.get(name) is not None else np.full(len(driver_codes), np.nan)
+        for name in NUMERIC_COLUMNS
+    }
+    return {"race_name": str(payload["race_name"]), "driver_code": driver_codes, "columns": columns}
+
+
+def decode_batch(body: bytes, fmt: str) -> Dict[str, Any]:
+    if fmt == "arrow":
+        return decode_arrow(body)
+    return decode_msgpack(body)
+
+
+def encode_arrow(result: Dict[str, Any]) -> bytes:
+    """Encode a batch result as a single-batch Arrow IPC stream."""
+    _require(pa, "Arrow IPC", 406)
+    valid = result["valid"]
+    table = pa.table(
+        {
+            "driver_code": pa.array(result["drivers"], pa.string()),
+            "predicted_pace": pa.array(result["predicted_pace"], pa.float64(), mask=~valid),
+            "valid": pa.array(valid, pa.bool_()),
+            "error": pa.array(result["errors"], pa.string()),
+        },
+        metadata={
+            "race": result["race"],
+            "model": result["meta"]["model"],
+            "latency": result["meta"]["latency"],
+        },
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(result: Dict[str, Any]) -> bytes:
+    """Encode a batch result as msgpack; `predicted_pace` is a raw float64 buffer (NaN for invalid rows)."""
+    _require(msgpack, "msgpack", 406)
+    predictions = np.ascontiguousarray(result["predicted_pace"], dtype="<f8")
+    return msgpack.packb(
+        {
+            "race": result["race"],
+            "driver_code": result["drivers"],
+            "predicted_pace": predictions.tobytes(),
+            "valid": result["valid"].tolist(),
+            "errors": result["errors"],
+            "meta": result["meta"],
+        },
+        use_bin_type=True,
+    )
+
+
+def encode_batch(result: Dict[str, Any], fmt: str) -> bytes:
+    if fmt == "arrow":
+        return encode_arrow(result)
+    return encode_msgpack(result)
+
+
+def media_type_for(fmt: str) -> str:
+    return {"arrow": ARROW_MIME, "msgpack": MSGPACK_MIME}.get(fmt, JSON_MIME)
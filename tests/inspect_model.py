@@ -1,15 +1,227 @@
-import joblib
+import os
+import re
+import gc
 import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+import joblib
+import xgboost as xgb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import get_artifact_version, get_race_key_from_filename
+from serving.inference import RACE_RANGES, build_features, model_info_for, run_model
+
+# Profiles the model artifacts in models/ and prints one JSON report, so the
+# footprint can be tracked across model versions. Per artifact it reports:
+# load time, deserialized size and RSS growth, tree count and depth, the
+# imputer and feature order, and single-row and batched predict latency
+# percentiles through serving.inference.run_model (the API's path).
+# Run from the repo root:
+#   python tests/inspect_model.py > footprint.json
+#   python tests/inspect_model.py models/us_model.v2.joblib --batch-rows 5000
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+SINGLE_ROUNDS = 500
+BATCH_ROUNDS = 30
+BATCH_ROWS = 1000
+PERCENTILES = (50, 90, 99)
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        scale = 1 if platform.system() == "Darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def object_size(obj, seen=None):
+    """Approximate in-memory size: Python objects, NumPy buffers and XGBoost's native model."""
+    # Keeps every visited object alive: __getstate__ builds temporaries whose ids would otherwise be reused
+    seen = {} if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, np.ndarray):
+        # Views of another array share its buffer; sklearn's tree arrays wrap the Tree's own memory
+        size = sys.getsizeof(obj) + (0 if isinstance(obj.base, np.ndarray) else obj.nbytes)
+        if obj.dtype == object:
+            # e.g. GradientBoostingRegressor.estimators_ holds the trees themselves
+            size += sum(object_size(item, seen) for item in obj.flat)
+        return size
+    if isinstance(obj, xgb.Booster):
+        # The trees live in C++; the raw model buffer is the closest measure of them
+        return len(obj.save_raw("ubj"))
+    if isinstance(obj, xgb.XGBModel):
+        return sys.getsizeof(obj) + object_size(obj.get_booster(), seen)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(object_size(k, seen) + object_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(object_size(item, seen) for item in obj)
+    if hasattr(obj, "__getstate__") and type(obj).__module__.startswith("sklearn.tree"):
+        # sklearn's Cython Tree keeps its nodes outside __dict__; its state holds them as arrays
+        return size + object_size(obj.__getstate__(), seen)
+    if hasattr(obj, "__dict__"):
+        return size + object_size(vars(obj), seen)
+    return size
 
-path = sys.argv[1]
-try:
-    artifact = joblib.load(path)
-    print(f"Type: {type(artifact)}")
-    if isinstance(artifact, dict):
-        print(f"Keys: {artifact.keys()}")
-        if "imputer" in artifact:
-            print(f"Imputer exists: {artifact['imputer'] is not None}")
+
+def _depths(node, depth=0):
+    if "children" not in node:
+        return [depth]
+    return [d for child in node["children"] for d in _depths(child, depth + 1)]
+
+
+def tree_stats(model):
+    """Tree count and depth / leaf statistics of a boosted ensemble, or None for other models."""
+    if isinstance(model, (xgb.Booster, xgb.XGBModel)):
+        booster = model if isinstance(model, xgb.Booster) else model.get_booster()
+        depths, leaves = [], []
+        for tree in booster.get_dump(dump_format="json"):
+            leaf_depths = _depths(json.loads(tree))
+            depths.append(max(leaf_depths))
+            leaves.append(len(leaf_depths))
+    elif hasattr(model, "estimators_") and hasattr(np.ravel(model.estimators_)[0], "tree_"):
+        trees = [estimator.tree_ for estimator in np.ravel(model.estimators_)]
+        depths = [tree.max_depth for tree in trees]
+        leaves = [tree.n_leaves for tree in trees]
     else:
-        print(f"No dict, object type: {type(artifact)}")
-except Exception as e:
-    print(f"Error: {e}")
+        return None
+    return {
+        "trees": len(depths),
+        "depth_min": int(min(depths)),
+        "depth_mean": float(np.mean(depths)),
+        "depth_max": int(max(depths)),
+        "leaves_total": int(sum(leaves)),
+        "leaves_mean": float(np.mean(leaves))
+    }
+
+
+def feature_order(artifact):
+    if artifact.get("features") is not None:
+        return list(artifact["features"])
+    model = artifact["model"]
+    if getattr(model, "feature_names_in_", None) is not None:
+        return list(model.feature_names_in_)
+    booster = model if isinstance(model, xgb.Booster) else getattr(model, "get_booster", lambda: None)()
+    return list(booster.feature_names) if booster is not None and booster.feature_names else None
+
+
+def sample_features(race, rows, seed=39):
+    """Plausible request inputs spread over the race's lap time window."""
+    rng = np.random.default_rng(seed)
+    low, high = RACE_RANGES[race]
+    qualifying = rng.uniform(low, low + (high - low) * 0.4, rows)
+    return build_features(
+        race, qualifying, qualifying * rng.uniform(1.03, 1.08, rows), rng.uniform(0, 1, rows),
+        rng.uniform(0, 100, rows), rng.uniform(15, 45, rows)
+    )
+
+
+def percentiles_us(timings):
+    return {f"p{p}": float(np.percentile(timings, p) * 1e6) for p in PERCENTILES}
+
+
+def latency(race, artifact, single_rounds, batch_rounds, batch_rows):
+    model, imputer = artifact["model"], artifact.get("imputer")
+    single = sample_features(race, 1)
+    batch = sample_features(race, batch_rows)
+    # Warm up lazy initialization (XGBoost's predictor, sklearn's input checks)
+    run_model(race, model, imputer, single)
+    run_model(race, model, imputer, batch)
+
+    single_timings = np.empty(single_rounds)
+    for i in range(single_rounds):
+        start = time.perf_counter()
+        run_model(race, model, imputer, single)
+        single_timings[i] = time.perf_counter() - start
+    batch_timings = np.empty(batch_rounds)
+    for i in range(batch_rounds):
+        start = time.perf_counter()
+        run_model(race, model, imputer, batch)
+        batch_timings[i] = time.perf_counter() - start
+    return {
+        "single_row_us": percentiles_us(single_timings),
+        "batch_rows": batch_rows,
+        "batch_us": percentiles_us(batch_timings),
+        "batch_per_row_us": float(np.median(batch_timings) / batch_rows * 1e6)
+    }
+
+
+def inspect(path, single_rounds, batch_rounds, batch_rows):
+    filename = os.path.basename(path)
+    report = {"file": filename, "file_bytes": os.path.getsize(path)}
+    if not filename.endswith(".joblib"):
+        report["skipped"] = "not served by the API"
+        return report
+    report["race"] = get_race_key_from_filename(filename)
+    report["version"] = get_artifact_version(filename)
+    report["student"] = filename.endswith(".student.joblib")
+
+    gc.collect()
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    try:
+        artifact = joblib.load(path)
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        return report
+    report["load_ms"] = (time.perf_counter() - start) * 1000
+    report["rss_delta_bytes"] = rss_bytes() - rss_before
+    if not (isinstance(artifact, dict) and "model" in artifact):
+        # Older artifacts are the bare model, as main.load_model_artifact handles
+        artifact = {"model": artifact, "imputer": None}
+
+    model = artifact["model"]
+    report["object_bytes"] = object_size(artifact)
+    report["model_type"] = f"{type(model).__module__}.{type(model).__name__}"
+    report["model_info"] = model_info_for(report["race"], model)
+    report["imputer"] = type(artifact["imputer"]).__name__ if artifact.get("imputer") is not None else None
+    report["features"] = feature_order(artifact)
+    report["trees"] = tree_stats(model)
+    if report["race"] in RACE_RANGES:
+        report["latency"] = latency(report["race"], artifact, single_rounds, batch_rounds, batch_rows)
+    return report
+
+
+def artifact_paths(models_dir):
+    return sorted(
+        os.path.join(models_dir, f) for f in os.listdir(models_dir)
+        if re.search(r"\.(joblib|keras)$", f)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile model artifacts; prints a JSON report")
+    parser.add_argument("paths", nargs="*", help="Artifacts to profile (default: every artifact in models/)")
+    parser.add_argument("--single-rounds", type=int, default=SINGLE_ROUNDS)
+    parser.add_argument("--batch-rounds", type=int, default=BATCH_ROUNDS)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--output", help="Write the report to this file instead of stdout")
+    args = parser.parse_args()
+
+    paths = args.paths or artifact_paths(MODELS_DIR)
+    result = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "xgboost": xgb.__version__,
+        "artifacts": [inspect(p, args.single_rounds, args.batch_rounds, args.batch_rows) for p in paths]
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import json
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from seasons.store import DATASETS_DIR, load
+
+# Compares json.load of datasets/<year>.json with opening the columnar store
+# and reading a few columns, for time and Python-heap memory. Run from the
+# repo root after `python -m seasons.store datasets/*.json`:
+#     python tests/season_store_bench.py
+
+ROUNDS = 200
+COLUMNS = ["Driver", "Q_Time", "FinishPos", "Points"]
+
+def with_json(year):
+    with open(os.path.join(DATASETS_DIR, f"{year}.json"), "r") as f:
+        records = json.load(f)
+    return [[r[c] for r in records] for c in COLUMNS]
+
+def with_store(year):
+    season = load(year)
+    return [season[c] for c in COLUMNS]
+
+def best_time(fn, year):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(year)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e3
+
+def peak_memory(fn, year):
+    tracemalloc.start()
+    result = fn(year)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1024
+
+if __name__ == "__main__":
+    for year in (2024, 2025):
+        print(f"{year}: {len(load(year))} rows, columns {', '.join(COLUMNS)}")
+        for name, fn in [("json.load", with_json), ("columnar", with_store)]:
+            print(f"  {name:<10} {best_time(fn, year):8.3f} ms   peak heap {peak_memory(fn, year):8.1f} KB")
+        season = load(year)
+        start = time.perf_counter()
+        for _ in range(10000):
+            season["Q_Time"]
+        print(f"  column lookup on an open season: {(time.perf_counter() - start) / 10000 * 1e9:.0f} ns")
+        assert np.array_equal(season.values("Q_Time"), np.array([np.nan if v is None else v for v in with_json(year)[1]]), equal_nan=True)
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import json
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from main import app
+from serving.responses import FastJSONResponse, orjson
+
+# Compares the old response path (jsonable_encoder + JSONResponse on Python
+# lists) with FastJSONResponse on NumPy data, and shows what share of a full
+# request each one takes. Run from the repo root: python tests/serialization_bench.py
+
+SINGLE_ROUNDS = 20000
+BATCH_ROUNDS = 50
+BATCH_ROWS = 20000
+
+def single_payload():
+    return {
+        "race": "usa",
+        "driver": "VER",
+        "predicted_pace": np.float64(101.2345),
+        "meta": {"latency": "0.0012s", "model": "usa_v2"}
+    }
+
+def batch_payload(rows):
+    predictions = np.random.default_rng(39).uniform(85, 130, rows)
+    valid = np.ones(rows, dtype=bool)
+    valid[::50] = False
+    predictions[~valid] = np.nan
+    return {
+        "race": "usa",
+        "drivers": ["VER"] * rows,
+        "predicted_pace": predictions,
+        "valid": valid,
+        "errors": [None if ok else "Unknown driver code 'XXX'" for ok in valid],
+        "meta": {"rows": rows, "valid_rows": int(valid.sum()), "latency": "0.0100s", "model": "usa_v2"}
+    }
+
+def old_path(payload):
+    # What the routes did before: Python lists, then jsonable_encoder + JSONResponse
+    content = dict(payload)
+    if isinstance(content["predicted_pace"], np.ndarray):
+        content["predicted_pace"] = [float(p) if ok else None for p, ok in zip(content["predicted_pace"], content["valid"])]
+        content["valid"] = content["valid"].tolist()
+    else:
+        content["predicted_pace"] = float(content["predicted_pace"])
+    return JSONResponse(jsonable_encoder(content)).body
+
+def new_path(payload):
+    return FastJSONResponse(payload).body
+
+def per_call(fn, payload, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return (time.perf_counter() - start) / rounds
+
+def request_latency(client, path, rounds, **kwargs):
+    client.post(path, **kwargs)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.post(path, **kwargs)
+    return (time.perf_counter() - start) / rounds
+
+print("SERIALIZATION BENCHMARK STARTED")
+print("orjson available:", orjson is not None)
+
+single = single_payload()
+batch = batch_payload(BATCH_ROWS)
+assert json.loads(old_path(batch)) == json.loads(new_path(batch))
+
+single_old = per_call(old_path, single, SINGLE_ROUNDS)
+single_new = per_call(new_path, single, SINGLE_ROUNDS)
+batch_old = per_call(old_path, batch, BATCH_ROUNDS)
+batch_new = per_call(new_path, batch, BATCH_ROUNDS)
+
+with TestClient(app) as client:
+    single_request = request_latency(client, "/predict", 200, json={
+        "race_name": "usa", "driver_code": "VER", "qualifying_time": 94.5,
+        "clean_air_race_pace": 100.2, "rain_prob": 0.0, "temperature": 35.0
+    })
+    batch_request = request_latency(client, "/predict/batch", 5, json={
+        "race_name": "usa",
+        "driver_code": ["VER"] * BATCH_ROWS,
+        "qualifying_time": [94.5] * BATCH_ROWS,
+        "clean_air_race_pace": [100.2] * BATCH_ROWS,
+        "rain_prob": [0.0] * BATCH_ROWS,
+        "temperature": [35.0] * BATCH_ROWS
+    })
+
+# The measured request already uses the new path; the old one costs the difference more
+single_before = single_request - single_new + single_old
+batch_before = batch_request - batch_new + batch_old
+
+print("\n===== SERIALIZATION RESULTS =====")
+print(f"/predict serialize: before {single_old*1e6:.1f} us, after {single_new*1e6:.1f} us")
+print(f"/predict share of request: before {single_old/single_before:.1%}, after {single_new/single_request:.1%}")
+print(f"/predict/batch ({BATCH_ROWS} rows) serialize: before {batch_old*1e3:.2f} ms, after {batch_new*1e3:.2f} ms")
+print(f"/predict/batch share of request: before {batch_old/batch_before:.1%}, after {batch_new/batch_request:.1%}")
+print("=================================")
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import training.backtest as backtest
+from serving.inference import RACE_RANGES
+
+
+class QualifyingOrder:
+    """Predicts each row's qualifying time, so the predicted order is the grid."""
+
+    def predict(self, X):
+        return np.asarray(X)[:, 0]
+
+
+def test_score_matches_pandas_ranks():
+    rng = np.random.default_rng(5)
+    rounds = np.repeat([1, 2, 3], [8, 6, 2])
+    codes = rng.choice(["VER", "NOR", "LEC", "HAM"], len(rounds))
+    predicted, finish = rng.normal(size=len(rounds)), rng.permutation(len(rounds)).astype(float)
+    result = backtest.score(rounds, codes, predicted, finish)
+
+    df = pd.DataFrame({"round": rounds, "code": codes, "predicted": predicted, "finish": finish})
+    df["error"] = (df.groupby("round")["predicted"].rank(method="first")
+                   - df.groupby("round")["finish"].rank(method="first"))
+    assert result["mae"] == pytest.approx(df["error"].abs().mean())
+    spearman = df.groupby("round").apply(lambda g: g["predicted"].corr(g["finish"], method="spearman"))
+    assert result["rounds"]["1"]["spearman"] == pytest.approx(spearman[1])
+    assert result["rounds"]["3"]["spearman"] is None
+    assert result["spearman"] == pytest.approx(spearman[[1, 2]].mean())
+    by_driver = df.groupby("code")["error"]
+    for code, stats in result["drivers"].items():
+        assert stats["mae"] == pytest.approx(by_driver.apply(lambda e: e.abs().mean())[code])
+        assert stats["mean_error"] == pytest.approx(by_driver.mean()[code])
+
+
+def test_replay_season_uses_the_api_checks():
+    inputs = backtest.season_inputs(2025)
+    assert (np.diff(inputs["round"]) >= 0).all()
+    # Round 1 falls back to the previous season's final team scores
+    assert not np.isnan(inputs["team_score"][inputs["round"] == 1]).all()
+
+    result = backtest.replay_season("qatar", {"model": QualifyingOrder(), "imputer": None}, inputs)
+    low, high = RACE_RANGES["qatar"]
+    quali = inputs["qualifying_time"]
+    in_range = (quali >= low) & (quali * backtest.DEFAULT_PACE_RATIO <= high) & ~np.isnan(inputs["team_score"])
+    assert result["rows"] == len(quali)
+    assert result["valid_rows"] == int(in_range.sum())
+    # Ordering by qualifying time is a real (if imperfect) predictor of the result
+    assert 0 < result["spearman"] < 1
+
+
+def test_backtest_results_are_stored_per_version(tmp_path):
+    if not os.path.exists("models/qatar_model.joblib"):
+        pytest.skip("Qatar model not available")
+    results = backtest.backtest(["qatar"], [2025], jobs=1)
+    assert len(results) == 1 and "error" not in results[0]
+    record = backtest.summarize("qatar", results, backtest.DEFAULT_PACE_RATIO)
+    backtest.save_result(record, str(tmp_path))
+    stored = backtest.stored_results("qatar", str(tmp_path))
+    assert [r["version"] for r in stored] == [results[0]["version"]]
+    assert stored[0]["mae"] == pytest.approx(results[0]["mae"])
+
+
+def test_quantized_backtest_matches_the_original(tmp_path):
+    if not os.path.exists("models/qatar_model.joblib"):
+        pytest.skip("Qatar model not available")
+    original, quantized = (backtest.backtest(["qatar"], [2025], jobs=1, quantized=q)[0] for q in (False, True))
+    assert "error" not in quantized
+    assert quantized["max_abs_deviation_s"] < 1e-3
+    assert quantized["valid_rows"] == original["valid_rows"]
+    assert quantized["mae"] == pytest.approx(original["mae"])
+
+    for result, q in ((original, False), (quantized, True)):
+        backtest.save_result(backtest.summarize("qatar", [result], backtest.DEFAULT_PACE_RATIO, q), str(tmp_path))
+    stored = backtest.stored_results("qatar", str(tmp_path))
+    assert [r["quantized"] for r in stored] == [False, True]
+    assert sorted(os.listdir(tmp_path / "qatar")) == [f"v{original['version']}.json",
+                                                      f"v{original['version']}.quantized.json"]
@@ -0,0 +1,92 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+
+import features.clean_air as clean_air
+
+
+def race_laps(n_drivers=6, n_laps=25, seed=3):
+    """Laps of a small race: a two-car train behind the leader, pit stops and a safety-car lap."""
+    rng = np.random.default_rng(seed)
+    leader_laps = rng.normal(95.0, 0.2, n_laps)
+    rows = []
+    for position in range(n_drivers):
+        # Cars 1 and 2 follow the leader 0.6 s apart for the whole race; everyone else is 4 s apart
+        in_train = position < 3
+        session_time = 0.6 * position if in_train else 1.2 + 4.0 * (position - 2)
+        for lap in range(1, n_laps + 1):
+            base = leader_laps[lap - 1] if in_train else 95.0 + 0.3 * position + rng.normal(0, 0.2)
+            lap_time = base + (12.0 if lap == 15 else 0.0)
+            session_time += lap_time
+            rows.append({
+                "Driver": f"D{position:02d}",
+                "LapTime (s)": lap_time if lap != 7 else np.nan,
+                "LapNumber": float(lap),
+                "Time (s)": session_time,
+                "InLap": lap == 12 + position % 3,
+                "OutLap": lap == 13 + position % 3
+            })
+    return pd.DataFrame(rows)
+
+
+def pandas_pace(laps, gap_threshold):
+    ordered = laps.sort_values(["LapNumber", "Time (s)"])
+    gap = ordered.groupby("LapNumber")["Time (s)"].diff().fillna(np.inf)
+    clean = ordered[(gap >= gap_threshold) & ~ordered["InLap"] & ~ordered["OutLap"]
+                    & (ordered["LapNumber"] > 1) & ordered["LapTime (s)"].notna()]
+    times = clean.groupby("Driver")["LapTime (s)"]
+    deviation = (clean["LapTime (s)"] - times.transform("median")).abs()
+    mad = deviation.groupby(clean["Driver"]).transform("median") * clean_air.MAD_SCALE
+    kept = clean[deviation <= clean_air.MAD_CUTOFF * mad.where(mad > 0, np.inf)]
+    stats = kept.groupby("Driver")["LapTime (s)"].agg(["mean", "count"])
+    return stats["mean"].where(stats["count"] >= clean_air.MIN_CLEAN_LAPS)
+
+
+def test_gap_ahead_is_per_lap():
+    laps = np.array([1.0, 1.0, 2.0, 1.0, 2.0])
+    times = np.array([10.0, 10.5, 20.0, 13.0, np.nan])
+    np.testing.assert_allclose(clean_air.gap_ahead(laps, times), [np.inf, 0.5, np.inf, 2.5, np.nan])
+
+
+def test_clean_air_pace_matches_pandas():
+    laps = race_laps()
+    pace = clean_air.clean_air_pace(laps, gap_threshold=2.0)
+    expected = pandas_pace(laps, 2.0).reindex(pace["Driver"])
+    np.testing.assert_allclose(pace["CleanAirRacePace (s)"], expected.to_numpy())
+    # The train behind the leader never has clean air; the safety-car lap is dropped as an outlier
+    assert pace["CleanAirRacePace (s)"].isna().tolist() == [False, True, True, False, False, False]
+    leader = pace.iloc[0]
+    assert leader["CleanAirLaps"] <= 25 - 5 and abs(leader["CleanAirRacePace (s)"] - 95.0) < 0.2
+    # Lowering the threshold lets the train's laps count
+    assert clean_air.clean_air_pace(laps, gap_threshold=0.5)["CleanAirRacePace (s)"].notna().all()
+
+
+def test_session_pace_is_cached_and_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean_air, "CLEAN_AIR_CACHE_DIR", str(tmp_path / "clean_air"))
+    laps = race_laps()
+    pace = clean_air.session_pace(2024, 19, laps=laps)
+
+    import training.extract as extract
+
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("cached session pace should not extract laps")
+
+    monkeypatch.setattr(extract, "session_tables", no_extraction)
+    cached = clean_air.session_pace(2024, 19)
+    pd.testing.assert_frame_equal(cached, pace, check_dtype=False)
+
+    path = str(tmp_path / "clean_air_pace.json")
+    store = clean_air.build_store({"usa": (2024, 19, "R")}, path=path)
+    assert clean_air.load_store(path) == store
+    assert set(store["races"]["usa"]["drivers"]) == {"D00", "D03", "D04", "D05"}
+    assert clean_air.load_store(str(tmp_path / "missing.json")) is None
+
+
+def test_api_imports_without_pandas():
+    # The serving image installs requirements.txt only, which has no pandas
+    code = "import sys; sys.modules['pandas'] = None; import main"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
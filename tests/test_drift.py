@@ -0,0 +1,91 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from serving.drift import (
+    HISTOGRAM_BINS, SKETCH_BINS, DriftMonitor, FeatureStats, compare, load_reference, population_stability,
+    reference_from_training, reference_path, save_reference
+)
+
+
+def test_feature_stats_match_numpy():
+    rng = np.random.default_rng(7)
+    values = rng.normal(95.0, 4.0, 5000)
+    values[:3] = [80.0, 140.0, np.nan]
+    stats = FeatureStats(85.0, 130.0)
+    # Single rows and batches fold into the same moments
+    for value in values[:100]:
+        stats.update(np.array([value]))
+    stats.update(values[100:])
+
+    finite = values[~np.isnan(values)]
+    assert stats.count == len(finite)
+    assert stats.mean == pytest.approx(finite.mean())
+    assert stats.variance == pytest.approx(finite.var(ddof=1))
+    inside = finite[(finite >= 85.0) & (finite <= 130.0)]
+    expected, _ = np.histogram(inside, bins=HISTOGRAM_BINS, range=(85.0, 130.0))
+    assert stats.histogram[1:-1].tolist() == expected.tolist()
+    assert stats.histogram[0] == (finite < 85.0).sum() and stats.histogram[-1] == (finite > 130.0).sum()
+    for q in (0.1, 0.5, 0.9):
+        assert abs(stats.quantile(q) - np.quantile(finite, q)) <= 45.0 / SKETCH_BINS
+
+
+def test_psi_flags_shifted_inputs():
+    rng = np.random.default_rng(1)
+    reference, same, shifted = FeatureStats(85.0, 130.0), FeatureStats(85.0, 130.0), FeatureStats(85.0, 130.0)
+    reference.update(rng.normal(95.0, 2.0, 2000))
+    same.update(rng.normal(95.0, 2.0, 2000))
+    shifted.update(rng.normal(99.0, 2.0, 2000))
+    assert population_stability(reference.histogram, same.histogram) < 0.1
+    assert compare(reference, same)["status"] == "ok"
+    result = compare(reference, shifted)
+    assert result["status"] == "drift" and result["mean_shift"] == pytest.approx(2.0, abs=0.2)
+    assert compare(None, same)["status"] == "no reference"
+
+
+def test_references_are_shared_across_versions(tmp_path):
+    assert reference_path("models", "us_model.v3.joblib") == reference_path("models", "us_model.joblib")
+    assert reference_path("models", "qatar_model.student.joblib").endswith("qatar_model.reference.json")
+    X = pd.DataFrame({"QualifyingTime (s)": [94.1, 94.6, np.nan], "TeamPerformanceScore": [1.0, 0.4, 0.2]})
+    path = reference_path(str(tmp_path), "us_model.joblib")
+    save_reference(path, reference_from_training("usa", X))
+    reference = load_reference(path)
+    assert sorted(reference) == ["qualifying_time", "team_score"]
+    assert reference["qualifying_time"].count == 2 and reference["team_score"].mean == pytest.approx(0.5333, abs=1e-4)
+
+
+def test_monitor_updates_off_the_request_path():
+    monitor = DriftMonitor(max_pending=2)
+    # Nothing drains the queue yet: the third request is dropped, not blocked on
+    for _ in range(3):
+        monitor.record("usa", {"qualifying_time": np.array([94.5, 95.0]), "team_score": 0.8})
+    assert monitor.dropped == 1 and not monitor.live
+
+    monitor.start()
+    monitor.flush()
+    report = monitor.report()
+    usa = report["races"]["usa"]
+    assert usa["rows"] == 4 and usa["status"] == "no reference"
+    assert usa["features"]["team_score"]["live"]["count"] == 2
+    monitor.stop()
+
+
+def test_monitor_skips_bad_requests_and_stops_promptly():
+    monitor = DriftMonitor(max_pending=2, stop_timeout=0.05)
+    monitor.start()
+    monitor.record("usa", {"unknown_input": 1.0})
+    monitor.record("usa", {"team_score": 0.8})
+    monitor.flush()
+    assert monitor.report()["races"]["usa"]["features"]["team_score"]["live"]["count"] == 1
+    monitor.stop()
+
+    # A thread that no longer drains the queue does not hang shutdown
+    monitor._thread = threading.Thread(target=time.sleep, args=(1.0,), daemon=True)
+    monitor._thread.start()
+    for _ in range(2):
+        monitor.record("usa", {"team_score": 0.8})
+    start = time.monotonic()
+    monitor.stop()
+    assert time.monotonic() - start < 0.5
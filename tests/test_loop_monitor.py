@@ -0,0 +1,52 @@
+import time
+import asyncio
+import logging
+
+from serving.loop_monitor import BUCKETS_MS, Histogram, LoopMonitor, LoopTimeMiddleware
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    for ms in [0.2, 0.8, 3, 3, 40, 4000]:
+        histogram.observe(ms / 1000)
+    stats = histogram.to_dict()
+    assert stats["count"] == 6 and stats["max_ms"] == 4000
+    assert stats["buckets_ms"]["0.5"] == 1 and stats["buckets_ms"]["5"] == 4
+    assert stats["buckets_ms"][str(BUCKETS_MS[-1])] == 5 and stats["buckets_ms"]["+Inf"] == 6
+    assert stats["p50_ms"] == 5 and stats["p99_ms"] == 4000
+
+
+def test_blocking_call_is_reported_as_a_stall(caplog):
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def block_the_loop():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="serving.loop_monitor"):
+        asyncio.run(block_the_loop())
+    assert monitor.stalls == 1
+    assert monitor.lag.max >= 250
+    # The stack was sampled while the loop was inside the blocking call
+    assert "block_the_loop" in monitor.last_stall["stack"]
+    assert "Event loop blocked" in caplog.text
+
+
+def test_route_time_counts_only_time_on_the_loop():
+    monitor = LoopMonitor(interval=0.01, stall_threshold=0.1)
+
+    async def app(scope, receive, send):
+        time.sleep(0.02)
+        # Waiting is not time on the loop
+        await asyncio.sleep(0.1)
+        time.sleep(0.02)
+
+    middleware = LoopTimeMiddleware(app, monitor)
+    asyncio.run(middleware({"type": "http", "method": "GET"}, None, None))
+    route = monitor.routes["GET unmatched"]
+    assert route.count == 1
+    assert 40 <= route.max < 90
+    assert monitor.in_flight == 0 and monitor.max_in_flight == 1
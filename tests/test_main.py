@@ -1,10 +1,18 @@
 import pytest
 import os
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import joblib
 import numpy as np
 from fastapi.testclient import TestClient
-from main import app, ml_models, lookup_data, load_model_artifact
+from main import (
+    app, ml_models, lookup_data, load_model_artifact, admission, get_artifact_version, get_race_key_from_filename,
+    season_indexes, drift_monitor, loop_monitor
+)
+from features.team_scores import serving_scores
+from seasons.index import build_indexes
+from serving.admission import AdmissionController, OverloadedError
 
 # Standardized setup for tests
 def setup_module(module):
@@ -24,6 +32,8 @@ def setup_module(module):
     if os.path.exists(lookup_path):
         with open(lookup_path, "r") as f:
             lookup_data["data"] = json.load(f)
+    lookup_data["team_scores"] = serving_scores()
+    season_indexes.update(build_indexes())
 
 client = TestClient(app)
 
@@ -139,3 +149,462 @@ def test_predict_logic_order():
     response = client.post("/predict", json=payload)
     assert response.status_code == 422
     assert "slower than qualifying time" in response.json()["detail"]
+
+def test_predict_rejected_when_saturated(monkeypatch):
+    monkeypatch.setattr(admission, "max_concurrency", 0)
+    monkeypatch.setattr(admission, "max_queue", 0)
+    payload = {
+        "race_name": "usa",
+        "driver_code": "VER",
+        "qualifying_time": 94.5,
+        "clean_air_race_pace": 100.2,
+        "rain_prob": 0.0,
+        "temperature": 35.0
+    }
+    response = client.post("/predict", json=payload)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+    # Health checks are never queued behind inference
+    assert client.get("/health").status_code == 200
+    assert client.get("/metrics").json()["admission"]["rejected"]["queue_full"] >= 1
+
+def test_admission_queue_timeout_and_handoff():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_per_race=1, max_queue=1, max_wait=0.05)
+        await controller.acquire("usa")
+
+        with pytest.raises(OverloadedError):
+            await controller.acquire("usa")
+        assert controller.rejected_timeout == 1
+
+        waiter = asyncio.ensure_future(controller.acquire("usa"))
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        with pytest.raises(OverloadedError):
+            await controller.acquire("qatar")
+        assert controller.rejected_queue_full == 1
+
+        controller.release("usa")
+        await waiter
+        assert controller.in_flight == 1
+        controller.release("usa")
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_predict_batch_matches_single_row():
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    single = client.post("/predict", json={
+        "race_name": "usa",
+        "driver_code": "VER",
+        "qualifying_time": 94.5,
+        "clean_air_race_pace": 100.2,
+        "rain_prob": 0.0,
+        "temperature": 35.0
+    }).json()
+    payload = {
+        "race_name": "Austin",
+        "driver_code": ["VER", "nor", "XXX", "HAM", "LEC", "PIA"],
+        "qualifying_time": [94.5, 94.8, 94.0, 20.0, 100.0, 95.0],
+        "clean_air_race_pace": [100.2, 100.9, 100.0, 100.0, 90.0, 140.0],
+        "rain_prob": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+        "temperature": [35.0, 35.0, 35.0, 35.0, 35.0, 35.0]
+    }
+    response = client.post("/predict/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["race"] == "usa"
+    assert data["valid"] == [True, True, False, False, False, False]
+    assert data["predicted_pace"][0] == pytest.approx(single["predicted_pace"])
+    assert data["predicted_pace"][2] is None
+    assert data["errors"][:2] == [None, None]
+    assert data["errors"][2] == "Unknown driver code 'XXX'"
+    assert data["errors"][3] == "Qualifying time for usa invalid"
+    assert data["errors"][4] == "Clean air race pace should be slower than qualifying time"
+    assert data["errors"][5] == "Clean air race pace for usa invalid"
+
+def test_predict_batch_field_bounds_and_lengths():
+    payload = {
+        "race_name": "qatar",
+        "driver_code": ["VERS", "VER"],
+        "qualifying_time": [82.0, -1.0],
+        "clean_air_race_pace": [93.0, 93.0],
+        "rain_prob": [0.0, 0.0],
+        "temperature": [30.0, 30.0]
+    }
+    data = client.post("/predict/batch", json=payload).json()
+    assert data["valid"] == [False, False]
+    assert data["errors"] == [
+        "driver_code: String should have at most 3 characters",
+        "qualifying_time: Input should be greater than 0"
+    ]
+
+    payload["temperature"] = [30.0]
+    assert client.post("/predict/batch", json=payload).status_code == 422
+
+BINARY_BATCH = {
+    "race_name": "usa",
+    "driver_code": ["VER", "XXX"],
+    "qualifying_time": [94.5, 94.0],
+    "clean_air_race_pace": [100.2, 100.0],
+    "rain_prob": [0.0, 0.0],
+    "temperature": [35.0, 35.0]
+}
+
+def test_predict_batch_msgpack_roundtrip():
+    msgpack = pytest.importorskip("msgpack")
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    body = dict(BINARY_BATCH)
+    # Numeric columns may be sent as raw float64 buffers
+    body["qualifying_time"] = np.array(body["qualifying_time"], dtype="<f8").tobytes()
+    response = client.post(
+        "/predict/batch",
+        content=msgpack.packb(body, use_bin_type=True),
+        headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/msgpack")
+    data = msgpack.unpackb(response.content, raw=False)
+    predictions = np.frombuffer(data["predicted_pace"], dtype="<f8")
+    json_data = client.post("/predict/batch", json=BINARY_BATCH).json()
+    assert predictions[0] == pytest.approx(json_data["predicted_pace"][0])
+    assert np.isnan(predictions[1])
+    assert data["errors"][1] == "Unknown driver code 'XXX'"
+
+def test_predict_batch_arrow_roundtrip():
+    pa = pytest.importorskip("pyarrow")
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    table = pa.table(
+        {k: v for k, v in BINARY_BATCH.items() if k != "race_name"},
+        metadata={"race_name": "usa"}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post(
+        "/predict/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": "application/vnd.apache.arrow.stream"}
+    )
+    # No binary Accept header: JSON stays the default response format
+    assert response.status_code == 200
+    assert response.json()["valid"] == [True, False]
+
+    response = client.post(
+        "/predict/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": "application/vnd.apache.arrow.stream", "Accept": "application/vnd.apache.arrow.stream"}
+    )
+    result = pa.ipc.open_stream(response.content).read_all()
+    assert result.column("valid").to_pylist() == [True, False]
+    assert result.column("predicted_pace").null_count == 1
+    assert result.schema.metadata[b"race"] == b"usa"
+
+def test_admission_timeout_after_handoff_keeps_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_per_race=1, max_queue=1, max_wait=0.05)
+        await controller.acquire("usa")
+        loop = asyncio.get_running_loop()
+        # Hand the slot over right as the wait times out
+        loop.call_later(0.05, controller.release, "usa")
+        try:
+            await controller.acquire("usa")
+        except OverloadedError:
+            assert controller.in_flight == 0
+        else:
+            assert controller.in_flight == 1
+            controller.release("usa")
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_predict_batch_all_invalid_reports_model():
+    if "qatar" not in ml_models:
+        pytest.skip("Qatar model not available")
+    payload = {
+        "race_name": "qatar",
+        "driver_code": ["XXX"],
+        "qualifying_time": [82.0],
+        "clean_air_race_pace": [93.0],
+        "rain_prob": [0.0],
+        "temperature": [30.0]
+    }
+    data = client.post("/predict/batch", json=payload).json()
+    assert data["valid"] == [False]
+    assert "xgb_v2" in data["meta"]["model"]
+
+def test_predict_batch_rejects_bad_binary_payloads():
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    headers = {"Content-Type": "application/msgpack"}
+
+    body = dict(BINARY_BATCH, qualifying_time=["abc", 94.0])
+    response = client.post("/predict/batch", content=msgpack.packb(body), headers=headers)
+    assert response.status_code == 422
+
+    body = {k: (v[0] if isinstance(v, list) else v) for k, v in BINARY_BATCH.items()}
+    response = client.post("/predict/batch", content=msgpack.packb(body), headers=headers)
+    assert response.status_code == 422
+
+    table = pa.table(
+        dict({k: v for k, v in BINARY_BATCH.items() if k != "race_name"}, temperature=["hot", "cold"]),
+        metadata={"race_name": "usa"}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = client.post(
+        "/predict/batch",
+        content=sink.getvalue().to_pybytes(),
+        headers={"Content-Type": "application/vnd.apache.arrow.stream"}
+    )
+    assert response.status_code == 422
+
+    response = client.post("/predict/batch", content=b"a,b\n1,2", headers={"Content-Type": "text/csv"})
+    assert response.status_code == 415
+
+def test_predict_batch_accept_quality_values():
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    response = client.post(
+        "/predict/batch",
+        json=BINARY_BATCH,
+        headers={"Accept": "application/msgpack;q=0, application/json"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+
+def test_predict_stream_ndjson(monkeypatch):
+    if "usa" not in ml_models or "abudhabi" not in ml_models:
+        pytest.skip("USA/Abu Dhabi models not available")
+    import main
+    monkeypatch.setattr(main, "STREAM_CHUNK_ROWS", 2)
+    rows = [
+        {"id": "a", "race_name": "usa", "driver_code": "VER", "qualifying_time": 94.5, "clean_air_race_pace": 100.2, "rain_prob": 0.0, "temperature": 35.0},
+        {"id": "b", "race_name": "abudhabi", "driver_code": "NOR", "qualifying_time": 82.4, "clean_air_race_pace": 91.5, "rain_prob": 0.0, "temperature": 25.0},
+        {"id": "c", "race_name": "cota", "driver_code": "XXX", "qualifying_time": 94.5, "clean_air_race_pace": 100.2, "rain_prob": 0.0, "temperature": 35.0},
+        {"id": "d", "race_name": "USA", "driver_code": "NOR", "qualifying_time": 94.8, "clean_air_race_pace": 100.9, "rain_prob": 0.0, "temperature": 35.0},
+    ]
+    body = "\n".join(json.dumps(r) for r in rows) + "\n{not json}\n" + json.dumps({"race_name": "moon"})
+    # The route reads the body while streaming; a regression here hangs, so bound it
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(
+            client.post, "/predict/stream", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        response = future.result(timeout=30)
+    assert response.status_code == 200
+    results = {r["line"]: r for r in (json.loads(l) for l in response.text.splitlines())}
+    assert sorted(results) == [1, 2, 3, 4, 5, 6]
+    assert results[1]["id"] == "a" and results[1]["predicted_pace"] is not None
+    assert results[2]["race"] == "abudhabi" and results[2]["error"] is None
+    assert results[3]["error"] == "Unknown driver code 'XXX'"
+    assert results[4]["race"] == "usa" and results[4]["predicted_pace"] is not None
+    assert results[5]["predicted_pace"] is None
+    assert "Missing field" in results[6]["error"]
+
+def test_predict_fills_omitted_clean_air_pace(monkeypatch):
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    monkeypatch.setitem(lookup_data, "clean_air", {"version": "test", "races": {"usa": {"drivers": {"VER": 100.2}}}})
+    row = {"race_name": "usa", "driver_code": "VER", "qualifying_time": 94.5, "rain_prob": 0.0, "temperature": 35.0}
+    explicit = client.post("/predict", json={**row, "clean_air_race_pace": 100.2}).json()
+    filled = client.post("/predict", json=row)
+    assert filled.status_code == 200
+    assert filled.json()["predicted_pace"] == pytest.approx(explicit["predicted_pace"])
+
+    response = client.post("/predict", json={**row, "driver_code": "NOR"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "No clean air race pace for 'NOR' at usa; send clean_air_race_pace"
+
+    batch = {
+        "race_name": "usa", "driver_code": ["VER", "NOR", "NOR"], "qualifying_time": [94.5, 94.8, 94.8],
+        "clean_air_race_pace": [None, 100.9, None], "rain_prob": [0.0] * 3, "temperature": [35.0] * 3
+    }
+    data = client.post("/predict/batch", json=batch).json()
+    assert data["valid"] == [True, True, False]
+    assert data["predicted_pace"][0] == pytest.approx(explicit["predicted_pace"])
+    assert data["errors"][2] == "No clean air race pace for 'NOR' at usa; send clean_air_race_pace"
+    del batch["clean_air_race_pace"]
+    assert client.post("/predict/batch", json=batch).json()["valid"] == [True, False, False]
+
+    lines = [json.dumps(row), json.dumps({**row, "clean_air_race_pace": "fast"})]
+    response = client.post("/predict/stream", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"})
+    results = {r["line"]: r for r in (json.loads(l) for l in response.text.splitlines())}
+    assert results[1]["predicted_pace"] == pytest.approx(explicit["predicted_pace"])
+    assert results[2]["error"] == "clean_air_race_pace: Input should be a valid number"
+
+def test_drift_reports_live_inputs_against_reference(monkeypatch):
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    from serving.drift import FeatureStats, MIN_LIVE_ROWS
+    reference = FeatureStats(85.0, 130.0)
+    reference.update(np.linspace(93.0, 96.0, 40))
+    monkeypatch.setitem(drift_monitor.references, "usa", {"qualifying_time": reference})
+    monkeypatch.setitem(drift_monitor.reference_files, "usa", "us_model.reference.json")
+    drift_monitor.start()
+    try:
+        # Start from empty statistics once requests queued by earlier tests are applied
+        drift_monitor.flush()
+        monkeypatch.setattr(drift_monitor, "live", {})
+        n = MIN_LIVE_ROWS
+        payload = {
+            "race_name": "usa", "driver_code": ["VER"] * n, "qualifying_time": [110.0] * n,
+            "clean_air_race_pace": [112.0] * n, "rain_prob": [0.0] * n, "temperature": [35.0] * n
+        }
+        assert client.post("/predict/batch", json=payload).status_code == 200
+        # Inputs of a failed prediction are not recorded
+        def failing_model(*args):
+            raise RuntimeError("model failed")
+        monkeypatch.setattr("main.run_model", failing_model)
+        assert client.post("/predict/batch", json=payload).status_code == 500
+        drift_monitor.flush()
+    finally:
+        drift_monitor.stop()
+    usa = client.get("/drift").json()["races"]["usa"]
+    assert usa["rows"] == n and usa["reference"] == "us_model.reference.json"
+    assert usa["status"] == "drift"
+    assert usa["features"]["qualifying_time"]["status"] == "drift"
+    assert usa["features"]["temperature"]["status"] == "no reference"
+
+def test_predictions_are_logged(monkeypatch, tmp_path):
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    import main
+    from serving.prediction_log import PredictionLog, query
+    path = str(tmp_path / "predictions.sqlite3")
+    log = PredictionLog(path)
+    monkeypatch.setattr(main, "prediction_log", log)
+    log.start()
+    try:
+        single = client.post("/predict", json={
+            "race_name": "usa", "driver_code": "VER", "qualifying_time": 94.5, "clean_air_race_pace": 100.2,
+            "rain_prob": 0.0, "temperature": 35.0
+        }).json()
+        # The invalid row is not logged
+        batch = client.post("/predict/batch", json={
+            "race_name": "usa", "driver_code": ["nor", "XXX"], "qualifying_time": [94.8, 94.0],
+            "clean_air_race_pace": [100.9, 100.0], "rain_prob": [0.0, 0.0], "temperature": [35.0, 35.0]
+        }).json()
+    finally:
+        log.stop()
+    rows = query(path)
+    assert rows["driver"].tolist() == ["VER", "NOR"] and rows["source"].tolist() == ["single", "batch"]
+    assert rows["predicted_pace"][0] == pytest.approx(single["predicted_pace"])
+    assert rows["predicted_pace"][1] == pytest.approx(batch["predicted_pace"][0])
+    assert client.get("/metrics").json()["prediction_log"]["logged_rows"] == 2
+
+def test_predict_with_quantized_model(monkeypatch):
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    from serving.quantized import quantize_artifact
+    payload = {
+        "race_name": "usa", "driver_code": ["VER", "NOR"], "qualifying_time": [94.5, 94.8],
+        "clean_air_race_pace": [100.2, 100.9], "rain_prob": [0.0, 20.0], "temperature": [35.0, 35.0]
+    }
+    original = client.post("/predict/batch", json=payload).json()
+    monkeypatch.setitem(ml_models, "usa", quantize_artifact(ml_models["usa"]))
+    quantized = client.post("/predict/batch", json=payload).json()
+    assert quantized["meta"]["model"] == original["meta"]["model"]
+    np.testing.assert_allclose(quantized["predicted_pace"], original["predicted_pace"], atol=1e-3)
+    assert "usa" in client.get("/health").json()["quantized"]
+
+def test_event_loop_stays_responsive_during_predictions(monkeypatch):
+    if "usa" not in ml_models:
+        pytest.skip("USA model not available")
+    import httpx
+    monkeypatch.setattr(loop_monitor, "interval", 0.005)
+    n = 500
+    batch = {
+        "race_name": "usa", "driver_code": ["VER"] * n, "qualifying_time": [94.5] * n,
+        "clean_air_race_pace": [100.2] * n, "rain_prob": [0.0] * n, "temperature": [35.0] * n
+    }
+    single = {
+        "race_name": "usa", "driver_code": "NOR", "qualifying_time": 94.8, "clean_air_race_pace": 100.9,
+        "rain_prob": 0.0, "temperature": 35.0
+    }
+    # Within the admission queue, so every request is served
+    stalls = loop_monitor.stalls
+    batch_requests = loop_monitor.stats()["routes"].get("POST /predict/batch", {}).get("count", 0)
+
+    async def predict_concurrently():
+        loop_monitor.start()
+        lag_samples = loop_monitor.lag.count
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+                responses = await asyncio.gather(
+                    *(async_client.post("/predict/batch", json=batch) for _ in range(4)),
+                    *(async_client.post("/predict", json=single) for _ in range(24))
+                )
+            await asyncio.sleep(0.02)
+        finally:
+            loop_monitor.stop()
+        return responses, loop_monitor.lag.count - lag_samples
+
+    responses, lag_samples = asyncio.run(predict_concurrently())
+    assert all(r.status_code == 200 for r in responses)
+    stats = loop_monitor.stats()
+    # The lag probe kept running throughout and inference never blocked the loop
+    assert lag_samples > 0
+    assert loop_monitor.stalls == stalls
+    assert stats["lag"]["max_ms"] < loop_monitor.stall_threshold * 1000
+    assert stats["routes"]["POST /predict/batch"]["count"] == batch_requests + 4
+    assert client.get("/metrics").json()["event_loop"]["routes"]["POST /predict"]["count"] >= 24
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_fast_json_serializes_numpy(monkeypatch, use_orjson):
+    import serving.responses as responses
+    if use_orjson and responses.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(responses, "orjson", None)
+    content = {
+        "predicted_pace": np.array([101.5, np.nan]),
+        "valid": np.array([True, False]),
+        "scalar": np.float64(1.25)
+    }
+    assert json.loads(responses.dumps(content)) == {
+        "predicted_pace": [101.5, None],
+        "valid": [True, False],
+        "scalar": 1.25
+    }
+
+def test_weather_uses_lookup_config(monkeypatch):
+    import main
+    from features.weather import StubWeatherProvider
+    monkeypatch.setattr(main, "weather_provider", StubWeatherProvider(fixture_path="tests/fixtures/weather.json"))
+    data = client.get("/weather").json()
+    assert data["config"]["race_datetime"] == "2025-12-07 13:00:00"
+    assert data["forecast"] == {"rain_probability": 0.1, "temperature": 26.5, "source": "stub"}
+
+def test_versioned_artifact_filenames():
+    assert get_race_key_from_filename("us_model.v3.joblib") == "usa"
+    assert get_race_key_from_filename("abu_dhabi_model.joblib") == "abudhabi"
+    assert get_race_key_from_filename("mexico_model.student.joblib") == "mexico"
+    assert get_artifact_version("abu_dhabi_model.v12.joblib") == 12
+    assert get_artifact_version("abu_dhabi_model.joblib") == 1
+    assert client.get("/health").json()["model_versions"]["usa"] >= 1
+
+def test_season_results_endpoints():
+    round_results = client.get("/seasons/2024/rounds/1").json()
+    assert set(round_results["RoundNumber"]) == {1}
+    assert round_results == client.get("/seasons/2024/events/bahrain grand prix").json()
+
+    driver = client.get("/seasons/2024/drivers/max verstappen", params={"from_round": 10, "finished_only": True}).json()
+    assert driver["summary"]["name"] == "Max Verstappen"
+    assert min(driver["results"]["RoundNumber"]) >= 10
+    assert set(driver["results"]["Status"]) == {"Finished"}
+    assert driver["results"]["RoundNumber"] == sorted(driver["results"]["RoundNumber"])
+
+    standings = client.get("/seasons/2024/standings", params={"by": "teams"}).json()
+    assert standings["points"] == sorted(standings["points"], reverse=True)
+    assert [s["season"] for s in client.get("/seasons/compare/drivers/Lando Norris").json()] == [2024, 2025]
+
+    assert client.get("/seasons/1999/rounds/1").status_code == 404
+    assert client.get("/seasons/2024/rounds/99").status_code == 404
+    assert client.get("/seasons/2024/drivers/nobody").status_code == 404
+    assert client.get("/seasons/2024/standings", params={"by": "circuits"}).status_code == 422
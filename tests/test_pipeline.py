@@ -0,0 +1,237 @@
+import os
+import pytest
+import joblib
+import numpy as np
+
+pd = pytest.importorskip("pandas")
+
+import features.clean_air as clean_air
+import training.cache as cache
+import training.extract as extract
+import training.pipeline as pipeline
+from training.parallel import train_races
+from training.races import RACES
+
+
+def synthetic_laps(year, round_number, session="R", offline=False):
+    rng = np.random.default_rng(39)
+    rows = []
+    for position, driver in enumerate(RACES["usa"]["qualifying"]):
+        # Cars start 2.5 s apart, mostly in clean air; pit stops on lap 10
+        session_time = 2.5 * position
+        for lap in range(1, 21):
+            sectors = rng.normal([30.0, 35.0, 28.0], 0.5) + 0.02 * position
+            session_time += sectors.sum()
+            rows.append({
+                "Driver": driver,
+                "LapTime (s)": sectors.sum(),
+                "Sector1Time (s)": sectors[0],
+                "Sector2Time (s)": sectors[1],
+                "Sector3Time (s)": sectors[2],
+                "LapNumber": float(lap),
+                "Time (s)": session_time,
+                "InLap": lap == 10,
+                "OutLap": lap == 11
+            })
+    # An in-lap without a sector time, as FastF1 reports them
+    rows.append({"Driver": "VER", "LapTime (s)": 120.0, "Sector1Time (s)": np.nan,
+                 "Sector2Time (s)": 40.0, "Sector3Time (s)": 30.0, "LapNumber": 21.0,
+                 "Time (s)": rows[19]["Time (s)"] + 120.0, "InLap": True, "OutLap": False})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "STAGE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pipeline, "MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setattr(extract, "TABLE_DIR", str(tmp_path / "laps"))
+    monkeypatch.setattr(clean_air, "CLEAN_AIR_CACHE_DIR", str(tmp_path / "clean_air"))
+    monkeypatch.setattr(extract, "load_session_laps", synthetic_laps)
+    monkeypatch.delenv("openweatherapi", raising=False)
+    monkeypatch.delenv("OPENWEATHER_API", raising=False)
+    monkeypatch.setenv("WEATHER_FIXTURE", "tests/fixtures/weather.json")
+    return tmp_path
+
+
+def test_stage_key_depends_on_inputs():
+    assert cache.stage_key("train", {"a": 1}) == cache.stage_key("train", {"a": 1})
+    assert cache.stage_key("train", {"a": 1}) != cache.stage_key("train", {"a": 2})
+    assert cache.stage_key("train", {"a": 1}) != cache.stage_key("features", {"a": 1})
+
+
+def test_timedelta_seconds_is_vectorized_and_keeps_nat():
+    values = pd.to_timedelta(["1 min 32.5 s", None, "31.25 s"]).to_numpy()
+    seconds = extract.timedelta_seconds(values)
+    assert seconds[0] == 92.5 and np.isnan(seconds[1]) and seconds[2] == 31.25
+
+
+def test_aggregate_laps_matches_groupby():
+    laps = synthetic_laps(2024, 19)
+    expected = laps.dropna(subset=extract.SECONDS_COLUMNS).groupby("Driver")[extract.SECONDS_COLUMNS].mean().reset_index()
+    aggregates = extract.aggregate_laps(laps)
+    assert aggregates["Driver"].tolist() == expected["Driver"].tolist()
+    for column in extract.SECONDS_COLUMNS:
+        np.testing.assert_allclose(aggregates[column], expected[column])
+
+
+def test_session_tables_are_read_back_without_fastf1(sandbox, monkeypatch):
+    laps, aggregates = extract.session_tables(2024, 19)
+    assert all(os.path.exists(path) for path in extract.table_paths(2024, 19))
+
+    def offline_only(*args, **kwargs):
+        raise AssertionError("FastF1 should not be loaded again")
+
+    monkeypatch.setattr(extract, "load_session_laps", offline_only)
+    cached_laps, cached_aggregates = extract.session_tables(2024, 19)
+    pd.testing.assert_frame_equal(cached_laps, laps)
+    pd.testing.assert_frame_equal(cached_aggregates, aggregates)
+
+
+def test_changing_hyperparameters_reruns_only_training(sandbox, monkeypatch):
+    computed = []
+    real_cached_stage = pipeline.cached_stage
+
+    def spy(stage, inputs, compute, force=False):
+        def wrapped():
+            computed.append(stage)
+            return compute()
+        return real_cached_stage(stage, inputs, wrapped, force)
+
+    monkeypatch.setattr(pipeline, "cached_stage", spy)
+    pipeline.run_race("usa", with_shap=False)
+    assert computed == ["features", "train"]
+    assert os.path.exists(sandbox / "models" / "us_model.joblib")
+
+    computed.clear()
+    pipeline.run_race("usa", with_shap=False)
+    assert computed == []
+
+    params = dict(RACES["usa"]["params"], n_estimators=50)
+    monkeypatch.setitem(RACES["usa"], "params", params)
+    computed.clear()
+    pipeline.run_race("usa", with_shap=False)
+    assert computed == ["train"]
+
+
+def test_parallel_training_reports_each_race(sandbox, monkeypatch):
+    for race in ["usa", "mexico"]:
+        extract.session_tables(*RACES[race]["session"])
+    # Spawned workers only see the environment, not the monkeypatched modules
+    monkeypatch.setenv("F1_CACHE_DIR", str(sandbox / "f1_cache"))
+    monkeypatch.setenv("F1_MODELS_DIR", str(sandbox / "models"))
+    os.makedirs(sandbox / "f1_cache", exist_ok=True)
+    os.symlink(sandbox / "laps", sandbox / "f1_cache" / "laps")
+
+    results = train_races(["usa", "mexico"], jobs=2, threads=1, with_shap=False)
+    assert sorted(r["race"] for r in results) == ["mexico", "usa"]
+    for result in results:
+        assert "error" not in result
+        assert result["wall_seconds"] > 0 and result["peak_rss_mb"] > 0
+    assert sorted(os.listdir(sandbox / "models")) == [
+        "mexico_model.joblib", "mexico_model.reference.json", "us_model.joblib", "us_model.reference.json"
+    ]
+
+
+def test_xgb_contributions_are_native_and_additive():
+    xgboost = pytest.importorskip("xgboost")
+    from training.explain import tree_contributions
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(30, 5)), columns=[f"f{i}" for i in range(5)])
+    y = X["f0"] * 2 - X["f3"] + 90
+    model = xgboost.XGBRegressor(n_estimators=20, max_depth=3).fit(X, y)
+    values = tree_contributions(model, X)
+    assert values.shape == (30, 5)
+    bias = model.get_booster().predict(xgboost.DMatrix(X), pred_contribs=True)[:, -1]
+    np.testing.assert_allclose(values.sum(axis=1) + bias, model.predict(X), rtol=1e-5)
+
+
+def test_shap_arrays_are_saved_and_rerendered(sandbox, monkeypatch):
+    pytest.importorskip("shap")
+    import training.explain as explain
+    monkeypatch.setattr(explain, "SHAP_DIR", str(sandbox / "shap"))
+    monkeypatch.setattr(explain, "MODELS_DIR", str(sandbox / "models"))
+    pipeline.run_race("usa")
+    assert os.path.exists(sandbox / "models" / "shap_usa.png")
+
+    saved = explain.load_explanation("usa")
+    assert saved["values"].shape == saved["X"].shape
+    assert saved["features"] == RACES["usa"]["features"]
+
+    os.remove(sandbox / "models" / "shap_usa.png")
+    monkeypatch.setattr(explain, "tree_contributions", None)
+    explain.render("usa")
+    assert os.path.exists(sandbox / "models" / "shap_usa.png")
+
+
+def test_incremental_update_writes_next_version(sandbox):
+    from training.incremental import artifact_versions, update_race
+    pipeline.run_race("usa", with_shap=False)
+    models_dir = str(sandbox / "models")
+
+    laps = synthetic_laps(2025, 19)
+    laps["LapTime (s)"] += 0.3
+    team_scores, _ = pipeline.session_team_scores(RACES["usa"])
+    clean_air_pace = clean_air.pace_by_driver(clean_air.clean_air_pace(laps))
+    dataset = pipeline.build_features(RACES["usa"], extract.aggregate_laps(laps), (0, 28), team_scores, clean_air_pace)
+    report = update_race("usa", dataset["X"], dataset["y"].to_numpy(), rounds=20, tolerance=10.0, models_dir=models_dir)
+    assert report["accepted"] and report["version"] == 2
+    assert sorted(artifact_versions("us_model.joblib", models_dir)) == [1, 2]
+
+    artifact = joblib.load(report["path"])
+    assert artifact["model"].n_estimators == RACES["usa"]["params"]["n_estimators"] + 20
+    assert artifact["parent_version"] == 1
+    assert len(artifact["holdout"]["y"]) == report["holdout_rows"]
+
+
+def test_incremental_guardrail_rejects_regressions():
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.impute import SimpleImputer
+    from training.incremental import update_artifact
+    rng = np.random.default_rng(0)
+    features = [f"f{i}" for i in range(3)]
+    X = pd.DataFrame(rng.normal(size=(300, 3)), columns=features)
+    y = X["f0"].to_numpy() + 90
+    model = GradientBoostingRegressor(n_estimators=50, random_state=39).fit(X[:200], y[:200])
+    artifact = {
+        "model": model,
+        "imputer": SimpleImputer().fit(X),
+        "features": features,
+        "version": 3,
+        "holdout": {"X": X[200:].to_numpy(), "y": y[200:]}
+    }
+    # A weekend whose laps contradict everything seen so far
+    updated, report = update_artifact(artifact, X[:20], y[:20] + 50.0, rounds=50)
+    assert updated is None
+    assert not report["accepted"] and report["version"] == 3
+    assert report["holdout_mae_after"] > report["holdout_mae_before"]
+
+
+def test_distilled_student_tracks_teacher_and_exports(tmp_path, monkeypatch):
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.impute import SimpleImputer
+    import training.distill as distill
+    from serving.inference import build_features, run_model
+
+    rng = np.random.default_rng(0)
+    n = 200
+    qualifying = rng.uniform(85, 120, n)
+    X = build_features("usa", qualifying, qualifying + rng.uniform(0.5, 5, n), rng.uniform(0, 1, n),
+                       rng.uniform(0, 100, n), rng.uniform(-10, 70, n))
+    X[:, 3] = X[:, 0] * 0.9
+    imputer = SimpleImputer(strategy="median").fit(X)
+    teacher = GradientBoostingRegressor(n_estimators=300, max_depth=3, random_state=39)
+    teacher.fit(imputer.transform(X), X[:, 1] + 0.2 * X[:, 2])
+    artifact = {"model": teacher, "imputer": imputer, "features": RACES["usa"]["features"]}
+
+    reports = distill.distill("usa", artifact, np.array([0.1, 0.5, 1.0]), steps=8, eval_rows=500)
+    assert [r["student"] for r in reports] == ["teacher", "gbr", "xgb", "pwl"]
+    assert all(r["size_kb"] < reports[0]["size_kb"] for r in reports[1:])
+    chosen = distill.pick_student(reports, max_mae_delta=1.0)
+    assert chosen is not None and chosen["grid_mae_vs_teacher"] <= 1.0
+
+    monkeypatch.setattr(distill, "MODELS_DIR", str(tmp_path))
+    path = distill.export_student("usa", artifact, 1, chosen)
+    assert path.endswith("us_model.student.joblib")
+    student = joblib.load(path)
+    predictions, _ = run_model("usa", student["model"], student["imputer"], X[:5])
+    assert np.all(np.abs(predictions - teacher.predict(imputer.transform(X[:5]))) < 2.0)
@@ -0,0 +1,97 @@
+import time
+import threading
+import asyncio
+import sqlite3
+import numpy as np
+import pytest
+
+from serving.prediction_log import PredictionLog, query, summary
+
+INPUTS = {"qualifying_time": 94.5, "clean_air_race_pace": 100.2, "team_score": 0.8, "rain_prob": 0.0,
+          "temperature": 35.0}
+
+
+def test_entries_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / "predictions.sqlite3")
+    log = PredictionLog(path, batch_size=100, flush_interval=60.0)
+    log.start()
+    batch = {name: np.full(3, value) for name, value in INPUTS.items()}
+
+    async def log_requests():
+        await log.log("usa", "VER", INPUTS, 101.5, "usa_v2", 1, 0.002, "single")
+        await log.log("usa", np.array(["NOR", "LEC", "PIA"]), batch, np.array([101.6, 101.7, 101.8]),
+                      "usa_v2", 2, 0.004, "batch")
+        await log.log("qatar", "VER", INPUTS, 95.1, "qatar_xgb_v2", 1, 0.003, "stream")
+
+    asyncio.run(log_requests())
+    # Neither the batch size nor the flush interval was reached: stop() commits the remainder
+    log.stop()
+    assert log.stats()["logged_rows"] == 5 and log.stats()["transactions"] == 1
+
+    rows = query(path)
+    assert rows["driver"].tolist() == ["VER", "NOR", "LEC", "PIA", "VER"]
+    assert rows["source"].tolist() == ["single", "batch", "batch", "batch", "stream"]
+    np.testing.assert_allclose(rows["predicted_pace"][:4], [101.5, 101.6, 101.7, 101.8])
+    assert rows["latency_ms"][1] == pytest.approx(4.0)
+
+    usa_v2 = query(path, race="usa", model_version=2)
+    assert len(usa_v2["driver"]) == 3 and (usa_v2["qualifying_time"] == 94.5).all()
+    assert len(query(path, since=rows["logged_at"][-1] + 1)["race"]) == 0
+    assert [(r["race"], r["model_version"], r["rows"]) for r in summary(path)] == [
+        ("qatar", 1, 1), ("usa", 1, 1), ("usa", 2, 3)
+    ]
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_full_queue_drops_or_blocks(tmp_path):
+    path = str(tmp_path / "predictions.sqlite3")
+    dropping = PredictionLog(path, max_queue=1, policy="drop")
+    blocking = PredictionLog(path, max_queue=1, policy="block", block_timeout=0.01)
+
+    async def log_twice(log):
+        for _ in range(2):
+            await log.log("usa", "VER", INPUTS, 101.5, "usa_v2", 1, 0.002, "single")
+
+    # No writer is running, so the second entry finds the queue full
+    asyncio.run(log_twice(dropping))
+    asyncio.run(log_twice(blocking))
+    assert dropping.dropped == 1 and blocking.dropped == 1
+
+    # With the writer draining it, a blocked entry gets in
+    blocking.start()
+    asyncio.run(log_twice(blocking))
+    blocking.stop()
+    assert blocking.dropped == 1 and len(query(path)["driver"]) == 3
+
+    with pytest.raises(ValueError):
+        PredictionLog(path, policy="retry")
+
+
+def test_writer_survives_bad_entries_and_stops_promptly(tmp_path):
+    path = str(tmp_path / "predictions.sqlite3")
+    log = PredictionLog(path, flush_interval=60.0)
+    log.start()
+
+    async def log_requests():
+        await log.log("usa", "VER", {**INPUTS, "rain_prob": "wet"}, 101.5, "usa_v2", 1, 0.002, "single")
+        await log.log("usa", "NOR", INPUTS, 101.6, "usa_v2", 1, 0.002, "single")
+
+    asyncio.run(log_requests())
+    log.stop()
+    assert log.write_errors == 1 and query(path)["driver"].tolist() == ["NOR"]
+
+    # The database cannot be created under a file: entries are dropped, the writer keeps running
+    unopenable = PredictionLog(path + "/predictions.sqlite3", stop_timeout=1.0)
+    unopenable.start()
+    asyncio.run(unopenable.log("usa", "VER", INPUTS, 101.5, "usa_v2", 1, 0.002, "single"))
+    unopenable.stop()
+    assert unopenable.write_errors == 1 and unopenable.dropped == 1
+
+    # A writer that is no longer draining the queue does not hang shutdown
+    stuck = PredictionLog(path, max_queue=1, stop_timeout=0.05)
+    stuck._thread = threading.Thread(target=time.sleep, args=(1.0,), daemon=True)
+    stuck._thread.start()
+    asyncio.run(stuck.log("usa", "VER", INPUTS, 101.5, "usa_v2", 1, 0.002, "single"))
+    start = time.monotonic()
+    stuck.stop()
+    assert time.monotonic() - start < 0.5
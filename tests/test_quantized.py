@@ -0,0 +1,78 @@
+import os
+import joblib
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge
+
+from serving.inference import model_info_for
+from serving.quantized import QuantizedEnsemble, quantize, quantize_artifact, sample_features
+
+
+def training_data(rows=400, seed=3):
+    rng = np.random.default_rng(seed)
+    # Coarse values, so many inputs land exactly on a split threshold
+    X = np.round(rng.uniform(0, 10, (rows, 4)), 1)
+    y = 90 + X[:, 0] * 0.8 - X[:, 1] * 0.3 + np.sin(X[:, 2]) + rng.normal(0, 0.1, rows)
+    return X, y
+
+
+def boundary_rows(model: QuantizedEnsemble, X):
+    """Rows with each input moved onto its column's split thresholds."""
+    rows = np.repeat(X[:50], 3, axis=0)
+    for j, table in enumerate(model.tables):
+        if len(table):
+            rows[:, j] = np.resize(table.astype(np.float64), len(rows))
+    return np.vstack([X, rows])
+
+
+def test_gbr_reaches_the_same_leaves():
+    X, y = training_data()
+    model = GradientBoostingRegressor(n_estimators=60, max_depth=3, random_state=0).fit(X, y)
+    quantized = quantize(model)
+    assert quantized.source == "sklearn" and quantized.split_code.dtype == np.uint8
+    rows = boundary_rows(quantized, X)
+    # Only float32 leaf values separate the two
+    np.testing.assert_allclose(quantized.predict(rows), model.predict(rows), rtol=0, atol=1e-5)
+
+
+def test_xgboost_reaches_the_same_leaves_with_missing_values():
+    X, y = training_data()
+    X[::7, 1] = np.nan
+    # Depth 4 trees have up to 16 leaves, so the leaf masks are wider than a byte
+    model = xgb.XGBRegressor(n_estimators=80, max_depth=4, learning_rate=0.3, random_state=0).fit(X, y)
+    quantized = quantize(model)
+    assert quantized.source == "xgboost" and quantized.split_clear.dtype == np.uint16
+    rows = boundary_rows(quantized, X)
+    rows[::5, 3] = np.nan
+    np.testing.assert_allclose(quantized.predict(rows), model.predict(rows), rtol=0, atol=1e-4)
+    assert model_info_for("qatar", quantized) == model_info_for("qatar", model)
+
+
+def test_imputer_is_folded_into_a_fill():
+    X, y = training_data()
+    X[::5, 3] = np.nan
+    imputer = SimpleImputer(strategy="mean").fit(X)
+    model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(imputer.transform(X), y)
+    artifact = quantize_artifact({"model": model, "imputer": imputer, "version": 2})
+    assert artifact["imputer"] is None and artifact["version"] == 2
+    np.testing.assert_allclose(artifact["model"].fill, imputer.statistics_)
+    np.testing.assert_allclose(artifact["model"].predict(X), model.predict(imputer.transform(X)), atol=1e-5)
+
+    with pytest.raises(TypeError):
+        quantize(Ridge().fit(X[:, :3], y))
+
+
+@pytest.mark.parametrize("race, path", [("usa", "models/us_model.joblib"), ("qatar", "models/qatar_model.joblib")])
+def test_served_models_deviate_by_under_a_millisecond(race, path):
+    if not os.path.exists(path):
+        pytest.skip(f"{path} not available")
+    artifact = joblib.load(path)
+    quantized = quantize_artifact(artifact)
+    features = sample_features(race, 5000)
+    X = artifact["imputer"].transform(features) if artifact.get("imputer") is not None else features
+    original = artifact["model"].predict(X)
+    assert np.abs(quantized["model"].predict(features) - original).max() < 1e-3
+    assert quantized["model"].nbytes < os.path.getsize(path) / 5
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("xgboost")
+
+from training.races import XGB_PARAMS
+from training.search import sample_trials, search, should_prune, _thresholds
+
+
+def test_sample_trials_starts_with_baseline_and_keeps_fixed_params():
+    trials = sample_trials("xgb", XGB_PARAMS, 8)
+    assert trials[0] == XGB_PARAMS
+    assert len(trials) == 8
+    assert all(t["monotone_constraints"] == XGB_PARAMS["monotone_constraints"] for t in trials)
+    assert len({tuple(sorted(t.items())) for t in trials}) == 8
+
+
+def test_pruning_uses_median_running_mae_of_finished_trials():
+    finished = [
+        {"pruned": False, "fold_maes": [1.0, 1.0, 1.0]},
+        {"pruned": False, "fold_maes": [2.0, 2.0, 2.0]},
+        {"pruned": True, "fold_maes": [9.0]}
+    ]
+    thresholds = _thresholds(finished, 3)
+    assert thresholds == [1.5, 1.5, 1.5]
+    assert should_prune([2.0], thresholds)
+    assert not should_prune([1.0, 1.5], thresholds)
+    assert not should_prune([5.0], _thresholds(finished[:1], 3))
+
+
+def test_search_reports_accuracy_and_latency():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 5))
+    y = X @ np.array([1.0, 0.5, 0.0, -1.0, -1.0]) + 90 + rng.normal(0, 0.1, 40)
+    results = search("xgb", X, y, XGB_PARAMS, n_trials=6, n_folds=3, jobs=2)
+    assert sorted(r["trial"] for r in results) == list(range(6))
+    completed = [r for r in results if not r["pruned"]]
+    assert [r["cv_mae"] for r in completed] == sorted(r["cv_mae"] for r in completed)
+    best = completed[0]
+    assert 0 < best["n_estimators"] <= 1000
+    assert best["single_row_us"] > 0 and best["batch_1000_us"] > 0
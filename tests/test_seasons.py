@@ -0,0 +1,157 @@
+import json
+import numpy as np
+import pytest
+
+from seasons.index import SeasonIndex
+from seasons.store import convert, load, Season
+
+
+@pytest.mark.parametrize("year", [2024, 2025])
+def test_columnar_store_round_trips_exactly(tmp_path, year):
+    json_path = f"datasets/{year}.json"
+    convert(json_path, str(tmp_path))
+    with open(json_path, "r") as f:
+        assert Season(str(tmp_path)).to_records() == json.load(f)
+
+
+def test_columns_are_typed_mapped_and_dictionary_encoded(tmp_path):
+    convert("datasets/2024.json", str(tmp_path))
+    season = Season(str(tmp_path))
+    assert season["Q_Time"].dtype == np.float32
+    assert isinstance(season["Q_Time"], np.memmap)
+    assert season["Driver"].dtype == np.int16
+    assert season["RoundNumber"].dtype == np.int8
+    assert season.strings("Driver")[0] == "Max Verstappen"
+    code = season.code_of("Driver", "Max Verstappen")
+    assert code >= 0 and season["Driver"][0] == code
+    assert season.code_of("Driver", "Nobody") == -1
+    # Decoded columns are built once and shared read-only
+    q_time = season.values("Q_Time")
+    assert q_time.dtype == np.float64 and season.values("Q_Time") is q_time
+    assert season.values("Driver") is season.values("Driver") and not q_time.flags.writeable
+
+
+def test_floats_that_float32_cannot_hold_stay_float64(tmp_path):
+    records = [{"Driver": "A", "RaceTime": 5504.7421234}, {"Driver": "B", "RaceTime": None}]
+    json_path = tmp_path / "1999.json"
+    json_path.write_text(json.dumps(records))
+    convert(str(json_path), str(tmp_path / "store"))
+    season = Season(str(tmp_path / "store"))
+    assert season["RaceTime"].dtype == np.float64
+    assert season.to_records() == records
+
+
+def test_shipped_store_matches_json():
+    for year in (2024, 2025):
+        with open(f"datasets/{year}.json", "r") as f:
+            assert load(year).to_records() == json.load(f)
+
+
+def test_season_index_matches_pandas():
+    import pandas as pd
+
+    with open("datasets/2024.json", "r") as f:
+        df = pd.DataFrame(json.load(f))
+    index = SeasonIndex(2024, load(2024))
+
+    standings = pd.DataFrame(index.standings("Driver")).set_index("name")
+    grouped = df.groupby("Driver")
+    np.testing.assert_allclose(standings.loc[grouped.size().index, "points"], grouped["Points"].sum())
+    np.testing.assert_allclose(standings.loc[grouped.size().index, "avg_position_gain"], grouped["PositionGain"].mean())
+    np.testing.assert_allclose(standings.loc[grouped.size().index, "avg_pole_gap"], grouped["PoleGap"].mean())
+
+    expected = df[(df["Team"] == "McLaren") & (df["RoundNumber"] <= 5)].sort_values("RoundNumber", kind="stable")
+    results = index.group_results("Team", "mclaren", to_round=5)["results"]
+    assert results["Driver"].tolist() == expected["Driver"].tolist()
+    np.testing.assert_array_equal(results["Q_Time"], expected["Q_Time"].to_numpy())
+
+    assert index.round_results(3)["Driver"].tolist() == df[df["RoundNumber"] == 3]["Driver"].tolist()
+
+
+def test_analytics_match_pandas(tmp_path):
+    import pandas as pd
+    from seasons.analytics import MEASURES, read_extract, refresh
+
+    refresh(2024, extracts_dir=str(tmp_path))
+    with open("datasets/2024.json", "r") as f:
+        df = pd.DataFrame(json.load(f))
+
+    drivers = pd.DataFrame(read_extract(2024, "drivers", str(tmp_path))).set_index("name")
+    grouped = df.groupby("Driver")
+    for measure in MEASURES:
+        np.testing.assert_allclose(drivers[f"{measure}_mean"], grouped[measure].mean())
+        np.testing.assert_allclose(drivers[f"{measure}_std"], grouped[measure].std())
+        np.testing.assert_allclose(drivers[f"{measure}_q25"], grouped[measure].quantile(0.25))
+        np.testing.assert_allclose(drivers[f"{measure}_max"], grouped[measure].max())
+
+    correlation = pd.DataFrame(read_extract(2024, "correlation", str(tmp_path))).set_index("column")
+    numeric = [c for c in df.select_dtypes("number").columns if c != "EventDate"]
+    np.testing.assert_allclose(correlation.loc[numeric, numeric], df[numeric].corr(), atol=1e-12)
+    status = pd.DataFrame(read_extract(2024, "status", str(tmp_path))).set_index("Status")["count"]
+    assert status.to_dict() == df["Status"].value_counts().to_dict()
+
+    assert refresh(2024, extracts_dir=str(tmp_path))["changed_rounds"] == []
+
+
+def test_analytics_appended_round_recomputes_only_its_groups(tmp_path):
+    from seasons.analytics import build, season_columns, read_extract
+
+    columns = season_columns(load(2025))
+    earlier = columns["RoundNumber"] < columns["RoundNumber"].max()
+    build({name: values[earlier] for name, values in columns.items()}, str(tmp_path / "incremental" / "2025"), "v1")
+
+    report = build(columns, str(tmp_path / "incremental" / "2025"), "v2")
+    assert report["changed_rounds"] == [int(columns["RoundNumber"].max())]
+    last = ~earlier
+    assert report["recomputed"]["drivers"] == len(np.unique(columns["Driver"][last]))
+
+    build(columns, str(tmp_path / "full" / "2025"), "v2")
+    for name in ("drivers", "teams", "status", "correlation"):
+        incremental = read_extract(2025, name, str(tmp_path / "incremental"))
+        full = read_extract(2025, name, str(tmp_path / "full"))
+        for column, values in full.items():
+            if values.dtype.kind == "f":
+                np.testing.assert_allclose(incremental[column], values, rtol=1e-12)
+            else:
+                np.testing.assert_array_equal(incremental[column], values)
+
+
+def test_segments_round_trip_and_derive_columns(tmp_path):
+    from seasons.segments import import_season
+
+    season = import_season("datasets/2024.json", str(tmp_path))
+    with open("datasets/2024.json", "r") as f:
+        assert season.to_records() == json.load(f)
+    part = season.read(["Driver", "PoleGap"], rounds=[2])
+    assert set(part) == {"Driver", "PoleGap"} and np.nanmin(part["PoleGap"]) == 0.0
+
+
+def test_segment_append_is_validated_and_touches_only_the_new_round(tmp_path):
+    from seasons.segments import IngestError, SegmentedSeason
+
+    with open("datasets/2025.json", "r") as f:
+        records = json.load(f)
+    last = max(r["RoundNumber"] for r in records)
+    season = SegmentedSeason(2025, str(tmp_path / "segments"))
+    for round_number in range(1, last):
+        season.append([r for r in records if r["RoundNumber"] == round_number])
+    first_segment = tmp_path / "segments" / "2025" / "r01" / "Q_Time.npy"
+    mtime = first_segment.stat().st_mtime_ns
+
+    new_round = [{k: v for k, v in r.items() if k not in ("PoleGap", "PositionGain", "Q_Time_Gap_To_Median")}
+                 for r in records if r["RoundNumber"] == last]
+    bad = [dict(new_round[0], Q_Time="1:23.4"), dict(new_round[1], FinishPos=None), new_round[0]]
+    with pytest.raises(IngestError) as e:
+        season.append(bad)
+    assert len(e.value.errors) == 2
+    with pytest.raises(IngestError, match="duplicate driver"):
+        season.append(new_round + new_round[:1])
+
+    season.append(new_round)
+    with pytest.raises(IngestError, match="append-only"):
+        season.append(new_round)
+    assert first_segment.stat().st_mtime_ns == mtime
+    assert SegmentedSeason(2025, str(tmp_path / "segments")).to_records() == records
+
+    season.compact(str(tmp_path / "store"))
+    assert Season(str(tmp_path / "store" / "2025")).to_records() == records
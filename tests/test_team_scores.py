@@ -0,0 +1,54 @@
+import json
+import numpy as np
+import pandas as pd
+
+from features.team_scores import compute, driver_code, load_table, scores_as_of, serving_scores, write_table
+from seasons.store import load
+from serving.batch import driver_id, driver_ids, driver_table, lookup_drivers
+
+
+def test_scores_match_pandas_points_to_date():
+    table = compute(load(2025), 2025)
+    with open("datasets/2025.json", "r") as f:
+        df = pd.DataFrame(json.load(f))
+    points = df.pivot_table(index="RoundNumber", columns="Team", values="Points", aggfunc="sum", fill_value=0).cumsum()
+    np.testing.assert_allclose(table["points_to_date"], points[table["teams"]].to_numpy())
+    expected = points.div(points.max(axis=1), axis=0).round(4)
+    np.testing.assert_allclose(table["scores"], expected[table["teams"]].to_numpy())
+
+
+def test_scores_follow_mid_season_seat_changes(tmp_path):
+    table = compute(load(2025), 2025)
+    write_table(table, str(tmp_path))
+    assert load_table(2025, str(tmp_path))["version"] == table["version"]
+
+    # Tsunoda and Lawson swapped seats after round 2
+    after_round_2 = scores_as_of(table, 2)
+    teams = table["teams"]
+    scores = np.asarray(table["scores"])
+    assert after_round_2["LAW"] == scores[1, teams.index("Red Bull Racing")]
+    assert after_round_2["TSU"] == scores[1, teams.index("Racing Bulls")]
+    latest = scores_as_of(table)
+    assert latest["TSU"] == scores[-1, teams.index("Red Bull Racing")]
+    assert scores_as_of(table, 0) == {}
+    # Both spellings of Antonelli intern to one driver
+    assert driver_code("Andrea Kimi Antonelli") == driver_code("Kimi Antonelli") == "ANT"
+    assert driver_code("Nico Hülkenberg") == "HUL"
+
+
+def test_serving_scores_keep_drivers_from_older_seasons():
+    served = serving_scores()
+    assert served["version"].startswith("2025.")
+    assert served["drivers"]["NOR"] == 1.0
+    # Only raced in 2024
+    assert "PER" in served["drivers"]
+
+
+def test_driver_table_is_dense_by_interned_id():
+    table = driver_table({"VER": 0.5, "NOR": 1.0})
+    assert table.shape == (26 ** 3,)
+    assert driver_id("VER") == driver_ids(np.array(["VER"]))[0]
+    codes = np.array(["VER", "NOR", "XXX", "VERS", "V3R", ""])
+    scores, known = lookup_drivers(codes, table)
+    assert known.tolist() == [True, True, False, False, False, False]
+    assert scores[:2].tolist() == [0.5, 1.0]
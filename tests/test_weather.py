@@ -0,0 +1,60 @@
+import io
+import json
+import features.weather as weather
+from features.weather import OpenWeatherProvider, StubWeatherProvider, forecast_for_config
+
+FIXTURE = "tests/fixtures/weather.json"
+
+
+def fake_urlopen(calls):
+    def urlopen(url, timeout):
+        calls.append(url)
+        return io.BytesIO(json.dumps({"list": [
+            {"dt_txt": "2025-12-07 12:00:00", "pop": 0.0, "main": {"temp": 25.0}},
+            {"dt_txt": "2025-12-07 15:00:00", "pop": 0.3, "main": {"temp": 27.0}}
+        ]}).encode())
+    return urlopen
+
+
+def test_stub_reads_fixture_and_misses_unknown_queries():
+    provider = StubWeatherProvider(fixture_path=FIXTURE)
+    forecast = provider.forecast(30.1328, -97.6411, "2025-10-19 14:00:00")
+    assert (forecast.rain_probability, forecast.temperature) == (0.4, 24.0)
+    assert provider.forecast(0, 0, "2025-10-19 14:00:00") is None
+
+
+def test_openweather_bulk_fetches_each_location_once_and_caches(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(weather.urllib.request, "urlopen", fake_urlopen(calls))
+    provider = OpenWeatherProvider("key", cache_dir=str(tmp_path))
+    queries = [
+        (24.4672, 54.6031, "2025-12-07 12:00:00"),
+        (24.4672, 54.6031, "2025-12-07 15:00:00"),
+        (24.4672, 54.6031, "2030-01-01 00:00:00")
+    ]
+    first = provider.forecast_many(queries)
+    assert len(calls) == 1
+    assert [f.temperature if f else None for f in first] == [25.0, 27.0, None]
+
+    # Resolved slots and the raw response are both served from disk
+    second = provider.forecast_many(queries)
+    assert len(calls) == 1
+    assert [f.source if f else None for f in second] == ["cache", "cache", None]
+
+    offline = OpenWeatherProvider(None, cache_dir=str(tmp_path))
+    assert offline.forecast(*queries[1]).temperature == 27.0
+
+
+def test_openweather_failure_resolves_to_none(tmp_path, monkeypatch):
+    def unreachable(url, timeout):
+        raise OSError("network is unreachable")
+    monkeypatch.setattr(weather.urllib.request, "urlopen", unreachable)
+    provider = OpenWeatherProvider("key", cache_dir=str(tmp_path))
+    assert provider.forecast(24.4672, 54.6031, "2025-12-07 12:00:00") is None
+
+
+def test_forecast_for_config_requires_all_fields():
+    provider = StubWeatherProvider(fixture_path=FIXTURE)
+    assert forecast_for_config(provider, {"lat": 24.4672, "lon": 54.6031}) is None
+    config = {"lat": 24.4672, "lon": 54.6031, "race_datetime": "2025-12-07 13:00:00"}
+    assert forecast_for_config(provider, config).temperature == 26.5
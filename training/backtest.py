@@ -0,0 +1,384 @@
+"""Replay the historical seasons through the served race models.
+
+Every round of every season in the columnar store (datasets/columnar/) is
+replayed through each race model as if it were that model's race. The rows
+go through the same path as `/predict/batch`:
+
+    serving.batch.validate_columns -> serving.inference.build_features -> run_model
+
+Each row is built from the season data:
+- qualifying time: `Q_Time`
+- team score: from `features.team_scores` as it stood before the round. For
+  round 1 it is the previous season's final score.
+- rain: 0
+- temperature: the race's default
+
+Rows the API would reject are counted, not predicted.
+
+The datasets have no race-pace column, so `clean_air_race_pace` is
+qualifying time times `--pace-ratio`. That leaves the ordering to the model.
+The models predict a pace, not a position, so they are scored on finishing
+order among the classified finishers of each round:
+- MAE between predicted and actual finishing position, per race model,
+  season, round and driver
+- Spearman rank correlation per round
+
+Each (race, season) is one batch: the whole season is validated round by
+round and predicted in a single model call. The batches run in a spawned
+process pool with one thread per worker. Results are stored per artifact
+version under f1_cache/backtest/<race>/v<version>.json, and `--compare`
+lists every stored version side by side.
+
+`--quantized` replays through the quantized form of each model
+(serving/quantized.py), as served with QUANTIZED_MODELS. It also reports the
+largest difference from the original model's predictions, in seconds. These
+results are stored as v<version>.quantized.json.
+
+Usage (from the repo root):
+    python -m training.backtest --all
+    python -m training.backtest usa qatar --seasons 2025 --jobs 4
+    python -m training.backtest --all --quantized
+    python -m training.backtest --all --compare
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+import joblib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from features.team_scores import available_seasons, driver_code, load_table, scores_as_of
+from training.cache import CACHE_DIR
+from training.incremental import latest_artifact
+from training.parallel import THREAD_ENV_VARS, pin_threads
+from training.races import RACES
+
+BACKTEST_DIR = os.path.join(CACHE_DIR, "backtest")
+# Race pace is assumed this much slower than qualifying; the same for every driver
+DEFAULT_PACE_RATIO = 1.05
+# Retirements say more about reliability than pace, so they are not scored
+CLASSIFIED_STATUSES = ("Finished", "Lapped")
+# Rank correlation is only reported for rounds with at least this many scored rows
+MIN_RANKED_ROWS = 3
+
+
+def served_races() -> List[str]:
+    """Race models the API serves (one per model key)."""
+    return [race for race, cfg in RACES.items() if cfg["model"] != "ffn"]
+
+
+def season_inputs(year: int, store_dir: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Round-sorted replay columns for one season; team scores as of the round before each row."""
+    from seasons.store import load
+
+    season = load(year, store_dir)
+    order = np.argsort(season["RoundNumber"], kind="stable")
+    rounds = np.asarray(season["RoundNumber"])[order]
+    names = season.categories("Driver")
+    codes = np.array([driver_code(str(n)) for n in names])[np.asarray(season["Driver"], dtype=np.intp)[order]]
+    status = season.categories("Status")[np.asarray(season["Status"], dtype=np.intp)[order]]
+
+    table = load_table(year)
+    previous = [y for y in available_seasons() if y < year]
+    carried = scores_as_of(load_table(previous[-1])) if previous else {}
+    team_score = np.full(len(order), np.nan)
+    for r in np.unique(rounds):
+        scores = {**carried, **scores_as_of(table, int(r) - 1)}
+        in_round = rounds == r
+        team_score[in_round] = [scores.get(code, np.nan) for code in codes[in_round]]
+
+    return {
+        "round": rounds.astype(np.int64),
+        "driver_code": codes,
+        "qualifying_time": np.asarray(season.values("Q_Time"), dtype=np.float64)[order],
+        "finish_pos": np.asarray(season.values("FinishPos"), dtype=np.float64)[order],
+        "classified": np.isin(status, CLASSIFIED_STATUSES),
+        "team_score": team_score
+    }
+
+
+def _round_ranks(rounds: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """1-based rank of each value within its round (rows sorted by round)."""
+    order = np.lexsort((values, rounds))
+    starts = np.searchsorted(rounds, rounds[order], side="left")
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(len(values)) - starts + 1
+    return ranks
+
+
+def score(rounds: np.ndarray, codes: np.ndarray, predicted: np.ndarray, finish_pos: np.ndarray) -> Dict[str, Any]:
+    """Position MAE and Spearman correlation of predicted vs actual order, per round and per driver.
+
+    Rows must be sorted by round. Positions are ranks among the scored rows
+    of each round, so both orders run 1..n.
+    """
+    predicted_rank = _round_ranks(rounds, predicted)
+    actual_rank = _round_ranks(rounds, finish_pos)
+    error = (predicted_rank - actual_rank).astype(np.float64)
+
+    round_values, round_idx = np.unique(rounds, return_inverse=True)
+    n = np.bincount(round_idx, minlength=len(round_values)).astype(np.float64)
+    round_mae = np.bincount(round_idx, weights=np.abs(error), minlength=len(round_values)) / np.maximum(n, 1)
+    squared = np.bincount(round_idx, weights=error ** 2, minlength=len(round_values))
+    # Ranks are distinct within a round, so the closed form is exact
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spearman = np.where(n >= MIN_RANKED_ROWS, 1 - 6 * squared / (n * (n ** 2 - 1)), np.nan)
+
+    drivers, driver_idx = np.unique(codes, return_inverse=True)
+    driver_n = np.bincount(driver_idx, minlength=len(drivers))
+    driver_mae = np.bincount(driver_idx, weights=np.abs(error), minlength=len(drivers)) / np.maximum(driver_n, 1)
+    driver_bias = np.bincount(driver_idx, weights=error, minlength=len(drivers)) / np.maximum(driver_n, 1)
+
+    ranked = ~np.isnan(spearman)
+    return {
+        "scored_rows": int(len(error)),
+        "mae": float(np.abs(error).mean()) if len(error) else None,
+        "spearman": float(spearman[ranked].mean()) if ranked.any() else None,
+        "rounds": {
+            str(int(r)): {"rows": int(k), "mae": float(m), "spearman": None if np.isnan(s) else float(s)}
+            for r, k, m, s in zip(round_values, n, round_mae, spearman)
+        },
+        "drivers": {
+            str(code): {"rounds": int(k), "mae": float(m), "mean_error": float(b)}
+            for code, k, m, b in zip(drivers, driver_n, driver_mae, driver_bias)
+        }
+    }
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(seasons: Dict[int, Dict[str, np.ndarray]], quantized: bool = False) -> None:
+    pin_threads(1)
+    _worker["seasons"] = seasons
+    _worker["quantized"] = quantized
+    _worker["artifacts"] = {}
+
+
+def load_served_artifact(race: str) -> Tuple[Dict[str, Any], int, str]:
+    """(artifact, version, path) of the newest artifact of a race, normalized the way main.py loads it."""
+    version, path = latest_artifact(RACES[race]["artifact"])
+    artifact = joblib.load(path)
+    if not (isinstance(artifact, dict) and "model" in artifact):
+        artifact = {"model": artifact, "imputer": None}
+    return artifact, version, path
+
+
+def replay_season(race: str, artifact: Dict[str, Any], inputs: Dict[str, np.ndarray],
+                  pace_ratio: float = DEFAULT_PACE_RATIO, reference: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Validate and predict one season for one race model, then score the predicted order.
+
+    With a `reference` artifact (the original of a quantized model), the
+    largest difference from its predictions is reported as well.
+    """
+    from main import PredictionInput
+    from serving.batch import driver_table, validate_columns
+    from serving.inference import build_features, run_model
+
+    rounds = inputs["round"]
+    n = len(rounds)
+    columns = {
+        "qualifying_time": inputs["qualifying_time"],
+        "clean_air_race_pace": inputs["qualifying_time"] * pace_ratio,
+        "rain_prob": np.zeros(n),
+        "temperature": np.full(n, float(RACES[race]["default_temperature"]))
+    }
+    valid = np.zeros(n, dtype=bool)
+    starts = np.searchsorted(rounds, np.unique(rounds))
+    for start, end in zip(starts, np.append(starts[1:], n)):
+        # Team scores change every round, so each round is checked against its own table
+        known = ~np.isnan(inputs["team_score"][start:end])
+        table = driver_table(dict(zip(inputs["driver_code"][start:end][known], inputs["team_score"][start:end][known])))
+        _, valid[start:end], _ = validate_columns(
+            race, {name: values[start:end] for name, values in columns.items()},
+            inputs["driver_code"][start:end], table, PredictionInput
+        )
+
+    predicted = np.full(n, np.nan)
+    deviation = {}
+    if valid.any():
+        features = build_features(
+            race, columns["qualifying_time"][valid], columns["clean_air_race_pace"][valid],
+            inputs["team_score"][valid], columns["rain_prob"][valid], columns["temperature"][valid]
+        )
+        predicted[valid], _ = run_model(race, artifact["model"], artifact.get("imputer"), features)
+        if reference is not None:
+            original, _ = run_model(race, reference["model"], reference.get("imputer"), features)
+            deviation["max_abs_deviation_s"] = float(np.abs(predicted[valid] - original).max())
+
+    scored = valid & inputs["classified"] & ~np.isnan(inputs["finish_pos"])
+    return {
+        "rows": n,
+        "valid_rows": int(valid.sum()),
+        **deviation,
+        **score(rounds[scored], inputs["driver_code"][scored], predicted[scored], inputs["finish_pos"][scored])
+    }
+
+
+def _replay(race: str, year: int, pace_ratio: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        if race not in _worker["artifacts"]:
+            artifact, version, path = load_served_artifact(race)
+            served = artifact
+            if _worker["quantized"]:
+                from serving.quantized import quantize_artifact
+                served = quantize_artifact(artifact)
+            _worker["artifacts"][race] = (served, artifact, version, path)
+        served, artifact, version, path = _worker["artifacts"][race]
+        reference = artifact if served is not artifact else None
+        result = replay_season(race, served, _worker["seasons"][year], pace_ratio, reference)
+    except Exception as e:
+        return {"race": race, "season": year, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "race": race, "season": year, "version": version, "artifact": os.path.basename(path),
+        "replay_seconds": time.perf_counter() - start, **result
+    }
+
+
+def backtest(races: List[str], seasons: List[int], jobs: Optional[int] = None,
+             pace_ratio: float = DEFAULT_PACE_RATIO, quantized: bool = False) -> List[Dict[str, Any]]:
+    """Replay every (race, season) pair in a process pool; one result per pair."""
+    inputs = {year: season_inputs(year) for year in seasons}
+    tasks = [(race, year) for race in races for year in seasons]
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+
+    saved_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = "1"
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(inputs, quantized)
+        ) as pool:
+            futures = [pool.submit(_replay, race, year, pace_ratio) for race, year in tasks]
+            results = [future.result() for future in as_completed(futures)]
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+    return sorted(results, key=lambda r: (r["race"], r["season"]))
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def summarize(race: str, results: List[Dict[str, Any]], pace_ratio: float, quantized: bool = False) -> Dict[str, Any]:
+    """One race's season results as a stored record, with totals weighted by scored rows."""
+    seasons = {str(r["season"]): {k: v for k, v in r.items() if k not in ("race", "season")} for r in results}
+    scored = [r for r in results if r.get("scored_rows")]
+    total = sum(r["scored_rows"] for r in scored)
+    rounds = [s for r in scored for s in r["rounds"].values() if s["spearman"] is not None]
+    first = next((r for r in results if "version" in r), {})
+    return {
+        "race": race,
+        "version": first.get("version"),
+        "artifact": first.get("artifact"),
+        "pace_ratio": pace_ratio,
+        "quantized": quantized,
+        "max_abs_deviation_s": max((r["max_abs_deviation_s"] for r in results if "max_abs_deviation_s" in r),
+                                   default=None),
+        "scored_rows": total,
+        "mae": sum(r["mae"] * r["scored_rows"] for r in scored) / total if total else None,
+        "spearman": float(np.mean([s["spearman"] for s in rounds])) if rounds else None,
+        "seasons": seasons
+    }
+
+
+def save_result(record: Dict[str, Any], results_dir: str = BACKTEST_DIR) -> str:
+    suffix = ".quantized" if record.get("quantized") else ""
+    path = os.path.join(results_dir, record["race"], f"v{record['version']}{suffix}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def stored_results(race: str, results_dir: str = BACKTEST_DIR) -> List[Dict[str, Any]]:
+    """Every stored backtest of a race, oldest artifact version first (the original before the quantized run)."""
+    race_dir = os.path.join(results_dir, race)
+    records = []
+    for filename in os.listdir(race_dir) if os.path.isdir(race_dir) else []:
+        if filename.startswith("v") and filename.endswith(".json"):
+            with open(os.path.join(race_dir, filename), "r") as f:
+                records.append(json.load(f))
+    return sorted(records, key=lambda r: (r["version"], r.get("quantized", False)))
+
+
+def print_comparison(races: List[str], results_dir: str = BACKTEST_DIR) -> None:
+    print(f"{'race':<10}{'version':>8}{'rows':>7}{'MAE (pos)':>11}{'Spearman':>10}  seasons")
+    for race in races:
+        for record in stored_results(race, results_dir):
+            mae = f"{record['mae']:.3f}" if record["mae"] is not None else "-"
+            rho = f"{record['spearman']:.3f}" if record["spearman"] is not None else "-"
+            version = f"{record['version']}{'q' if record.get('quantized') else ''}"
+            print(f"{race:<10}{version:>8}{record['scored_rows']:>7}{mae:>11}{rho:>10}  "
+                  f"{', '.join(sorted(record['seasons']))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay historical seasons through the served race models")
+    parser.add_argument("races", nargs="*", help=f"Races to backtest: {', '.join(served_races())}")
+    parser.add_argument("--all", action="store_true", help="Every served race")
+    parser.add_argument("--seasons", nargs="+", type=int, help="Seasons to replay (default: every season in the store)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--pace-ratio", type=float, default=DEFAULT_PACE_RATIO,
+                        help="Clean-air race pace sent as qualifying time times this ratio")
+    parser.add_argument("--quantized", action="store_true",
+                        help="Replay through the quantized models and report their deviation from the originals")
+    parser.add_argument("--compare", action="store_true", help="Print the stored results of every version and exit")
+    args = parser.parse_args()
+
+    races = served_races() if args.all else args.races
+    if not races:
+        parser.error("name at least one race or pass --all")
+    unknown = [race for race in races if race not in served_races()]
+    if unknown:
+        parser.error(f"unknown race(s): {', '.join(unknown)}")
+    if args.compare:
+        print_comparison(races)
+        return
+
+    from seasons.store import available_years
+
+    seasons = args.seasons or available_years()
+    start = time.perf_counter()
+    results = backtest(races, seasons, jobs=args.jobs, pace_ratio=args.pace_ratio, quantized=args.quantized)
+    elapsed = time.perf_counter() - start
+
+    for race in races:
+        race_results = [r for r in results if r["race"] == race]
+        for failed in (r for r in race_results if "error" in r):
+            print(f"{race} {failed['season']}: failed: {failed['error']}")
+        succeeded = [r for r in race_results if "error" not in r]
+        if not succeeded:
+            continue
+        record = summarize(race, succeeded, args.pace_ratio, args.quantized)
+        record["artifact_sha256"] = _file_sha256(latest_artifact(RACES[race]["artifact"])[1])
+        path = save_result(record)
+        for r in succeeded:
+            rho = f"{r['spearman']:.3f}" if r["spearman"] is not None else "-"
+            mae = f"{r['mae']:.3f}" if r["mae"] is not None else "-"
+            print(f"{race} v{r['version']} {r['season']}: {r['valid_rows']}/{r['rows']} rows valid, "
+                  f"position MAE {mae}, Spearman {rho} ({r['replay_seconds']:.2f}s)")
+        print(f"{path} saved")
+    print(f"Replayed {len(seasons)} season(s) x {len(races)} race(s) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import json
+import hashlib
+import joblib
+from typing import Any, Callable, Dict, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Overridable so a run can train into a staging directory
+CACHE_DIR = os.getenv("F1_CACHE_DIR") or os.path.join(REPO_ROOT, "f1_cache")
+STAGE_CACHE_DIR = os.path.join(CACHE_DIR, "pipeline")
+MODELS_DIR = os.getenv("F1_MODELS_DIR") or os.path.join(REPO_ROOT, "models")
+
+
+def stage_key(stage: str, inputs: Dict[str, Any]) -> str:
+    """Content hash of a stage's name and inputs.
+
+    Upstream stages are referenced by their keys, so changing anything
+    upstream changes every key below it.
+    """
+    payload = json.dumps({"stage": stage, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def cached_stage(stage: str, inputs: Dict[str, Any], compute: Callable[[], Any], force: bool = False) -> Tuple[Any, str]:
+    """Return (output, key) for a stage, computing it only on a cache miss."""
+    key = stage_key(stage, inputs)
+    path = os.path.join(STAGE_CACHE_DIR, stage, f"{key}.joblib")
+    if not force and os.path.exists(path):
+        print(f"[{stage}] cache hit {key}")
+        return joblib.load(path), key
+
+    print(f"[{stage}] computing {key}")
+    output = compute()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so an interrupted run never leaves a truncated cache entry
+    tmp_path = f"{path}.tmp"
+    joblib.dump(output, tmp_path)
+    os.replace(tmp_path, path)
+    return output, key
@@ -0,0 +1,207 @@
+"""Distil a race model into a small student that serves faster.
+
+The teacher (the artifact the API currently loads) is queried on a dense
+grid covering every input `/predict` accepts for the race. That means
+qualifying time and clean-air pace inside RACE_RANGES with pace slower than
+qualifying, every team score the API serves, rain 0-100 and temperature
+-10 to 70. Candidate students are fitted to those predictions:
+
+    gbr  a shallow GradientBoostingRegressor
+    xgb  a small XGBRegressor (hist)
+    pwl  an additive piecewise-linear model (degree-1 splines + ridge)
+
+Each candidate is scored against the teacher on a fresh random sample of the
+same input space and on the artifact's real holdout rows. Single-row and
+batch latency and pickled size are measured too. The chosen student is
+exported as models/<name>.student.joblib, which the API serves for the
+races listed in STUDENT_MODELS.
+
+Usage (from the repo root):
+    python -m training.distill usa mexico
+    python -m training.distill usa --student pwl
+"""
+import os
+import pickle
+import argparse
+import joblib
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from features.team_scores import serving_scores
+from serving.inference import RACE_RANGES, build_features, run_model
+from training.cache import MODELS_DIR
+from training.incremental import latest_artifact
+from training.races import RACES
+from training.search import measure_latency
+
+RAIN_RANGE = (0.0, 100.0)
+TEMPERATURE_RANGE = (-10.0, 70.0)
+# A student may be at most this much less accurate (holdout MAE, seconds) to be picked
+DEFAULT_MAX_MAE_DELTA = 0.05
+
+
+def make_student(kind: str):
+    if kind == "gbr":
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(n_estimators=60, max_depth=3, learning_rate=0.2, random_state=39)
+    if kind == "xgb":
+        from xgboost import XGBRegressor
+        return XGBRegressor(n_estimators=60, max_depth=3, learning_rate=0.2, tree_method="hist", random_state=39)
+    if kind == "pwl":
+        from sklearn.linear_model import Ridge
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import SplineTransformer
+        return make_pipeline(SplineTransformer(degree=1, n_knots=12), Ridge(alpha=1e-3))
+    raise ValueError(f"Unknown student type '{kind}'")
+
+
+STUDENTS = ["gbr", "xgb", "pwl"]
+
+
+def team_scores() -> np.ndarray:
+    """Distinct team scores the API can look up."""
+    return np.unique(np.fromiter(serving_scores()["drivers"].values(), dtype=np.float64))
+
+
+def input_grid(race: str, scores: np.ndarray, steps: int = 24) -> Dict[str, np.ndarray]:
+    """Dense grid over the valid /predict inputs for a race (as API columns)."""
+    low, high = RACE_RANGES[race]
+    qualifying = np.linspace(low, high, steps)
+    # Pace is qualifying plus a positive gap, clipped to the race window below
+    gap = np.linspace(0.05, high - low, steps)
+    rain = np.linspace(*RAIN_RANGE, 6)
+    temperature = np.linspace(*TEMPERATURE_RANGE, 6)
+    q, g, s, r, t = (a.ravel() for a in np.meshgrid(qualifying, gap, scores, rain, temperature, indexing="ij"))
+    keep = q + g <= high
+    return {"qualifying_time": q[keep], "clean_air_race_pace": (q + g)[keep], "team_score": s[keep],
+            "rain_prob": r[keep], "temperature": t[keep]}
+
+
+def random_inputs(race: str, scores: np.ndarray, n: int, seed: int = 39) -> Dict[str, np.ndarray]:
+    """Uniform random valid inputs, for scoring students off the training grid."""
+    rng = np.random.default_rng(seed)
+    low, high = RACE_RANGES[race]
+    qualifying = rng.uniform(low, high, n)
+    return {
+        "qualifying_time": qualifying,
+        "clean_air_race_pace": rng.uniform(qualifying, high),
+        "team_score": rng.choice(scores, n),
+        "rain_prob": rng.uniform(*RAIN_RANGE, n),
+        "temperature": rng.uniform(*TEMPERATURE_RANGE, n)
+    }
+
+
+def api_features(race: str, imputer: Any, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+    """The imputed feature matrix `run_model` would hand to the model."""
+    features = build_features(race, inputs["qualifying_time"], inputs["clean_air_race_pace"],
+                              inputs["team_score"], inputs["rain_prob"], inputs["temperature"])
+    return imputer.transform(features) if imputer else features
+
+
+def _mae(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(np.abs(np.asarray(a) - np.asarray(b)))) if len(b) else float("nan")
+
+
+def distill(race: str, artifact: Dict[str, Any], scores: np.ndarray, students: List[str] = STUDENTS,
+            steps: int = 24, eval_rows: int = 20000) -> List[Dict[str, Any]]:
+    """Fit every candidate student; returns one report per candidate plus the teacher's."""
+    teacher, imputer = artifact["model"], artifact.get("imputer")
+    X_grid = api_features(race, imputer, input_grid(race, scores, steps))
+    y_grid, _ = run_model(race, teacher, None, X_grid)
+    X_eval = api_features(race, imputer, random_inputs(race, scores, eval_rows))
+    y_eval, _ = run_model(race, teacher, None, X_eval)
+
+    holdout = artifact.get("holdout") or {"X": np.empty((0, X_grid.shape[1])), "y": np.empty(0)}
+    holdout_X, holdout_y = np.asarray(holdout["X"], dtype=np.float64), np.asarray(holdout["y"], dtype=np.float64)
+    teacher_holdout = _mae(run_model(race, teacher, None, holdout_X)[0], holdout_y) if len(holdout_y) else float("nan")
+
+    reports = [{
+        "student": "teacher",
+        "model": teacher,
+        "grid_mae_vs_teacher": 0.0,
+        "holdout_mae": teacher_holdout,
+        "size_kb": len(pickle.dumps(teacher)) / 1024,
+        **measure_latency(teacher, X_eval)
+    }]
+    for kind in students:
+        student = make_student(kind).fit(X_grid, y_grid)
+        reports.append({
+            "student": kind,
+            "model": student,
+            "grid_mae_vs_teacher": _mae(student.predict(X_eval), y_eval),
+            "holdout_mae": _mae(student.predict(holdout_X), holdout_y) if len(holdout_y) else float("nan"),
+            "size_kb": len(pickle.dumps(student)) / 1024,
+            **measure_latency(student, X_eval)
+        })
+    return reports
+
+
+def pick_student(reports: List[Dict[str, Any]], max_mae_delta: float = DEFAULT_MAX_MAE_DELTA) -> Optional[Dict[str, Any]]:
+    """Fastest student whose holdout (or, without holdout rows, teacher-agreement) MAE is within the budget."""
+    teacher = reports[0]
+    eligible = []
+    for report in reports[1:]:
+        if np.isnan(teacher["holdout_mae"]):
+            delta = report["grid_mae_vs_teacher"]
+        else:
+            delta = report["holdout_mae"] - teacher["holdout_mae"]
+        if delta <= max_mae_delta:
+            eligible.append(report)
+    return min(eligible, key=lambda r: r["single_row_us"], default=None)
+
+
+def export_student(race: str, artifact: Dict[str, Any], teacher_version: int, report: Dict[str, Any]) -> str:
+    """Write models/<name>.student.joblib with the teacher's imputer (the student was fitted on imputed features)."""
+    name = RACES[race]["artifact"][:-len(".joblib")]
+    path = os.path.join(MODELS_DIR, f"{name}.student.joblib")
+    tmp_path = f"{path}.tmp"
+    joblib.dump({
+        "model": report["model"],
+        "imputer": artifact.get("imputer"),
+        "features": artifact.get("features"),
+        "version": teacher_version,
+        "student": report["student"],
+        "teacher_version": teacher_version
+    }, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def print_report(race: str, reports: List[Dict[str, Any]]) -> None:
+    teacher = reports[0]
+    print(f"\n{race}: {'model':<8}{'vs teacher':>11}{'holdout MAE':>13}{'1 row (us)':>12}{'1k rows (us)':>14}{'size (KB)':>11}")
+    for r in reports:
+        print(f"{'':<{len(race) + 2}}{r['student']:<8}{r['grid_mae_vs_teacher']:>11.3f}{r['holdout_mae']:>13.3f}"
+              f"{r['single_row_us']:>12.0f}{r['batch_1000_us']:>14.0f}{r['size_kb']:>11.0f}")
+    for r in reports[1:]:
+        print(f"  {r['student']}: {teacher['single_row_us'] / r['single_row_us']:.1f}x faster per row, "
+              f"{teacher['size_kb'] / r['size_kb']:.1f}x smaller")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distil race models into compact student models")
+    parser.add_argument("races", nargs="+", help=f"Races to distil: {', '.join(r for r in RACES if RACES[r]['model'] != 'ffn')}")
+    parser.add_argument("--student", choices=STUDENTS, help="Export this student instead of the fastest one within budget")
+    parser.add_argument("--max-mae-delta", type=float, default=DEFAULT_MAX_MAE_DELTA,
+                        help="Holdout MAE (s) a student may lose against the teacher")
+    parser.add_argument("--steps", type=int, default=24, help="Grid points per lap-time axis")
+    args = parser.parse_args()
+
+    scores = team_scores()
+    for race in args.races:
+        if race not in RACES or RACES[race]["model"] == "ffn":
+            parser.error(f"'{race}' has no tree model to distil")
+        version, path = latest_artifact(RACES[race]["artifact"])
+        artifact = joblib.load(path)
+        reports = distill(race, artifact, scores, steps=args.steps)
+        print_report(race, reports)
+
+        chosen = next(r for r in reports if r["student"] == args.student) if args.student else pick_student(reports, args.max_mae_delta)
+        if chosen is None:
+            print(f"  no student within {args.max_mae_delta}s of the teacher; nothing exported")
+            continue
+        print(f"  {export_student(race, artifact, version, chosen)} saved ({chosen['student']})")
+
+
+if __name__ == "__main__":
+    main()
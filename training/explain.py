@@ -0,0 +1,151 @@
+"""SHAP values and summary plots for the trained race models.
+
+Tree models are explained with their native contributions (XGBoost's
+`pred_contribs`, SHAP's TreeExplainer for GBR); the FFN uses KernelExplainer
+on a small sampled background. Values are saved to f1_cache/shap/<race>.npz
+together with the rows they explain, so plots can be re-rendered without
+recomputing anything:
+
+    python -m training.explain --all --jobs 4         # compute (cached) and render
+    python -m training.explain --all --render-only    # re-render from the saved arrays
+"""
+import os
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from training.cache import CACHE_DIR, MODELS_DIR
+from training.races import RACES
+
+SHAP_DIR = os.path.join(CACHE_DIR, "shap")
+FFN_BACKGROUND_ROWS = 20
+FFN_KERNEL_SAMPLES = 200
+
+
+def tree_contributions(model, X: pd.DataFrame) -> np.ndarray:
+    """Exact per-feature SHAP values of a tree ensemble, shape (rows, features)."""
+    if hasattr(model, "get_booster"):
+        import xgboost as xgb
+
+        booster = model.get_booster()
+        contribs = booster.predict(xgb.DMatrix(X.to_numpy(), feature_names=booster.feature_names), pred_contribs=True)
+        # The last column is the bias term
+        return contribs[:, :-1]
+    import shap
+
+    return np.asarray(shap.TreeExplainer(model).shap_values(X))
+
+
+def sampled_kernel_contributions(predict: Callable[[np.ndarray], np.ndarray], X: pd.DataFrame,
+                                 background: pd.DataFrame) -> np.ndarray:
+    """Model-agnostic SHAP values against a small random background sample."""
+    import shap
+
+    sample = shap.sample(background.to_numpy(), min(FFN_BACKGROUND_ROWS, len(background)), random_state=39)
+    explainer = shap.KernelExplainer(predict, sample)
+    return np.asarray(explainer.shap_values(X.to_numpy(), nsamples=FFN_KERNEL_SAMPLES, silent=True))
+
+
+def explain(cfg: Dict[str, Any], trained: Dict[str, Any], dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """SHAP values for the training rows of a trained model, with those rows."""
+    X = pd.DataFrame(trained["imputer"].transform(dataset["X"]), columns=trained["features"])
+    X_train = X.loc[trained["train_index"]]
+    if cfg["model"] == "ffn":
+        from training.pipeline import _keras_from_bytes
+
+        model = _keras_from_bytes(trained["model"])
+        values = sampled_kernel_contributions(lambda rows: model.predict(rows, verbose=0).ravel(), X_train, X_train)
+    else:
+        values = tree_contributions(trained["model"], X_train)
+    return {"values": values, "X": X_train.to_numpy(), "features": trained["features"]}
+
+
+def shap_path(race: str) -> str:
+    return os.path.join(SHAP_DIR, f"{race}.npz")
+
+
+def save_explanation(race: str, explanation: Dict[str, Any]) -> str:
+    os.makedirs(SHAP_DIR, exist_ok=True)
+    path = shap_path(race)
+    tmp_path = f"{path[:-4]}.tmp.npz"
+    np.savez(
+        tmp_path,
+        values=np.asarray(explanation["values"], dtype=np.float64),
+        X=np.asarray(explanation["X"], dtype=np.float64),
+        features=np.asarray(explanation["features"], dtype=str)
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_explanation(race: str) -> Dict[str, Any]:
+    with np.load(shap_path(race)) as data:
+        return {"values": data["values"], "X": data["X"], "features": data["features"].tolist()}
+
+
+def render(race: str) -> str:
+    """Draw models/<shap_plot> for a race from its saved SHAP arrays."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import shap
+
+    explanation = load_explanation(race)
+    shap.summary_plot(explanation["values"], explanation["X"], feature_names=explanation["features"], show=False)
+    plt.tight_layout()
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = os.path.join(MODELS_DIR, RACES[race]["shap_plot"])
+    plt.savefig(path)
+    plt.close("all")
+    print(f"{path} saved")
+    return path
+
+
+def _explain_and_render(race: str, force: bool, offline: bool, render_only: bool) -> str:
+    if not render_only:
+        from training.pipeline import explain_race, train_race
+
+        cfg, dataset, trained, trained_key = train_race(race, force=force, offline=offline)
+        explain_race(race, trained, trained_key, dataset, force=force, render_plot=False)
+    return render(race)
+
+
+def explain_races(races: List[str], jobs: int, force: bool = False, offline: bool = False,
+                  render_only: bool = False) -> None:
+    """Explain and plot several races in parallel worker processes."""
+    races = [race for race in races if RACES[race]["shap_plot"]]
+    with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(races))),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(_explain_and_render, race, force, offline, render_only): race for race in races}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"SHAP error for {futures[future]}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute SHAP values and render the summary plots")
+    parser.add_argument("races", nargs="*", help=f"Races to explain: {', '.join(RACES)}")
+    parser.add_argument("--all", action="store_true", help="Explain every configured race")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--render-only", action="store_true", help="Only redraw plots from saved SHAP arrays")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs")
+    parser.add_argument("--offline", action="store_true", help="Read FastF1 data and forecasts from f1_cache only")
+    args = parser.parse_args()
+
+    races = list(RACES) if args.all else args.races
+    if not races:
+        parser.error("name at least one race or pass --all")
+    for race in races:
+        if race not in RACES:
+            parser.error(f"unknown race '{race}'")
+    explain_races(races, args.jobs, force=args.force, offline=args.offline, render_only=args.render_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Lap-only extraction from FastF1 sessions into columnar tables.
+
+For every (year, round, session) two tables are written under f1_cache/laps/:
+
+    <year>_<round>_<session>_laps.parquet    Driver, lap number, lap/sector times and session
+                                             time in seconds, in/out-lap flags
+    <year>_<round>_<session>_drivers.npz     per-driver mean times (the training aggregates)
+
+Once they exist, later runs read them directly and FastF1 is not imported at all.
+Pass `offline=True` (or set F1_OFFLINE=1) to build them from f1_cache without
+touching the network.
+"""
+import os
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+from training.cache import CACHE_DIR
+
+TABLE_DIR = os.path.join(CACHE_DIR, "laps")
+
+LAP_COLUMNS = ["LapTime", "Sector1Time", "Sector2Time", "Sector3Time"]
+SECONDS_COLUMNS = [f"{col} (s)" for col in LAP_COLUMNS]
+# Where each lap sits in the race, for features.clean_air: session time at
+# the end of the lap and whether the car entered or left the pits on it
+CONTEXT_COLUMNS = ["LapNumber", "Time (s)", "InLap", "OutLap"]
+
+
+def table_paths(year: int, round_number: int, session: str = "R") -> Tuple[str, str]:
+    stem = os.path.join(TABLE_DIR, f"{year}_{round_number:02d}_{session}")
+    return f"{stem}_laps.parquet", f"{stem}_drivers.npz"
+
+
+def timedelta_seconds(values) -> np.ndarray:
+    """Float seconds for a block of timedeltas in one pass; NaT becomes NaN."""
+    nanoseconds = np.asarray(values, dtype="timedelta64[ns]")
+    seconds = nanoseconds.astype(np.int64) / 1e9
+    seconds[np.isnat(nanoseconds)] = np.nan
+    return seconds
+
+
+def load_session_laps(year: int, round_number: int, session: str = "R", offline: bool = False) -> pd.DataFrame:
+    """Per-lap times in seconds, loading only the lap data of a FastF1 session."""
+    import fastf1
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fastf1.Cache.enable_cache(CACHE_DIR)
+    if offline or os.getenv("F1_OFFLINE") == "1":
+        fastf1.Cache.offline_mode(True)
+    race_session = fastf1.get_session(year, round_number, session)
+    # Telemetry, weather and race control messages are never used by the models
+    race_session.load(laps=True, telemetry=False, weather=False, messages=False)
+
+    laps = race_session.laps
+    seconds = timedelta_seconds(laps[LAP_COLUMNS].to_numpy())
+    table = pd.DataFrame(seconds, columns=SECONDS_COLUMNS)
+    table.insert(0, "Driver", laps["Driver"].to_numpy(dtype=str))
+    table["LapNumber"] = laps["LapNumber"].to_numpy(dtype=np.float64)
+    table["Time (s)"] = timedelta_seconds(laps["Time"].to_numpy())
+    table["InLap"] = laps["PitInTime"].notna().to_numpy()
+    table["OutLap"] = laps["PitOutTime"].notna().to_numpy()
+    return table
+
+
+def aggregate_laps(laps: pd.DataFrame) -> pd.DataFrame:
+    """Per-driver mean sector and lap times over laps with every timing present.
+
+    Drivers are returned in sorted order, matching `groupby("Driver")`.
+    """
+    seconds = laps[SECONDS_COLUMNS].to_numpy(dtype=np.float64)
+    complete = ~np.isnan(seconds).any(axis=1)
+    drivers, codes = np.unique(laps["Driver"].to_numpy(dtype=str)[complete], return_inverse=True)
+    counts = np.bincount(codes, minlength=len(drivers))
+    sums = np.stack(
+        [np.bincount(codes, weights=column, minlength=len(drivers)) for column in seconds[complete].T],
+        axis=1
+    )
+    means = sums / counts[:, None] if len(drivers) else sums
+
+    aggregates = pd.DataFrame(means, columns=SECONDS_COLUMNS)
+    aggregates.insert(0, "Driver", drivers)
+    aggregates["TotalSectorTime (s)"] = (
+        aggregates["Sector1Time (s)"]
+        + aggregates["Sector2Time (s)"]
+        + aggregates["Sector3Time (s)"]
+    )
+    return aggregates
+
+
+def _save_laps(laps: pd.DataFrame, path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    laps.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _save_aggregates(aggregates: pd.DataFrame, path: str) -> None:
+    # np.savez appends .npz to names without it, so keep the suffix on the temp file
+    tmp_path = f"{path[:-4]}.tmp.npz"
+    # Drivers are stored as fixed-width unicode so the file loads without pickle
+    arrays = {
+        column: aggregates[column].to_numpy(dtype=str if column == "Driver" else np.float64)
+        for column in aggregates.columns
+    }
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _load_aggregates(path: str) -> pd.DataFrame:
+    with np.load(path) as data:
+        return pd.DataFrame({column: data[column] for column in data.files})
+
+
+def session_tables(year: int, round_number: int, session: str = "R", force: bool = False,
+                   offline: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(laps, per-driver aggregates) for one session, extracting them on first use."""
+    laps_path, drivers_path = table_paths(year, round_number, session)
+    if not force and os.path.exists(laps_path) and os.path.exists(drivers_path):
+        laps = pd.read_parquet(laps_path)
+        # Tables extracted before the context columns existed are rebuilt once
+        if set(CONTEXT_COLUMNS) <= set(laps.columns):
+            return laps, _load_aggregates(drivers_path)
+
+    laps = load_session_laps(year, round_number, session, offline=offline)
+    aggregates = aggregate_laps(laps)
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    _save_laps(laps, laps_path)
+    _save_aggregates(aggregates, drivers_path)
+    print(f"{laps_path} saved ({len(laps)} laps, {len(aggregates)} drivers)")
+    return laps, aggregates
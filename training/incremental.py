@@ -0,0 +1,174 @@
+"""Update a trained race model with a new race weekend instead of retraining.
+
+XGBoost models continue boosting from the existing booster and GBR models
+add stages with `warm_start`. Both fit only the new rows, so the cost of an
+update grows with the new weekend, not with the full history. The imputer
+from the original training run is reused unchanged.
+
+Every update is checked against a holdout set: the previous artifact's
+holdout rows plus a slice of the new weekend. The updated model is
+written only if its holdout MAE is no worse than the current model's by
+more than `tolerance`. It is saved as models/<name>.v<N>.joblib, and
+`main.lifespan` loads the highest version for each race.
+
+Usage (from the repo root):
+    python -m training.incremental usa --session 2025 19
+"""
+import os
+import re
+import copy
+import time
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+from sklearn.model_selection import train_test_split
+
+from training.cache import MODELS_DIR
+from training.races import RACES
+
+DEFAULT_ROUNDS = 50
+DEFAULT_TOLERANCE = 0.05
+VERSIONED_ARTIFACT = re.compile(r"^(?P<stem>.+?)(?:\.v(?P<version>\d+))?\.joblib$")
+
+
+def artifact_versions(artifact: str, models_dir: str = MODELS_DIR) -> Dict[int, str]:
+    """{version: path} for a race's artifact (the unversioned file is version 1)."""
+    stem = artifact[:-len(".joblib")]
+    versions = {}
+    for filename in os.listdir(models_dir) if os.path.isdir(models_dir) else []:
+        match = VERSIONED_ARTIFACT.match(filename)
+        if match and match["stem"] == stem:
+            versions[int(match["version"] or 1)] = os.path.join(models_dir, filename)
+    return versions
+
+
+def latest_artifact(artifact: str, models_dir: str = MODELS_DIR) -> Tuple[int, str]:
+    versions = artifact_versions(artifact, models_dir)
+    if not versions:
+        raise FileNotFoundError(f"No trained artifact for {artifact} in {models_dir}; run training.pipeline first")
+    version = max(versions)
+    return version, versions[version]
+
+
+def _mae(model, X: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean(np.abs(model.predict(X) - y))) if len(y) else float("nan")
+
+
+def continue_training(model, X_new: pd.DataFrame, y_new: np.ndarray, rounds: int):
+    """Copy of `model` with `rounds` more trees fitted on the new rows only."""
+    if hasattr(model, "get_booster"):
+        from xgboost import XGBRegressor
+
+        params = model.get_params()
+        params["n_estimators"] = rounds
+        updated = XGBRegressor(**params)
+        updated.fit(X_new, y_new, xgb_model=model.get_booster())
+        return updated
+
+    # warm_start keeps the fitted stages and starts boosting from their predictions on X_new
+    updated = copy.deepcopy(model)
+    updated.set_params(warm_start=True, n_estimators=model.n_estimators + rounds)
+    updated.fit(X_new, y_new)
+    return updated
+
+
+def update_artifact(artifact: Dict[str, Any], X_new: pd.DataFrame, y_new: np.ndarray,
+                    rounds: int = DEFAULT_ROUNDS, tolerance: float = DEFAULT_TOLERANCE,
+                    test_size: float = 0.2) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """(updated artifact or None if the guardrail rejected it, report)."""
+    features = artifact["features"]
+    X_new = pd.DataFrame(artifact["imputer"].transform(X_new[features]), columns=features)
+    y_new = np.asarray(y_new, dtype=np.float64)
+    if len(y_new) > 1:
+        X_fit, X_hold, y_fit, y_hold = train_test_split(X_new, y_new, test_size=test_size, random_state=39)
+    else:
+        X_fit, X_hold, y_fit, y_hold = X_new, X_new.iloc[:0], y_new, y_new[:0]
+
+    previous = artifact.get("holdout") or {"X": np.empty((0, len(features))), "y": np.empty(0)}
+    holdout_X = pd.DataFrame(np.vstack([previous["X"], X_hold.to_numpy()]), columns=features)
+    holdout_y = np.concatenate([previous["y"], y_hold])
+
+    start = time.perf_counter()
+    model = continue_training(artifact["model"], X_fit, y_fit, rounds)
+    update_seconds = time.perf_counter() - start
+
+    before, after = _mae(artifact["model"], holdout_X, holdout_y), _mae(model, holdout_X, holdout_y)
+    accepted = not len(holdout_y) or after <= before * (1 + tolerance)
+    report = {
+        "version": artifact.get("version", 1) + 1 if accepted else artifact.get("version", 1),
+        "accepted": accepted,
+        "new_rows": int(len(y_fit)),
+        "holdout_rows": int(len(holdout_y)),
+        "holdout_mae_before": before,
+        "holdout_mae_after": after,
+        "update_seconds": update_seconds
+    }
+    if not accepted:
+        return None, report
+    updated = {
+        **artifact,
+        "model": model,
+        "version": report["version"],
+        "parent_version": artifact.get("version", 1),
+        "holdout": {"X": holdout_X.to_numpy(), "y": holdout_y}
+    }
+    return updated, report
+
+
+def save_version(artifact: Dict[str, Any], name: str, models_dir: str = MODELS_DIR) -> str:
+    """Write models/<stem>.v<N>.joblib through a temporary file."""
+    path = os.path.join(models_dir, f"{name[:-len('.joblib')]}.v{artifact['version']}.joblib")
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def update_race(race: str, X_new: pd.DataFrame, y_new: np.ndarray, rounds: int = DEFAULT_ROUNDS,
+                tolerance: float = DEFAULT_TOLERANCE, models_dir: str = MODELS_DIR) -> Dict[str, Any]:
+    cfg = RACES[race]
+    if cfg["model"] not in ("gbr", "xgb"):
+        raise ValueError(f"'{race}' uses a {cfg['model']} model; only gbr and xgb models can be updated")
+    _, path = latest_artifact(cfg["artifact"], models_dir)
+    updated, report = update_artifact(joblib.load(path), X_new, y_new, rounds, tolerance)
+    if updated is not None:
+        report["path"] = save_version(updated, cfg["artifact"], models_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add a race weekend to a trained model without retraining it")
+    parser.add_argument("race", help=f"Race model to update: {', '.join(r for r in RACES if RACES[r]['model'] != 'ffn')}")
+    parser.add_argument("--session", nargs=2, type=int, required=True, metavar=("YEAR", "ROUND"),
+                        help="Race weekend whose laps are appended")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="Trees / boosting rounds to add")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative holdout MAE regression")
+    parser.add_argument("--offline", action="store_true", help="Read FastF1 data and forecasts from f1_cache only")
+    args = parser.parse_args()
+
+    from features.clean_air import pace_by_driver, session_pace
+    from features.weather import provider_from_env
+    from training.extract import session_tables
+    from training.pipeline import build_features, resolve_weather, session_team_scores
+
+    cfg = RACES[args.race]
+    laps, sectors = session_tables(*args.session, offline=args.offline)
+    weather = resolve_weather([args.race], provider_from_env(args.offline))[args.race]
+    team_scores, _ = session_team_scores({**cfg, "session": (*args.session, "R")})
+    clean_air_pace = pace_by_driver(session_pace(*args.session, laps=laps))
+    dataset = build_features(cfg, sectors, weather, team_scores, clean_air_pace)
+    report = update_race(args.race, dataset["X"], dataset["y"].to_numpy(), args.rounds, args.tolerance)
+
+    status = "accepted" if report["accepted"] else "rejected by the guardrail"
+    print(f"{args.race} v{report['version']} {status}: {report['new_rows']} new rows in {report['update_seconds']:.2f}s, "
+          f"holdout MAE {report['holdout_mae_before']:.3f} -> {report['holdout_mae_after']:.3f} "
+          f"({report['holdout_rows']} rows)")
+    if report["accepted"]:
+        print(f"{report['path']} saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Train several races concurrently, one fresh process per race.
+
+Each worker is limited to `threads` BLAS/OpenMP/XGBoost threads so that
+`jobs * threads` stays within the machine's cores. Workers are started with
+`spawn` and their thread limits are set in the environment before NumPy or
+XGBoost is imported in them. On Python 3.11+ every race runs in its own
+process, so the peak RSS reported for it is its own; older versions reuse
+workers, and a race's peak RSS can include an earlier race's.
+"""
+import os
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+def default_threads(jobs: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, jobs))
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def pin_threads(threads: int) -> None:
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    # Covers BLAS libraries that were loaded before the variables took effect
+    threadpool_limits(threads)
+
+
+def _train_one(race: str, force: bool, with_shap: bool, offline: bool,
+               weather: Tuple[float, float]) -> Dict[str, Any]:
+    from training.pipeline import run_race
+
+    start = time.perf_counter()
+    result = run_race(race, force=force, with_shap=with_shap, offline=offline, weather=weather)
+    result["wall_seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def train_races(races: List[str], jobs: int, threads: Optional[int] = None, force: bool = False,
+                with_shap: bool = True, offline: bool = False) -> List[Dict[str, Any]]:
+    """Train `races` in up to `jobs` worker processes and report time and memory per race."""
+    from features.weather import provider_from_env
+    from training.pipeline import resolve_weather
+
+    threads = threads or default_threads(jobs)
+    # One bulk forecast lookup here instead of one per worker
+    weather = resolve_weather(races, provider_from_env(offline))
+
+    # Spawned workers inherit this environment, so the limits apply before
+    # their first NumPy/XGBoost import; it is restored once the pool is done
+    saved_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+    start = time.perf_counter()
+    try:
+        results = _run_pool(races, jobs, threads, force, with_shap, offline, weather)
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+    total = time.perf_counter() - start
+
+    print(f"\n{'race':<14}{'wall (s)':>10}{'peak RSS (MB)':>16}{'MAE (s)':>10}")
+    for result in sorted(results, key=lambda r: races.index(r["race"])):
+        if "error" in result:
+            print(f"{result['race']:<14}{'failed':>10}")
+            continue
+        print(f"{result['race']:<14}{result['wall_seconds']:>10.1f}{result['peak_rss_mb']:>16.0f}{result['mae']:>10.2f}")
+    print(f"{len(races)} races in {total:.1f}s with {jobs} workers x {threads} threads")
+    return results
+
+
+def _run_pool(races: List[str], jobs: int, threads: int, force: bool, with_shap: bool, offline: bool,
+              weather: Dict[str, Tuple[float, float]]) -> List[Dict[str, Any]]:
+    results = []
+    # max_tasks_per_child is new in Python 3.11
+    fresh_workers = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(races)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=pin_threads,
+        initargs=(threads,),
+        **fresh_workers
+    ) as pool:
+        futures = {
+            pool.submit(_train_one, race, force, with_shap, offline, weather[race]): race
+            for race in races
+        }
+        for future in as_completed(futures):
+            race = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"{race} failed: {e}")
+                results.append({"race": race, "error": str(e)})
+    return results
@@ -0,0 +1,315 @@
+"""Staged, cached training pipeline shared by every race.
+
+    extract laps -> build features -> train -> explain -> export
+
+Lap tables come from `training.extract`; every later stage's output is cached
+under f1_cache/pipeline/<stage>/ keyed by the hash of its inputs (including the
+keys of the stages it depends on), so e.g. changing only hyperparameters reruns
+only training and what follows it.
+
+Usage (from the repo root):
+    python -m training.pipeline usa mexico
+    python -m training.pipeline --all --force
+    python -m training.pipeline --all --jobs 4
+"""
+import os
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+import joblib
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Tuple
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from features.clean_air import pace_by_driver, session_pace
+from features.team_scores import load_table, scores_as_of
+from features.weather import WeatherProvider, provider_from_env
+from serving.drift import reference_from_training, reference_path, save_reference
+from training.cache import MODELS_DIR, cached_stage, stage_key
+from training.explain import explain, render, save_explanation
+from training.extract import session_tables
+from training.races import RACES
+
+load_dotenv()
+
+# Bump when train()'s output changes shape so older cached entries are not reused
+TRAIN_OUTPUT_VERSION = 2
+
+def resolve_weather(races: List[str], provider: WeatherProvider) -> Dict[str, Tuple[float, float]]:
+    """(rain probability, temperature) per race, in one bulk lookup; defaults where no forecast exists."""
+    configs = [RACES[race] for race in races]
+    forecasts = provider.forecast_many([(cfg["lat"], cfg["lon"], cfg["forecast_time"]) for cfg in configs])
+    return {
+        race: (forecast.rain_probability, forecast.temperature) if forecast else (0, cfg["default_temperature"])
+        for race, cfg, forecast in zip(races, configs, forecasts)
+    }
+
+
+def session_team_scores(cfg: Dict[str, Any]) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """Team scores as they stood before the race weekend the session comes from, and their source."""
+    year, round_number, _ = cfg["session"]
+    table = load_table(year)
+    return scores_as_of(table, round_number - 1), {"version": table["version"], "as_of_round": round_number - 1}
+
+
+def build_features(cfg: Dict[str, Any], sectors: pd.DataFrame, weather: Tuple[float, float],
+                   team_scores: Dict[str, float], clean_air_pace: Dict[str, float]) -> Dict[str, Any]:
+    """Assemble the model matrix X (in the race's feature order), target y and driver list."""
+    rain_probability, temperature = weather
+    data = pd.DataFrame({
+        "Driver": list(cfg["qualifying"]),
+        "QualifyingTime": list(cfg["qualifying"].values())
+    })
+    # Drivers without enough clean-air laps are left to the imputer
+    data["CleanAirRacePace (s)"] = data["Driver"].map(clean_air_pace)
+
+    # Drivers without a race in that season yet are left to the imputer
+    data["TeamPerformanceScore"] = data["Driver"].map(team_scores)
+
+    data = data.merge(sectors[["Driver", "TotalSectorTime (s)"]], on="Driver", how="left")
+    data["RainProbability"] = rain_probability
+    data["Temperature"] = temperature
+    data["QualifyingTime (s)"] = data["QualifyingTime"]
+
+    # Only drivers who set laps in the reference session have a target
+    data = data[data["Driver"].isin(sectors["Driver"])]
+    y = sectors.set_index("Driver")["LapTime (s)"].reindex(data["Driver"])
+    keep = y.notna().to_numpy()
+    data = data[keep].reset_index(drop=True)
+    return {
+        "drivers": data["Driver"].tolist(),
+        "X": data[cfg["features"]],
+        "y": y[keep].reset_index(drop=True)
+    }
+
+
+def _keras_to_bytes(model) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.keras")
+        model.save(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def _keras_from_bytes(data: bytes):
+    from tensorflow import keras
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.keras")
+        with open(path, "wb") as f:
+            f.write(data)
+        return keras.models.load_model(path)
+
+
+def _fit_ffn(params: Dict[str, Any], X_train: pd.DataFrame, y_train: pd.Series):
+    import tensorflow as tf
+    from tensorflow.keras import layers, models, callbacks
+
+    model = models.Sequential(
+        [layers.Input(shape=(X_train.shape[1],))]
+        + [layers.Dense(units, activation="relu") for units in params["hidden_units"]]
+        + [layers.Dense(1)]
+    )
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=params["learning_rate"]), loss="mae")
+    model.fit(
+        X_train.to_numpy(),
+        y_train.to_numpy(),
+        epochs=params["epochs"],
+        batch_size=params["batch_size"],
+        verbose=0,
+        callbacks=[callbacks.EarlyStopping(patience=params["patience"], restore_best_weights=True)]
+    )
+    return model
+
+
+def make_model(kind: str, params: Dict[str, Any]):
+    """Unfitted tree model for a config's `model` / `params`."""
+    if kind == "gbr":
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(**params)
+    if kind == "xgb":
+        from xgboost import XGBRegressor
+        # Honour the per-worker thread limit set by training.parallel
+        threads = os.getenv("OMP_NUM_THREADS")
+        return XGBRegressor(**{"n_jobs": int(threads) if threads else None, **params})
+    raise ValueError(f"Unknown model type '{kind}'")
+
+
+def train(cfg: Dict[str, Any], dataset: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit the imputer and model; returns the fitted objects plus holdout MAE."""
+    features = cfg["features"]
+    imputer = SimpleImputer(strategy="median")
+    X = pd.DataFrame(imputer.fit_transform(dataset["X"]), columns=features)
+    y = dataset["y"]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=cfg["test_size"], random_state=39
+    )
+
+    if cfg["model"] == "ffn":
+        model = _fit_ffn(cfg["params"], X_train, y_train)
+        predict = lambda frame: model.predict(frame.to_numpy(), verbose=0).ravel()
+    else:
+        model = make_model(cfg["model"], cfg["params"])
+        model.fit(X_train, y_train)
+        predict = model.predict
+
+    mae = float(mean_absolute_error(y_test, predict(X_test))) if len(y_test) else float("nan")
+    predictions = predict(X)
+    return {
+        "model": _keras_to_bytes(model) if cfg["model"] == "ffn" else model,
+        "imputer": imputer,
+        "features": features,
+        "mae": mae,
+        "train_index": X_train.index.to_numpy(),
+        "holdout": {"X": X_test.to_numpy(), "y": y_test.to_numpy()},
+        "predictions": np.asarray(predictions, dtype=np.float64)
+    }
+
+
+def export(cfg: Dict[str, Any], trained: Dict[str, Any]) -> str:
+    """Write the artifact `main.lifespan` loads into models/.
+
+    The file is written under a temporary name (which lifespan ignores) and
+    renamed into place, so a half-written artifact is never loaded.
+    """
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    path = os.path.join(MODELS_DIR, cfg["artifact"])
+    tmp_path = f"{path}.tmp"
+    if cfg["model"] == "ffn":
+        with open(tmp_path, "wb") as f:
+            f.write(trained["model"])
+    else:
+        # The holdout rows are kept for training.incremental's guardrail
+        joblib.dump(
+            {
+                "model": trained["model"],
+                "imputer": trained["imputer"],
+                "features": trained["features"],
+                "version": 1,
+                "holdout": trained["holdout"]
+            },
+            tmp_path
+        )
+    os.replace(tmp_path, path)
+    print(f"{path} saved successfully")
+    return path
+
+
+def prepare_dataset(race: str, force: bool = False, offline: bool = False,
+                    weather: Optional[Tuple[float, float]] = None) -> Tuple[Dict[str, Any], str]:
+    """(dataset, key) from the extract and features stages.
+
+    `weather` is looked up through the configured provider when not given.
+    """
+    cfg = RACES[race]
+    if weather is None:
+        weather = resolve_weather([race], provider_from_env(offline))[race]
+
+    # Lap and per-driver tables are persisted by training.extract, not the stage cache
+    laps, sectors = session_tables(*cfg["session"], force=force, offline=offline)
+    sectors_key = stage_key("sectors", {"session": cfg["session"]})
+    team_scores, team_scores_source = session_team_scores(cfg)
+    clean_air_pace = pace_by_driver(session_pace(*cfg["session"], force=force, laps=laps))
+
+    feature_inputs = {
+        "sectors": sectors_key,
+        "weather": weather,
+        "team_scores": team_scores_source,
+        "clean_air_race_pace": clean_air_pace,
+        **{k: cfg[k] for k in ["qualifying", "features"]}
+    }
+    return cached_stage(
+        "features", feature_inputs, lambda: build_features(cfg, sectors, weather, team_scores, clean_air_pace), force
+    )
+
+
+def train_race(race: str, force: bool = False, offline: bool = False,
+               weather: Optional[Tuple[float, float]] = None) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any], str]:
+    """(cfg, dataset, trained, train key) for a race, from cache where possible."""
+    cfg = RACES[race]
+    dataset, dataset_key = prepare_dataset(race, force=force, offline=offline, weather=weather)
+    train_inputs = {
+        "features": dataset_key, "model": cfg["model"], "params": cfg["params"], "test_size": cfg["test_size"],
+        "output_version": TRAIN_OUTPUT_VERSION
+    }
+    trained, trained_key = cached_stage("train", train_inputs, lambda: train(cfg, dataset), force)
+    return cfg, dataset, trained, trained_key
+
+
+def explain_race(race: str, trained: Dict[str, Any], trained_key: str, dataset: Dict[str, Any],
+                 force: bool = False, render_plot: bool = True) -> None:
+    """Cached SHAP values for a trained model, saved for re-rendering and optionally plotted."""
+    cfg = RACES[race]
+    explanation, _ = cached_stage(
+        "explain",
+        {"train": trained_key, "method": "native" if cfg["model"] != "ffn" else "kernel-sampled"},
+        lambda: explain(cfg, trained, dataset),
+        force
+    )
+    save_explanation(race, explanation)
+    if render_plot:
+        render(race)
+
+
+def run_race(race: str, force: bool = False, with_shap: bool = True, offline: bool = False,
+             weather: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """Run every stage for one race, reusing cached stage outputs where inputs are unchanged."""
+    cfg, dataset, trained, trained_key = train_race(race, force=force, offline=offline, weather=weather)
+
+    top5 = (
+        pd.DataFrame({"Driver": dataset["drivers"], "PredictedLapTime (s)": trained["predictions"]})
+        .sort_values("PredictedLapTime (s)")
+        .reset_index(drop=True)
+        .head(5)
+    )
+    top5.index = range(1, len(top5) + 1)
+    print(f"\nPredicted {race} race pace – Top 5")
+    print(top5)
+    print(f"\nMAE: {trained['mae']:.2f} s")
+
+    if with_shap and cfg["shap_plot"]:
+        # SHAP failures never block exporting the model
+        try:
+            explain_race(race, trained, trained_key, dataset, force=force)
+        except Exception as e:
+            print(f"SHAP error: {e}")
+
+    export(cfg, trained)
+    if cfg["model"] != "ffn":
+        # Training inputs as the drift monitor's reference (served races only)
+        save_reference(reference_path(MODELS_DIR, cfg["artifact"]), reference_from_training(race, dataset["X"]))
+    return {"race": race, "mae": trained["mae"], "train_key": trained_key}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train race pace models through the cached pipeline")
+    parser.add_argument("races", nargs="*", help=f"Races to train: {', '.join(RACES)}")
+    parser.add_argument("--all", action="store_true", help="Train every configured race")
+    parser.add_argument("--force", action="store_true", help="Ignore cached stage outputs")
+    parser.add_argument("--no-shap", action="store_true", help="Skip the explain stage (see training.explain)")
+    parser.add_argument("--jobs", type=int, default=1, help="Train this many races in parallel processes")
+    parser.add_argument("--threads", type=int, help="BLAS/XGBoost threads per parallel worker (default: cores / jobs)")
+    parser.add_argument("--offline", action="store_true", help="Read FastF1 data and forecasts from f1_cache only")
+    args = parser.parse_args()
+
+    races = list(RACES) if args.all else args.races
+    if not races:
+        parser.error("name at least one race or pass --all")
+    for race in races:
+        if race not in RACES:
+            parser.error(f"unknown race '{race}'")
+    if args.jobs > 1:
+        from training.parallel import train_races
+        train_races(races, args.jobs, args.threads, force=args.force, with_shap=not args.no_shap, offline=args.offline)
+        return
+    weather = resolve_weather(races, provider_from_env(args.offline))
+    for race in races:
+        run_race(race, force=args.force, with_shap=not args.no_shap, offline=args.offline, weather=weather[race])
+
+
+if __name__ == "__main__":
+    main()
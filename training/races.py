@@ -0,0 +1,156 @@
+"""Per-race training configuration.
+
+Everything that used to be hardcoded at the top of each per-race script lives
+here; `training.pipeline` turns one entry into a trained artifact in `models/`.
+Sessions are (year, round, session) so the extracted lap tables can be found
+without asking FastF1 for the event schedule. Team performance scores are
+not configured here: `features.team_scores` derives them from the season
+the session belongs to. Neither is clean-air race pace: `features.clean_air`
+measures it on the session's own laps.
+"""
+
+GBR_FEATURES = [
+    "QualifyingTime (s)",
+    "CleanAirRacePace (s)",
+    "TeamPerformanceScore",
+    "TotalSectorTime (s)",
+    "RainProbability"
+]
+
+XGB_FEATURES = [
+    "QualifyingTime",
+    "RainProbability",
+    "Temperature",
+    "TeamPerformanceScore",
+    "CleanAirRacePace (s)"
+]
+
+FFN_FEATURES = [
+    "QualifyingTime",
+    "CleanAirRacePace (s)",
+    "TotalSectorTime (s)",
+    "TeamPerformanceScore",
+    "RainProbability",
+    "Temperature"
+]
+
+XGB_PARAMS = {
+    "n_estimators": 300,
+    "learning_rate": 0.9,
+    "max_depth": 3,
+    "random_state": 39,
+    "monotone_constraints": "(1, 0, 0, -1, -1)"
+}
+
+RACES = {
+    "usa": {
+        "session": (2024, 19, "R"),
+        "lat": 30.1328,
+        "lon": -97.6411,
+        "forecast_time": "2025-10-19 14:00:00",
+        "default_temperature": 28,
+        "qualifying": {
+            "VER": 92.510, "NOR": 92.801, "LEC": 92.807, "RUS": 92.826, "HAM": 92.912,
+            "PIA": 93.084, "ANT": 93.114, "BEA": 93.139, "SAI": 93.150, "ALO": 93.160,
+            "LAW": 93.551, "TSU": 93.549, "GAS": 93.935, "COL": 93.599, "OCO": 94.039,
+            "STR": 94.125, "ALB": 94.136, "HAD": 94.540, "BOT": 94.690, "HUL": 999.999
+        },
+        "features": GBR_FEATURES,
+        "model": "gbr",
+        "params": {
+            "n_estimators": 400,
+            "learning_rate": 0.05,
+            "max_depth": 3,
+            "subsample": 0.9,
+            "random_state": 39
+        },
+        "test_size": 0.1,
+        "artifact": "us_model.joblib",
+        "shap_plot": "shap_usa.png"
+    },
+    "mexico": {
+        "session": (2024, 20, "R"),
+        "lat": 19.4042,
+        "lon": -99.0907,
+        "forecast_time": "2025-10-26 14:00:00",
+        "default_temperature": 22,
+        "qualifying": {
+            "VER": 77.100, "PER": 77.600, "NOR": 77.200, "PIA": 77.400, "LEC": 77.300,
+            "SAI": 77.250, "RUS": 77.500, "HAM": 77.700, "ALO": 78.100, "STR": 78.400,
+            "TSU": 78.600, "LAW": 78.800, "ALB": 78.500, "MAG": 79.100, "HUL": 79.000,
+            "GAS": 79.300, "OCO": 79.400, "BOT": 79.600, "ZHO": 79.800, "COL": 80.000
+        },
+        "features": GBR_FEATURES,
+        "model": "gbr",
+        "params": {
+            "n_estimators": 500,
+            "learning_rate": 0.05,
+            "max_depth": 3,
+            "subsample": 0.9,
+            "random_state": 39
+        },
+        "test_size": 0.1,
+        "artifact": "mexico_model.joblib",
+        "shap_plot": "shap_mexico.png"
+    },
+    "qatar": {
+        "session": (2024, 23, "R"),
+        "lat": 25.4889,
+        "lon": 51.4542,
+        "forecast_time": "2025-10-05 18:00:00",
+        "default_temperature": 30,
+        "qualifying": {
+            "RUS": 82.645, "VER": 82.207, "PIA": 82.437, "NOR": 82.408, "HAM": 83.394,
+            "LEC": 82.730, "ALO": 82.902, "HUL": 83.450, "ALB": 83.416,
+            "SAI": 83.042, "STR": 83.097, "OCO": 82.913, "GAS": 83.468
+        },
+        "features": XGB_FEATURES,
+        "model": "xgb",
+        "params": XGB_PARAMS,
+        "test_size": 0.1,
+        "artifact": "qatar_model.joblib",
+        "shap_plot": "shap_qatar.png"
+    },
+    "abudhabi": {
+        "session": (2024, 24, "R"),
+        "lat": 24.4672,
+        "lon": 54.6031,
+        "forecast_time": "2025-12-07 13:00:00",
+        "default_temperature": 20,
+        "qualifying": {
+            "RUS": 82.645, "VER": 82.207, "PIA": 82.437, "NOR": 82.408, "HAM": 83.394,
+            "LEC": 82.730, "ALO": 82.902, "HUL": 83.450, "ALB": 83.416,
+            "SAI": 83.042, "STR": 83.097, "OCO": 82.913, "GAS": 83.468
+        },
+        "features": XGB_FEATURES,
+        "model": "xgb",
+        "params": XGB_PARAMS,
+        "test_size": 0.1,
+        "artifact": "abu_dhabi_model.joblib",
+        "shap_plot": "shap_abudhabi.png"
+    },
+    "abudhabi_ffn": {
+        "session": (2024, 24, "R"),
+        "lat": 24.4672,
+        "lon": 54.6031,
+        "forecast_time": "2025-12-07 13:00:00",
+        "default_temperature": 20,
+        "qualifying": {
+            "VER": 82.207, "PIA": 82.437, "NOR": 82.408, "LEC": 82.730, "RUS": 82.645,
+            "HAM": 83.394, "ALO": 82.902, "SAI": 83.042, "STR": 83.097, "HUL": 83.450,
+            "OCO": 82.913, "ALB": 83.416, "GAS": 83.468
+        },
+        "features": FFN_FEATURES,
+        "model": "ffn",
+        "params": {
+            "hidden_units": [64, 32],
+            "learning_rate": 0.005,
+            "epochs": 400,
+            "batch_size": 8,
+            "patience": 40
+        },
+        "test_size": 0.2,
+        "artifact": "abu_dhabi_ffnmodel.keras",
+        "shap_plot": "shap_abudhabi_ffn.png"
+    }
+}
@@ -0,0 +1,268 @@
+"""Parallel k-fold hyperparameter search for the GBR and XGBoost race models.
+
+Trials run in worker processes, each limited to one thread. Every worker
+builds the k fold datasets once (as NumPy arrays and, for XGBoost, DMatrix
+objects) and reuses them for every trial it evaluates. XGBoost trials use
+`tree_method="hist"` with early stopping on each validation fold.
+
+A trial is evaluated fold by fold and pruned as soon as its running MAE is
+worse than the median of the trials that finished before it was submitted.
+Surviving trials are refit on the full dataset and their prediction latency
+is measured, so the report shows accuracy and speed side by side.
+
+Usage (from the repo root):
+    python -m training.search usa --trials 40 --folds 5 --jobs 8
+"""
+import os
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from training.cache import CACHE_DIR
+from training.parallel import THREAD_ENV_VARS, pin_threads
+
+SEARCH_DIR = os.path.join(CACHE_DIR, "search")
+EARLY_STOPPING_ROUNDS = 30
+MAX_BOOST_ROUNDS = 1000
+
+SEARCH_SPACES = {
+    "gbr": {
+        "n_estimators": [100, 200, 400, 600, 800],
+        "learning_rate": [0.01, 0.03, 0.05, 0.1],
+        "max_depth": [2, 3, 4],
+        "subsample": [0.7, 0.8, 0.9, 1.0]
+    },
+    "xgb": {
+        "learning_rate": [0.03, 0.1, 0.3, 0.9],
+        "max_depth": [2, 3, 4, 6],
+        "min_child_weight": [1, 3, 5],
+        "subsample": [0.7, 0.85, 1.0]
+    }
+}
+
+# Per-worker fold cache, filled once by _init_worker
+_folds: List[Dict[str, Any]] = []
+
+
+def sample_trials(kind: str, baseline: Dict[str, Any], n_trials: int, seed: int = 39) -> List[Dict[str, Any]]:
+    """The hand-picked baseline followed by distinct random draws from the search space."""
+    space = SEARCH_SPACES[kind]
+    rng = np.random.default_rng(seed)
+    fixed = {k: v for k, v in baseline.items() if k not in space}
+    trials = [dict(baseline)]
+    seen = {json.dumps(baseline, sort_keys=True, default=str)}
+    for _ in range(n_trials * 20):
+        if len(trials) >= n_trials:
+            break
+        params = {**fixed, **{k: values[rng.integers(len(values))] for k, values in space.items()}}
+        params = {k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+        key = json.dumps(params, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+    return trials
+
+
+def kfold_indices(n_rows: int, n_folds: int, seed: int = 39) -> List[np.ndarray]:
+    order = np.random.default_rng(seed).permutation(n_rows)
+    return np.array_split(order, n_folds)
+
+
+def _init_worker(kind: str, X: np.ndarray, y: np.ndarray, folds: List[np.ndarray]) -> None:
+    pin_threads(1)
+    _folds.clear()
+    for val_index in folds:
+        train_mask = np.ones(len(y), dtype=bool)
+        train_mask[val_index] = False
+        fold = {
+            "X_train": X[train_mask], "y_train": y[train_mask],
+            "X_val": X[val_index], "y_val": y[val_index]
+        }
+        if kind == "xgb":
+            import xgboost as xgb
+            fold["dtrain"] = xgb.DMatrix(fold["X_train"], label=fold["y_train"], nthread=1)
+            fold["dval"] = xgb.DMatrix(fold["X_val"], label=fold["y_val"], nthread=1)
+        _folds.append(fold)
+
+
+def should_prune(fold_maes: List[float], thresholds: List[Optional[float]]) -> bool:
+    """True when the running MAE after the latest fold is worse than that fold's threshold."""
+    threshold = thresholds[len(fold_maes) - 1] if len(fold_maes) <= len(thresholds) else None
+    return threshold is not None and float(np.mean(fold_maes)) > threshold
+
+
+def _xgb_booster_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    booster = {k: v for k, v in params.items() if k not in ("n_estimators", "random_state", "n_jobs")}
+    booster.update({
+        "tree_method": "hist",
+        "objective": "reg:squarederror",
+        "seed": params.get("random_state", 39),
+        "nthread": 1
+    })
+    return booster
+
+
+def _fit_fold(kind: str, params: Dict[str, Any], fold: Dict[str, Any]):
+    """(validation MAE, boosting rounds used) for one fold."""
+    if kind == "xgb":
+        import xgboost as xgb
+        booster = xgb.train(
+            _xgb_booster_params(params),
+            fold["dtrain"],
+            num_boost_round=MAX_BOOST_ROUNDS,
+            evals=[(fold["dval"], "val")],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            verbose_eval=False
+        )
+        rounds = booster.best_iteration + 1
+        predictions = booster.predict(fold["dval"], iteration_range=(0, rounds))
+    else:
+        from sklearn.ensemble import GradientBoostingRegressor
+        model = GradientBoostingRegressor(**params).fit(fold["X_train"], fold["y_train"])
+        rounds = params["n_estimators"]
+        predictions = model.predict(fold["X_val"])
+    return float(np.mean(np.abs(predictions - fold["y_val"]))), rounds
+
+
+def _evaluate(kind: str, trial_id: int, params: Dict[str, Any], thresholds: List[Optional[float]]) -> Dict[str, Any]:
+    fold_maes, rounds = [], []
+    for fold in _folds:
+        mae, used = _fit_fold(kind, params, fold)
+        fold_maes.append(mae)
+        rounds.append(used)
+        if should_prune(fold_maes, thresholds):
+            return {"trial": trial_id, "params": params, "pruned": True, "fold_maes": fold_maes}
+    return {
+        "trial": trial_id,
+        "params": params,
+        "pruned": False,
+        "fold_maes": fold_maes,
+        "cv_mae": float(np.mean(fold_maes)),
+        "cv_std": float(np.std(fold_maes)),
+        "n_estimators": int(np.mean(rounds))
+    }
+
+
+def _thresholds(finished: List[Dict[str, Any]], n_folds: int) -> List[Optional[float]]:
+    """Median running MAE per fold over completed trials (None until there are two)."""
+    complete = [np.cumsum(r["fold_maes"]) / np.arange(1, n_folds + 1) for r in finished if not r["pruned"]]
+    if len(complete) < 2:
+        return [None] * n_folds
+    return [float(v) for v in np.median(np.stack(complete), axis=0)]
+
+
+def measure_latency(model, X: np.ndarray, repeats: int = 50) -> Dict[str, float]:
+    """Best-of-`repeats` predict time for one row and for a 1000-row batch, in microseconds."""
+    row = X[:1]
+    batch = np.repeat(X, int(np.ceil(1000 / len(X))), axis=0)[:1000]
+
+    def best(data):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict(data)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1e6
+
+    return {"single_row_us": best(row), "batch_1000_us": best(batch)}
+
+
+def _final_model(kind: str, params: Dict[str, Any], n_estimators: int):
+    if kind == "xgb":
+        from xgboost import XGBRegressor
+        final = {k: v for k, v in params.items() if k != "n_jobs"}
+        return XGBRegressor(**{**final, "n_estimators": n_estimators, "tree_method": "hist", "n_jobs": 1})
+    from sklearn.ensemble import GradientBoostingRegressor
+    return GradientBoostingRegressor(**params)
+
+
+def search(kind: str, X: np.ndarray, y: np.ndarray, baseline: Dict[str, Any], n_trials: int = 30,
+           n_folds: int = 5, jobs: Optional[int] = None, seed: int = 39) -> List[Dict[str, Any]]:
+    """Run the search and return every trial, best (lowest CV MAE) first, pruned trials last."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    n_folds = min(n_folds, len(y))
+    jobs = jobs or os.cpu_count() or 1
+    trials = sample_trials(kind, baseline, n_trials, seed)
+    folds = kfold_indices(len(y), n_folds, seed)
+
+    saved_env = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = "1"
+    finished: List[Dict[str, Any]] = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(kind, X, y, folds)
+        ) as pool:
+            # Submit in waves so later trials are pruned against earlier results
+            for start in range(0, len(trials), jobs):
+                thresholds = _thresholds(finished, n_folds)
+                wave = [
+                    pool.submit(_evaluate, kind, trial_id, params, thresholds)
+                    for trial_id, params in enumerate(trials[start:start + jobs], start)
+                ]
+                finished.extend(future.result() for future in wave)
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+    for result in finished:
+        if result["pruned"]:
+            continue
+        model = _final_model(kind, result["params"], result["n_estimators"]).fit(X, y)
+        result.update(measure_latency(model, X))
+    return sorted(finished, key=lambda r: (r["pruned"], r.get("cv_mae", np.inf)))
+
+
+def print_report(results: List[Dict[str, Any]], top: int = 10) -> None:
+    print(f"\n{'trial':>5}{'CV MAE':>9}{'± std':>8}{'trees':>7}{'1 row (us)':>12}{'1k rows (us)':>14}  params")
+    for r in [r for r in results if not r["pruned"]][:top]:
+        params = {k: v for k, v in r["params"].items() if k not in ("random_state", "monotone_constraints")}
+        print(f"{r['trial']:>5}{r['cv_mae']:>9.3f}{r['cv_std']:>8.3f}{r['n_estimators']:>7}"
+              f"{r['single_row_us']:>12.0f}{r['batch_1000_us']:>14.0f}  {params}")
+    pruned = sum(r["pruned"] for r in results)
+    print(f"{len(results)} trials, {pruned} pruned early")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for a race model")
+    parser.add_argument("race", help="Race to tune (GBR or XGBoost races only)")
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--offline", action="store_true", help="Read FastF1 data and forecasts from f1_cache only")
+    args = parser.parse_args()
+
+    from sklearn.impute import SimpleImputer
+    from training.pipeline import prepare_dataset
+    from training.races import RACES
+
+    cfg = RACES[args.race]
+    if cfg["model"] not in SEARCH_SPACES:
+        parser.error(f"'{args.race}' uses a {cfg['model']} model; only gbr and xgb races can be searched")
+    dataset, _ = prepare_dataset(args.race, offline=args.offline)
+    # Same preprocessing as training.pipeline.train
+    X = SimpleImputer(strategy="median").fit_transform(dataset["X"])
+    results = search(cfg["model"], X, dataset["y"].to_numpy(), cfg["params"], args.trials, args.folds, args.jobs)
+    print_report(results)
+
+    os.makedirs(SEARCH_DIR, exist_ok=True)
+    path = os.path.join(SEARCH_DIR, f"{args.race}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"{path} saved")
+
+
+if __name__ == "__main__":
+    main()